@@ -0,0 +1,96 @@
+import hashlib
+import numpy as np
+
+# Constants of the SplitMix64 finalizer, used to spread the bits of numeric values
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def hash64(values):
+    """
+    Hash an array of values to 64-bit integers. Equal values always get equal hashes, in every process.
+
+    Numbers are hashed by their float64 bit pattern (so 1 and 1.0 hash alike); any other value is
+    hashed by its string form.
+
+    :param values: A numpy array (or sequence) of values.
+    :return: A numpy uint64 array with one hash per value.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        bits = (values.astype(np.float64) + 0.0).view(np.uint64)  # + 0.0 turns -0.0 into 0.0
+        bits = (bits ^ (bits >> np.uint64(30))) * _MIX_1
+        bits = (bits ^ (bits >> np.uint64(27))) * _MIX_2
+        return bits ^ (bits >> np.uint64(31))
+    return np.array([int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "little")
+                     for value in values], dtype=np.uint64)
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog sketch estimating the number of distinct values in a stream with constant memory.
+
+    The sketch keeps 2 ** precision one-byte registers; the relative error of the estimate is
+    about 1.04 / sqrt(2 ** precision) (1.6% for the default precision of 12). Sketches with the
+    same precision can be merged.
+    """
+
+    def __init__(self, precision=12):
+        """
+        Initialize an empty sketch.
+
+        :param precision: The number of hash bits used to pick a register (4 to 18). Default is 12.
+        :raises ValueError: If the precision is out of range.
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18.")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        """
+        Add a batch of values to the sketch.
+
+        :param values: A numpy array (or sequence) of values. Duplicates are hashed only once.
+        """
+        values = np.unique(np.asarray(values))
+        if len(values):
+            self.add_hashes(hash64(values))
+
+    def add_hashes(self, hashes):
+        """
+        Add precomputed 64-bit hashes to the sketch.
+
+        :param hashes: A numpy uint64 array.
+        """
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # The next 52 bits are exactly representable as a float, so frexp gives their bit length
+        rest = ((hashes << np.uint64(self.precision)) >> np.uint64(12)).astype(np.float64)
+        _, bit_length = np.frexp(rest)
+        rank = (53 - bit_length).astype(np.uint8)  # Position of the first 1-bit; 53 if none
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+
+        :param other: A HyperLogLog with the same precision.
+        :raises ValueError: If the precisions differ.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Only sketches with the same precision can be merged.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        """
+        Estimate the number of distinct values added so far.
+
+        :return: The estimated count, rounded to an integer.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))  # Linear counting for small cardinalities
+        return int(round(raw))
@@ -1,49 +1,181 @@
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, compact_column
+
 class ColumnIdentifier:
     """
     A class to identify numeric and categorical columns in a dataset.
+
+    Every column is profiled in a single pass over a sample of its rows. The profile records the
+    share of missing values (null rate), the share of present values that cannot be parsed as
+    numbers (parse-failure rate) and the number of distinct present values (cardinality), and the
+    column type is decided from those statistics rather than from a single value. Columns can
+    then be converted to the narrowest dtype that holds them (see `compact_dtypes`).
     """
 
-    def __init__(self, data):
+    def __init__(self, data, sample_size=None, max_failure_rate=0.05, hash_threshold=None):
         """
         Initialize the ColumnIdentifier with dataset rows.
 
-        :param data: A list of dictionaries where each dictionary represents a row of the dataset.
+        :param data: A ColumnarDataset, or a list of dictionaries where each dictionary represents a row of the dataset.
+        :param sample_size: The number of rows to profile per column, spread evenly over the dataset
+                            (optional, defaults to all rows).
+        :param max_failure_rate: The largest share of present values that may fail to parse as numbers
+                                 for a column to still be numeric. Default is 0.05, which allows a few stray
+                                 entries in a numeric column; values that fail to parse in a numeric column
+                                 are treated as missing during preprocessing.
+        :param hash_threshold: Categorical columns with more distinct values than this (in the profiled rows)
+                               are listed in `hashed_columns`, to be encoded by feature hashing instead of a
+                               vocabulary (optional, defaults to no hashing).
         :raises ValueError: If the provided dataset is not in the correct format.
         """
         self.data = data
+        self.sample_size = sample_size
+        self.max_failure_rate = max_failure_rate
+        self.hash_threshold = hash_threshold
+        self.column_stats = {}
+        self.numeric_columns = None
+        self.categorical_columns = None
+        self.hashed_columns = []
 
 
     def identify_column_types(self):
         """
         Identify numeric and categorical columns in the dataset.
 
+        The statistics gathered for each column are kept in `column_stats`, a dictionary mapping
+        column names to dictionaries with the keys 'null_rate', 'failure_rate', 'cardinality' and
+        'sample_size'. Categorical columns whose cardinality exceeds `hash_threshold` are also
+        listed in `hashed_columns`.
+
         :return: A tuple containing:
                  - numeric_columns: A list of column names with numeric data.
                  - categorical_columns: A list of column names with categorical data.
         :raises ValueError: If the dataset is empty or improperly formatted.
         """
-        # Ensure data is not empty
-        if not self.data or not isinstance(self.data, list) or not self.data[0]:
+        if isinstance(self.data, ColumnarDataset):
+            dataset = self.data
+        else:
+            # Ensure data is not empty
+            if not self.data or not isinstance(self.data, list) or not self.data[0]:
+                raise ValueError("Dataset is empty or improperly formatted.")
+            dataset = ColumnarDataset.from_rows(self.data)
+
+        if not len(dataset) or not dataset.headers:
             raise ValueError("Dataset is empty or improperly formatted.")
 
+        rows = self._sample_rows(len(dataset))
+
         numeric_columns = []
         categorical_columns = []
+        self.column_stats = {}
 
         # Filter out empty column names
-        valid_columns = [col for col in self.data[0].keys() if col.strip()]
-
-        # Loop through each valid column to determine its type
-        for column in valid_columns:
-            try:
-                # Try casting the first non-empty, non-None value in the column to a float
-                for row in self.data:
-                    value = row[column]
-                    if value is not None and str(value).strip():  # Check for None or blank strings
-                        float(value)  # Attempt to cast
-                        break
+        for column in dataset.headers:
+            if not column.strip():
+                continue
+            values = dataset.columns[column]
+            mask = dataset.masks[column]
+            if rows is not None:
+                values = values[rows]
+                mask = mask[rows]
+
+            stats = self._column_stats(values, mask, dataset.categories.get(column))
+            self.column_stats[column] = stats
+            if stats["failure_rate"] <= self.max_failure_rate:
                 numeric_columns.append(column)
-            except ValueError:
-                # If casting fails, it's a categorical column
+            else:
                 categorical_columns.append(column)
 
-        return numeric_columns, categorical_columns
\ No newline at end of file
+        self.numeric_columns, self.categorical_columns = numeric_columns, categorical_columns
+        self.hashed_columns = []
+        if self.hash_threshold is not None:
+            self.hashed_columns = [column for column in categorical_columns
+                                   if self.column_stats[column]["cardinality"] > self.hash_threshold]
+        return numeric_columns, categorical_columns
+
+    def compact_dtypes(self):
+        """
+        Convert the columns of the dataset to the narrowest dtype that holds them losslessly.
+
+        Numeric columns become bool, int8/int16/int32 or float32 where every value fits, and
+        categorical columns are dictionary-encoded (integer codes plus an array of categories).
+        Missing values stay marked in the dataset masks. The chosen dtype of each column is
+        recorded in `column_stats` under 'dtype' ('category' for dictionary-encoded columns).
+        Column types are identified first if that has not been done yet.
+
+        :return: The ColumnarDataset with compact columns.
+        :raises ValueError: If the data is not a ColumnarDataset.
+        """
+        if not isinstance(self.data, ColumnarDataset):
+            raise ValueError("Compact dtypes require a ColumnarDataset.")
+        if self.numeric_columns is None:
+            self.identify_column_types()
+
+        for column in self.numeric_columns + self.categorical_columns:
+            values = self.data.columns[column]
+            mask = self.data.masks[column]
+            if column in self.data.categories:
+                self.column_stats[column]["dtype"] = "category"
+                continue
+            if column in self.numeric_columns and values.dtype == object:
+                # Unparsable entries are dealt with during preprocessing
+                self.column_stats[column]["dtype"] = "object"
+                continue
+
+            values, categories = compact_column(values, mask)
+            self.data.set_column(column, values, mask, categories)
+            self.column_stats[column]["dtype"] = "category" if categories is not None else str(values.dtype)
+
+        return self.data
+
+    def _sample_rows(self, n_rows):
+        """
+        Choose the rows to profile.
+
+        :param n_rows: The number of rows in the dataset.
+        :return: An array of evenly spaced row indices, or None to profile every row.
+        """
+        if self.sample_size is None or self.sample_size >= n_rows:
+            return None
+        return np.linspace(0, n_rows - 1, self.sample_size).astype(np.int64)
+
+    @staticmethod
+    def _column_stats(values, mask, categories=None):
+        """
+        Compute the profile of a single column.
+
+        Text columns are reduced to their distinct values first, so every distinct string is
+        parsed only once and the failure count follows from the value counts.
+
+        :param values: A numpy array of column values (dictionary codes if `categories` is given).
+        :param mask: A boolean array that is True where the value is missing.
+        :param categories: The array of categories of a dictionary-encoded column (optional).
+        :return: A dictionary with the keys 'null_rate', 'failure_rate', 'cardinality' and 'sample_size'.
+        """
+        n_values = len(values)
+        n_missing = int(mask.sum())
+        present = values[~mask]
+
+        if categories is None and values.dtype.kind in "biuf":
+            cardinality = len(np.unique(present))
+            n_failures = 0
+        else:
+            if categories is None:
+                uniques, counts = np.unique(present.astype(str), return_counts=True)
+            else:
+                counts = np.bincount(present, minlength=len(categories))
+                uniques, counts = categories[counts > 0], counts[counts > 0]
+            cardinality = len(uniques)
+            n_failures = 0
+            for value, count in zip(uniques, counts):
+                try:
+                    float(value)
+                except (ValueError, TypeError):
+                    n_failures += int(count)
+
+        return {
+            "null_rate": n_missing / n_values if n_values else 0.0,
+            "failure_rate": n_failures / len(present) if len(present) else 0.0,
+            "cardinality": cardinality,
+            "sample_size": n_values,
+        }
@@ -1,20 +1,89 @@
 import csv
+import os
+from itertools import islice
+from mlstart.core.dataset import ColumnarDataset
+
+# Files smaller than this are always parsed in a single process
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+def read_raw_columns(reader, n_columns, max_rows=None, indices=None):
+    """
+    Read rows from a csv reader and transpose them into one list of raw values per column.
+
+    Blank lines are skipped (as csv.DictReader does), short rows are padded with None and
+    extra fields are ignored.
+
+    :param reader: A csv.reader positioned after the header row.
+    :param n_columns: The number of columns in the header.
+    :param max_rows: The maximum number of rows to read (optional, defaults to all remaining rows).
+    :param indices: The positions of the columns to keep (optional, defaults to all columns). Values of
+                    other columns are never stored.
+    :return: A list of lists, one list of raw cell values per kept column.
+    """
+    rows = (row for row in reader if row)
+    if indices is None:
+        raw_columns = [[] for _ in range(n_columns)]
+        for row in islice(rows, max_rows):
+            if len(row) < n_columns:
+                row = row + [None] * (n_columns - len(row))
+            for column, value in zip(raw_columns, row):
+                column.append(value)
+        return raw_columns
+
+    raw_columns = [[] for _ in indices]
+    for row in islice(rows, max_rows):
+        if len(row) < n_columns:
+            row = row + [None] * (n_columns - len(row))
+        for column, index in zip(raw_columns, indices):
+            column.append(row[index])
+    return raw_columns
+
+
+def select_column_indices(headers, columns=None, exclude_columns=None):
+    """
+    Find the positions of the columns to parse from a header row.
+
+    Columns with a blank name are always skipped.
+
+    :param headers: A list of column headers as read from the file.
+    :param columns: A collection of column names to keep (optional, defaults to all columns).
+    :param exclude_columns: A collection of column names to skip (optional).
+    :return: A list of column positions, in file order.
+    :raises ValueError: If a requested column is not in the header, or no column is left to parse.
+    """
+    if columns is not None:
+        missing = [name for name in columns if name not in headers]
+        if missing:
+            raise ValueError(f"Columns not found in the dataset: {missing}")
+    exclude_columns = set(exclude_columns or ())
+    indices = [index for index, name in enumerate(headers)
+               if name.strip() and (columns is None or name in columns) and name not in exclude_columns]
+    if not indices:
+        raise ValueError("No columns left to load after applying the column selection.")
+    return indices
+
 
 class DataLoader:
     """
     A class to load data from a CSV file.
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, columns=None, exclude_columns=None):
         """
         Initialize the DataLoader class with the path to the dataset file.
 
         :param file_path: A string representing the path to the dataset file (CSV format).
+        :param columns: A list of column names to load (optional, defaults to all columns). Other columns
+                        are skipped while parsing and never held in memory.
+        :param exclude_columns: A list of column names to skip while parsing (optional).
         :raises ValueError: If the file path is invalid or not accessible.
         """
         self.file_path = file_path
+        self.columns = columns
+        self.exclude_columns = exclude_columns
         self.headers = None
         self.data = []
+        self.dataset = None
 
     def load_data(self):
         """
@@ -34,8 +103,14 @@ class DataLoader:
                 if not self.headers:
                     raise ValueError("The CSV file is empty \nor the file is not in CSV format \nor improperly formatted.")
 
-                for row in reader:
-                    self.data.append(row)
+                if self.columns is None and self.exclude_columns is None:
+                    for row in reader:
+                        self.data.append(row)
+                else:
+                    indices = select_column_indices(self.headers, self.columns, self.exclude_columns)
+                    self.headers = [self.headers[index] for index in indices]
+                    for row in reader:
+                        self.data.append({name: row[name] for name in self.headers})
 
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {self.file_path}")
@@ -43,3 +118,139 @@ class DataLoader:
             raise ValueError(f"Error loading file: {e}")
 
         return self.headers, self.data
+
+    def load_dataset(self, text_columns=None, workers=None, cache=None):
+        """
+        Load the dataset from the specified file path into a columnar, typed dataset.
+
+        Every cell is parsed exactly once: numeric columns become float64 arrays and text columns are
+        dictionary-encoded as integer codes into a sorted array of categories (see `encode_column`),
+        each with a mask marking missing values. Numeric columns are not narrowed here; that is done
+        later, if requested, by ColumnIdentifier.compact_dtypes. Rows with fewer fields than
+        the header are padded with missing values; extra fields are ignored. Only the selected
+        columns are parsed (see `columns` and `exclude_columns`), and columns with a blank name are
+        always skipped.
+
+        :param text_columns: A list of column names to keep as text even if all values are numeric (optional).
+        :param workers: The number of worker processes used to parse the file (optional). With more than one
+                        worker, files larger than PARALLEL_MIN_BYTES are split into newline-aligned byte
+                        ranges that are parsed in parallel (see ParallelCSVLoader).
+        :param cache: A DatasetCache (optional). If it holds an entry for the current content of the file,
+                      the dataset is memory-mapped from the cache instead of parsing the CSV; otherwise the
+                      parsed dataset is stored in it. The cache is not used together with text_columns.
+        :return: A tuple containing:
+                 - headers: A list of column headers in the dataset.
+                 - dataset: A ColumnarDataset holding the parsed columns.
+        :raises FileNotFoundError: If the file does not exist at the specified path.
+        :raises ValueError: If the file is empty, not in CSV format, or improperly formatted.
+        """
+        try:
+            # The cache keeps projected loads apart from full ones
+            projection = None
+            if self.columns is not None or self.exclude_columns is not None:
+                with open(self.file_path, mode="r", newline="") as file:
+                    file_headers = self._read_headers(csv.reader(file))
+                projection = [file_headers[index] for index in
+                              select_column_indices(file_headers, self.columns, self.exclude_columns)]
+
+            use_cache = cache is not None and not text_columns
+            if use_cache:
+                cached = cache.load(self.file_path, projection)
+                if cached is not None:
+                    self.headers, self.dataset = cached
+                    return self.headers, self.dataset
+
+            if workers and workers > 1 and os.path.getsize(self.file_path) >= PARALLEL_MIN_BYTES:
+                from mlstart.core.parallel_loader import ParallelCSVLoader
+
+                loader = ParallelCSVLoader(self.file_path, workers, self.columns, self.exclude_columns)
+                self.headers, self.dataset = loader.load(text_columns)
+            else:
+                with open(self.file_path, mode="r", newline="") as file:
+                    reader = csv.reader(file)
+                    file_headers = self._read_headers(reader)
+                    indices = select_column_indices(file_headers, self.columns, self.exclude_columns)
+                    raw_columns = read_raw_columns(reader, len(file_headers), indices=indices)
+
+                self.headers = [file_headers[index] for index in indices]
+                self.dataset = ColumnarDataset.from_raw_columns(self.headers, raw_columns, text_columns)
+
+            if use_cache:
+                cache.store(self.file_path, self.headers, self.dataset, projection)
+
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        except Exception as e:
+            raise ValueError(f"Error loading file: {e}")
+
+        return self.headers, self.dataset
+
+    def read_headers(self):
+        """
+        Read only the header row of the dataset file.
+
+        :return: A list of the column headers that `load_dataset` and `iter_batches` produce.
+        :raises FileNotFoundError: If the file does not exist at the specified path.
+        :raises ValueError: If the file is empty, not in CSV format, or improperly formatted.
+        """
+        try:
+            with open(self.file_path, mode="r", newline="") as file:
+                file_headers = self._read_headers(csv.reader(file))
+            indices = select_column_indices(file_headers, self.columns, self.exclude_columns)
+            self.headers = [file_headers[index] for index in indices]
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        except Exception as e:
+            raise ValueError(f"Error loading file: {e}")
+
+        return self.headers
+
+    def iter_batches(self, batch_size=10000, text_columns=None):
+        """
+        Stream the dataset from the specified file path in fixed-size batches of rows.
+
+        Only one batch is held in memory at a time, so the memory of the pass itself does not depend on
+        the file size (a consumer that keeps the batches, such as MLStartPipeline before training,
+        still grows with it). Every call starts a new pass over the file.
+
+        :param batch_size: The maximum number of rows per batch. Default is 10000.
+        :param text_columns: A list of column names to keep as text even if all values in a batch
+                             are numeric (optional). Use this for categorical columns so that every
+                             batch stores them the same way.
+        :return: A generator yielding ColumnarDataset batches.
+        :raises FileNotFoundError: If the file does not exist at the specified path.
+        :raises ValueError: If the file is empty, not in CSV format, or improperly formatted.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+
+        try:
+            with open(self.file_path, mode="r", newline="") as file:
+                reader = csv.reader(file)
+                file_headers = self._read_headers(reader)
+                indices = select_column_indices(file_headers, self.columns, self.exclude_columns)
+                self.headers = [file_headers[index] for index in indices]
+                while True:
+                    raw_columns = read_raw_columns(reader, len(file_headers), batch_size, indices)
+                    if not raw_columns[0]:
+                        break
+                    yield ColumnarDataset.from_raw_columns(self.headers, raw_columns, text_columns)
+
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        except Exception as e:
+            raise ValueError(f"Error loading file: {e}")
+
+    @staticmethod
+    def _read_headers(reader):
+        """
+        Read and validate the header row from a csv reader.
+
+        :param reader: A csv.reader positioned at the start of the file.
+        :return: A list of column headers.
+        :raises ValueError: If the file has no header row.
+        """
+        headers = next(reader, None)
+        if not headers:
+            raise ValueError("The CSV file is empty \nor the file is not in CSV format \nor improperly formatted.")
+        return headers
@@ -0,0 +1,433 @@
+import numpy as np
+
+# String representations that are treated as missing values
+MISSING_TOKENS = ("null", "nan", "?", "", "none")
+
+
+def is_missing_value(value):
+    """
+    Check whether a single raw cell value represents a missing value.
+
+    :param value: The raw cell value (usually a string, but may be None or a number).
+    :return: True if the value is None, NaN or one of the MISSING_TOKENS strings.
+    """
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in MISSING_TOKENS
+    if isinstance(value, float):
+        return value != value  # NaN
+    return False
+
+
+def parse_column(values, as_text=False):
+    """
+    Parse the raw cells of a single column into a typed array and a missing-value mask.
+
+    A column whose non-missing cells all parse as numbers is returned as a float64 array
+    (missing cells hold NaN). Any other column is returned as an object array holding the
+    original values (missing cells hold None).
+
+    :param values: A list of raw cell values for one column.
+    :param as_text: If True, always return an object array, even if every value is numeric.
+    :return: A tuple containing:
+             - array: A numpy array with the parsed column values.
+             - mask: A boolean numpy array that is True where the value is missing.
+    """
+    array, mask, categories = encode_column(values, as_text)
+    if categories is None:
+        return array, mask
+    lookup = np.empty(len(categories) + 1, dtype=object)
+    lookup[:-1] = categories
+    return lookup[array], mask  # Code -1 selects the trailing None
+
+
+def encode_column(values, as_text=False):
+    """
+    Parse the raw cells of a single column, dictionary-encoding text columns.
+
+    A column whose non-missing cells all parse as numbers is returned as a float64 array (missing
+    cells hold NaN). Any other column is returned as integer codes into a sorted array of its
+    distinct present values, with code -1 at missing positions. Missing-value detection and number
+    parsing run once per distinct cell value rather than once per cell.
+
+    :param values: A list of raw cell values for one column.
+    :param as_text: If True, always dictionary-encode the column, even if every value is numeric.
+    :return: A tuple containing:
+             - array: A float64 array, or an array of integer codes.
+             - mask: A boolean numpy array that is True where the value is missing.
+             - categories: The object array of categories of a dictionary-encoded column, otherwise None.
+    """
+    # Fast path: every cell is a valid number
+    if not as_text:
+        try:
+            array = np.array([float(value) for value in values], dtype=np.float64)
+            return array, np.isnan(array), None
+        except (ValueError, TypeError):
+            pass
+
+    # Number every distinct cell value in order of first occurrence
+    index = {}
+    raw_codes = np.fromiter((index.setdefault(value, len(index)) for value in values),
+                            dtype=np.int64, count=len(values))
+    uniques = list(index)
+    missing = np.array([is_missing_value(value) for value in uniques], dtype=bool)
+
+    if not as_text:
+        parsed = np.full(len(uniques), np.nan)
+        try:
+            for i in np.flatnonzero(~missing):
+                parsed[i] = float(uniques[i])
+            return parsed[raw_codes], missing[raw_codes], None
+        except (ValueError, TypeError):
+            pass
+
+    present = np.flatnonzero(~missing)
+    try:
+        order = present[sorted(range(len(present)), key=lambda i: uniques[present[i]])]
+    except TypeError:
+        # Values of different types cannot be ordered; keep them as objects
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        mask = missing[raw_codes]
+        array[mask] = None
+        return array, mask, None
+
+    categories = np.empty(len(order), dtype=object)
+    categories[:] = [uniques[i] for i in order]
+    unique_codes = np.full(len(uniques), -1, dtype=smallest_int_dtype(-1, len(categories)) or np.int64)
+    unique_codes[order] = np.arange(len(order))
+    codes = unique_codes[raw_codes]
+    return codes, codes < 0, categories
+
+
+def smallest_int_dtype(low, high):
+    """
+    Find the narrowest signed integer dtype (up to 32 bits) that holds a range of values.
+
+    :param low: The smallest value.
+    :param high: The largest value.
+    :return: A numpy dtype, or None if the range does not fit in 32 bits.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return None
+
+
+def compact_column(values, mask):
+    """
+    Convert a column to the narrowest dtype that holds every present value losslessly.
+
+    Float columns become bool (only 0 and 1), int8/int16/int32 (only whole numbers) or float32
+    (every value keeps its shortest decimal representation, from which `to_float64` restores the
+    original value); text columns are dictionary-encoded
+    as integer codes into a sorted array of categories, with code -1 at missing positions.
+
+    :param values: A numpy array of column values.
+    :param mask: A boolean array that is True where the value is missing.
+    :return: A tuple containing:
+             - values: The converted array (or the original array if nothing narrower fits).
+             - categories: The array of categories for a dictionary-encoded column, otherwise None.
+    """
+    present = values[~mask]
+    if values.dtype == object:
+        try:
+            categories = np.unique(present)
+        except TypeError:
+            return values, None  # Values of different types cannot be ordered
+        codes = np.full(len(values), -1, dtype=smallest_int_dtype(-1, len(categories)) or np.int64)
+        codes[~mask] = np.searchsorted(categories, present)
+        return codes, categories
+
+    if values.dtype.kind != "f" or not len(present):
+        return values, None
+
+    uniques = np.unique(present)
+    if np.array_equal(uniques, np.round(uniques)):
+        if uniques[0] >= 0 and uniques[-1] <= 1:
+            return np.where(mask, False, values == 1), None
+        dtype = smallest_int_dtype(uniques[0], uniques[-1])
+        if dtype is not None:
+            return np.where(mask, 0, values).astype(dtype), None
+
+    if np.array_equal(uniques.astype(np.float32).astype(str).astype(np.float64), uniques):
+        return values.astype(np.float32), None
+    return values, None
+
+
+def to_float64(values):
+    """
+    Convert a numeric array to float64 for arithmetic. A float32 array (as made by `compact_column`) is
+    converted through the shortest decimal representation of its values, which restores the exact
+    float64 values it was compacted from; a plain cast would give the nearest float64 to the float32
+    value instead.
+
+    :param values: A numeric numpy array.
+    :return: A float64 array (a new array, even if `values` already is float64).
+    """
+    if values.dtype != np.float32:
+        return values.astype(np.float64)
+    uniques, inverse = np.unique(values, return_inverse=True)
+    return uniques.astype(str).astype(np.float64)[inverse.reshape(values.shape)]
+
+
+class ColumnarDataset:
+    """
+    A column-oriented, typed in-memory dataset.
+
+    Each column is stored as a numpy array together with a boolean mask marking missing values.
+    Numeric columns are parsed once (at load time) into float arrays; text columns are kept as
+    object arrays, or dictionary-encoded as integer codes plus an array of categories (see
+    `compact_column`). A dictionary-encoded column can be marked as one-hot, in which case it
+    stands for one sparse indicator feature per category (see `one_hot_matrix`). Arrays are never
+    modified in place, so they can safely be shared between datasets (for example after `select`
+    or `take`).
+    """
+
+    def __init__(self, columns, masks=None, categories=None, one_hot_columns=None):
+        """
+        Initialize the ColumnarDataset with column arrays and missing-value masks.
+
+        :param columns: A dictionary mapping column names to numpy arrays of equal length.
+        :param masks: A dictionary mapping column names to boolean arrays that are True where
+                      a value is missing. Columns without a mask are treated as complete.
+        :param categories: A dictionary mapping the names of dictionary-encoded columns to their
+                           arrays of categories (optional).
+        :param one_hot_columns: A collection of dictionary-encoded column names to mark as one-hot
+                                (optional).
+        :raises ValueError: If the columns do not all have the same length.
+        """
+        self.columns = {}
+        self.masks = {}
+        self.categories = {}
+        self.one_hot_columns = set()
+        self.n_rows = None
+        masks = masks or {}
+        categories = categories or {}
+        one_hot_columns = one_hot_columns or ()
+        for name, values in columns.items():
+            self.set_column(name, values, masks.get(name), categories.get(name), name in one_hot_columns)
+
+    @classmethod
+    def from_raw_columns(cls, headers, raw_columns, text_columns=None):
+        """
+        Build a dataset by parsing raw (string) column values. Text columns are dictionary-encoded
+        (see `encode_column`).
+
+        :param headers: A list of column names.
+        :param raw_columns: A list of lists, one list of raw cell values per column.
+        :param text_columns: A collection of column names to keep as text even if numeric (optional).
+        :return: A ColumnarDataset with typed columns.
+        """
+        text_columns = text_columns or ()
+        columns = {}
+        masks = {}
+        categories = {}
+        for name, values in zip(headers, raw_columns):
+            columns[name], masks[name], column_categories = encode_column(values, as_text=name in text_columns)
+            if column_categories is not None:
+                categories[name] = column_categories
+        return cls(columns, masks, categories)
+
+    @classmethod
+    def from_rows(cls, rows, headers=None):
+        """
+        Build a dataset from a list of dictionaries (the row-oriented representation).
+
+        :param rows: A list of dictionaries where each dictionary represents a row of the dataset.
+        :param headers: A list of column names. Defaults to the keys of the first row.
+        :return: A ColumnarDataset with typed columns.
+        """
+        if headers is None:
+            headers = list(rows[0].keys()) if rows else []
+        raw_columns = [[row.get(name) for row in rows] for name in headers]
+        return cls.from_raw_columns(headers, raw_columns)
+
+    @classmethod
+    def concat(cls, datasets):
+        """
+        Concatenate datasets with identical columns row-wise. Dictionary-encoded columns stay
+        encoded: their categories are merged and the codes of each part are translated.
+
+        :param datasets: A list of ColumnarDataset objects.
+        :return: A new ColumnarDataset containing all rows in order.
+        """
+        headers = datasets[0].headers
+        columns = {}
+        masks = {}
+        categories = {}
+        for name in headers:
+            part_categories = [dataset.categories.get(name) for dataset in datasets]
+            merged = None
+            if all(part is not None for part in part_categories):
+                merged = part_categories[0]
+                if not all(np.array_equal(part, merged) for part in part_categories):
+                    try:
+                        merged = np.unique(np.concatenate(part_categories))
+                    except TypeError:
+                        merged = None  # Categories of different types cannot be ordered
+            if merged is not None:
+                categories[name] = merged
+                parts = []
+                dtype = smallest_int_dtype(-1, len(merged)) or np.int64
+                for dataset, part in zip(datasets, part_categories):
+                    # Code -1 (missing) selects the trailing -1
+                    lookup = np.append(np.searchsorted(merged, part), -1).astype(dtype)
+                    parts.append(lookup[np.where(dataset.masks[name], -1, dataset.columns[name])])
+            else:
+                parts = [dataset.decode(name) for dataset in datasets]
+            if any(part.dtype == object for part in parts):
+                parts = [part.astype(object) for part in parts]
+            columns[name] = np.concatenate(parts)
+            masks[name] = np.concatenate([dataset.masks[name] for dataset in datasets])
+        one_hot_columns = [name for name in categories if name in datasets[0].one_hot_columns]
+        return cls(columns, masks, categories, one_hot_columns)
+
+    @property
+    def headers(self):
+        """
+        :return: A list of the column names in order.
+        """
+        return list(self.columns.keys())
+
+    def __len__(self):
+        return self.n_rows or 0
+
+    def is_numeric(self, name):
+        """
+        Check whether a column is stored with a numeric dtype.
+
+        :param name: The column name.
+        :return: True if the column holds numbers, False if it holds text (objects or dictionary codes).
+        """
+        return name not in self.categories and self.columns[name].dtype.kind in "biuf"
+
+    def decode(self, name):
+        """
+        Get the values of a column, translating dictionary codes back to their categories.
+
+        :param name: The column name.
+        :return: A numpy array of values. Missing values of a dictionary-encoded column are None.
+        """
+        values = self.columns[name]
+        categories = self.categories.get(name)
+        if categories is None:
+            return values
+        lookup = np.empty(len(categories) + 1, dtype=object)
+        lookup[:-1] = categories
+        return lookup[np.where(self.masks[name], -1, values)]  # Code -1 selects the trailing None
+
+    def one_hot_matrix(self, name):
+        """
+        Build the one-hot indicators of a dictionary-encoded column directly as a sparse matrix, with
+        one stored entry per present value (missing rows have no entry).
+
+        :param name: The column name.
+        :return: A scipy.sparse CSR matrix with one row per row and one column per category.
+        """
+        from scipy import sparse
+
+        present = ~self.masks[name]
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(present, out=indptr[1:])
+        codes = self.columns[name][present].astype(np.int32)
+        return sparse.csr_matrix((np.ones(len(codes), dtype=np.int8), codes, indptr),
+                                 shape=(len(self), len(self.categories[name])))
+
+    def set_column(self, name, values, mask=None, categories=None, one_hot=False):
+        """
+        Add or replace a column. A replaced column keeps its position.
+
+        :param name: The column name.
+        :param values: A numpy array (or sequence) with one value per row.
+        :param mask: A boolean array that is True where the value is missing (optional).
+        :param categories: The array of categories if `values` holds dictionary codes (optional).
+        :param one_hot: If True, mark the dictionary-encoded column as one-hot (see `one_hot_matrix`).
+        :raises ValueError: If the column length does not match the dataset.
+        """
+        values = np.asarray(values)
+        if self.n_rows is None:
+            self.n_rows = len(values)
+        elif len(values) != self.n_rows:
+            raise ValueError(f"Column '{name}' has {len(values)} rows, expected {self.n_rows}.")
+        if mask is None:
+            mask = np.zeros(len(values), dtype=bool)
+        self.columns[name] = values
+        self.masks[name] = np.asarray(mask, dtype=bool)
+        if categories is None:
+            self.categories.pop(name, None)
+        else:
+            self.categories[name] = categories
+        if one_hot and categories is not None:
+            self.one_hot_columns.add(name)
+        else:
+            self.one_hot_columns.discard(name)
+
+    def drop_columns(self, names):
+        """
+        Remove columns from the dataset.
+
+        :param names: A list of column names to remove. Unknown names are ignored.
+        """
+        for name in names:
+            self.columns.pop(name, None)
+            self.masks.pop(name, None)
+            self.categories.pop(name, None)
+            self.one_hot_columns.discard(name)
+
+    def select(self, names):
+        """
+        Create a dataset restricted to the given columns. Arrays are shared, not copied.
+
+        :param names: A list of column names to keep, in the desired order.
+        :return: A new ColumnarDataset.
+        """
+        selected = ColumnarDataset({name: self.columns[name] for name in names},
+                                   {name: self.masks[name] for name in names},
+                                   {name: self.categories[name] for name in names if name in self.categories},
+                                   self.one_hot_columns)
+        if not names:
+            selected.n_rows = self.n_rows
+        return selected
+
+    def take(self, rows):
+        """
+        Create a dataset with a subset of the rows.
+
+        :param rows: An array of row indices or a boolean array selecting the rows to keep.
+        :return: A new ColumnarDataset.
+        """
+        columns = {name: values[rows] for name, values in self.columns.items()}
+        masks = {name: mask[rows] for name, mask in self.masks.items()}
+        return ColumnarDataset(columns, masks, self.categories, self.one_hot_columns)
+
+    def copy(self):
+        """
+        :return: A shallow copy of the dataset (arrays are shared, the column mapping is not).
+        """
+        return self.select(self.headers)
+
+    def to_list(self, name):
+        """
+        Convert a single column to a Python list, with missing values represented as None.
+
+        :param name: The column name.
+        :return: A list with one Python value per row.
+        """
+        values = self.decode(name).tolist()
+        for i in np.flatnonzero(self.masks[name]):
+            values[i] = None
+        return values
+
+    def to_rows(self):
+        """
+        Convert the dataset to the row-oriented representation used by the rest of the
+        toolkit: a list of dictionaries, with missing values represented as None.
+
+        :return: A list of dictionaries where each dictionary represents a row of the dataset.
+        """
+        headers = self.headers
+        columns = [self.to_list(name) for name in headers]
+        return [dict(zip(headers, row)) for row in zip(*columns)]
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, smallest_int_dtype
+
+# Number of bytes read at a time when hashing a file
+HASH_BLOCK_SIZE = 1 << 20
+
+
+class DatasetCache:
+    """
+    An on-disk cache of parsed datasets, keyed by the content of the source file.
+
+    Each entry stores the typed columns of a ColumnarDataset as .npy files (text columns are stored
+    as integer codes plus a table of unique strings) next to a JSON manifest. Entries are read back
+    with memory mapping, so repeated runs skip CSV parsing and concurrent runs share the same pages
+    through the operating system's file cache.
+    """
+
+    def __init__(self, cache_dir=".mlstart_cache"):
+        """
+        Initialize the DatasetCache.
+
+        :param cache_dir: The directory in which cache entries are stored. Created if needed.
+        """
+        self.cache_dir = cache_dir
+
+    def fingerprint(self, file_path):
+        """
+        Compute the fingerprint of a file: a hash of its size and content.
+
+        The modification time is not part of the hash, so a file touched without changing keeps its
+        fingerprint. The hash is remembered per path together with the size and modification time,
+        so the file is only read again when either of them changes.
+
+        :param file_path: The path to the file.
+        :return: A hexadecimal string identifying the file content.
+        :raises FileNotFoundError: If the file does not exist.
+        """
+        stat = os.stat(file_path)
+        index_path = os.path.join(self.cache_dir, "index.json")
+        index = self._read_json(index_path) or {}
+        key = os.path.abspath(file_path)
+        entry = index.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["content_hash"]
+
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(str(stat.st_size).encode())
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "content_hash": content_hash}
+        self._write_json(index_path, index)
+        return content_hash
+
+    def load(self, file_path, columns=None):
+        """
+        Load the cached dataset for a file, if the cache holds an entry for its current content.
+
+        A projected load (`columns` given) is served from an entry stored for the same projection,
+        or else from the full entry of the file, of which only the requested columns are mapped.
+
+        :param file_path: The path to the source CSV file.
+        :param columns: The list of column names that was loaded from the file (optional, defaults to
+                        all columns).
+        :return: A tuple (headers, dataset), or None if there is no entry for the file.
+        """
+        content_hash = self.fingerprint(file_path)
+        keys = [content_hash]
+        if columns is not None:
+            keys.insert(0, self._entry_key(content_hash, columns))
+
+        for key in keys:
+            entry_dir = os.path.join(self.cache_dir, key)
+            manifest = self._read_json(os.path.join(entry_dir, "manifest.json"))
+            if manifest is None:
+                continue
+            if columns is None:
+                return manifest["headers"], self.read_dataset(entry_dir, manifest)
+            if set(columns) <= set(manifest["headers"]):
+                return list(columns), self.read_dataset(entry_dir, manifest, columns)
+        return None
+
+    def store(self, file_path, headers, dataset, columns=None):
+        """
+        Store the parsed dataset of a file in the cache.
+
+        The entry is written to a temporary directory and moved into place in one step, so readers
+        never see a partially written entry.
+
+        :param file_path: The path to the source CSV file.
+        :param headers: A list of column headers in the dataset.
+        :param dataset: The ColumnarDataset parsed from the file.
+        :param columns: The list of column names that was loaded from the file, if the load was
+                        projected (optional). Projected entries are kept apart from full entries.
+        """
+        key = self.fingerprint(file_path)
+        if columns is not None:
+            key = self._entry_key(key, columns)
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.isdir(entry_dir):
+            return
+
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            manifest = self.write_dataset(temp_dir, dataset)
+            manifest["headers"] = headers
+            self._write_json(os.path.join(temp_dir, "manifest.json"), manifest)
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def write_dataset(directory, dataset):
+        """
+        Write the columns of a dataset as .npy files.
+
+        :param directory: An existing directory to write to.
+        :param dataset: A ColumnarDataset.
+        :return: A manifest dictionary describing the stored columns.
+        """
+        columns = []
+        for index, name in enumerate(dataset.headers):
+            values = dataset.columns[name]
+            mask = dataset.masks[name]
+            column = {"name": name}
+            if dataset.is_numeric(name):
+                column["kind"] = "numeric"
+                np.save(os.path.join(directory, f"{index}.values.npy"), values)
+            else:
+                column["kind"] = "text"
+                if name in dataset.categories:
+                    categories = dataset.categories[name].astype(str)
+                    all_codes = np.where(mask, -1, values)
+                else:
+                    categories, codes = np.unique(values[~mask].astype(str), return_inverse=True)
+                    all_codes = np.full(len(values), -1)
+                    all_codes[~mask] = codes
+                all_codes = all_codes.astype(smallest_int_dtype(-1, len(categories)) or np.int64)
+                column["categories"] = categories.tolist()
+                np.save(os.path.join(directory, f"{index}.codes.npy"), all_codes)
+            np.save(os.path.join(directory, f"{index}.mask.npy"), mask)
+            columns.append(column)
+        return {"columns": columns}
+
+    @staticmethod
+    def read_dataset(directory, manifest, columns=None):
+        """
+        Read a dataset written by `write_dataset`, memory-mapping the .npy files.
+
+        :param directory: The directory holding the .npy files.
+        :param manifest: The manifest dictionary returned by `write_dataset`.
+        :param columns: A list of column names to read (optional, defaults to all columns).
+        :return: A ColumnarDataset. Numeric columns, dictionary codes of text columns and masks are
+                 read-only memory maps.
+        """
+        values = {}
+        masks = {}
+        categories = {}
+        for index, column in enumerate(manifest["columns"]):
+            name = column["name"]
+            if columns is not None and name not in columns:
+                continue
+            masks[name] = np.load(os.path.join(directory, f"{index}.mask.npy"), mmap_mode="r")
+            if column["kind"] == "numeric":
+                values[name] = np.load(os.path.join(directory, f"{index}.values.npy"), mmap_mode="r")
+            else:
+                values[name] = np.load(os.path.join(directory, f"{index}.codes.npy"), mmap_mode="r")
+                categories[name] = np.empty(len(column["categories"]), dtype=object)
+                categories[name][:] = column["categories"]
+        return ColumnarDataset(values, masks, categories)
+
+    @staticmethod
+    def _entry_key(content_hash, columns):
+        """
+        :return: The entry name for a projection of a file: its content hash plus a hash of the column list.
+        """
+        digest = hashlib.blake2b(json.dumps(list(columns)).encode(), digest_size=8)
+        return f"{content_hash}-{digest.hexdigest()}"
+
+    def _read_json(self, path):
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path, content):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(handle, "w") as file:
+            json.dump(content, file)
+        os.replace(temp_path, path)
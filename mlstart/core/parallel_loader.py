@@ -0,0 +1,199 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from mlstart.core.dataset import ColumnarDataset
+
+QUOTE = b'"'
+NEWLINE = b"\n"
+
+
+def count_quotes(file_path, start, end):
+    """
+    Count the quote characters in a byte range of a file.
+
+    :param file_path: The path to the file.
+    :param start: The first byte offset of the range.
+    :param end: The byte offset just after the range.
+    :return: The number of quote characters in the range.
+    """
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        return file.read(end - start).count(QUOTE)
+
+
+def find_record_end(file, position, inside_quotes, block_size=1 << 16):
+    """
+    Find the end of the CSV record that contains a byte offset.
+
+    A newline only ends a record when it is outside a quoted field. Whether a position is inside
+    quotes follows from the parity of the quote characters before it (an escaped quote is written
+    as two quotes and therefore does not change the parity).
+
+    :param file: A file object opened in binary mode.
+    :param position: The byte offset to start searching from.
+    :param inside_quotes: True if `position` lies inside a quoted field.
+    :param block_size: The number of bytes to read at a time.
+    :return: The byte offset just after the record-ending newline, or the file size.
+    """
+    file.seek(position)
+    while True:
+        block = file.read(block_size)
+        if not block:
+            return position
+        offset = 0
+        while True:
+            newline = block.find(NEWLINE, offset)
+            if newline == -1:
+                inside_quotes ^= block.count(QUOTE, offset) % 2 == 1
+                break
+            inside_quotes ^= block.count(QUOTE, offset, newline) % 2 == 1
+            if not inside_quotes:
+                return position + newline + 1
+            offset = newline + 1
+        position += len(block)
+
+
+def split_byte_ranges(file_path, n_ranges, executor=None):
+    """
+    Split a CSV file into byte ranges that start and end on record boundaries.
+
+    The first range starts after the header record. Newlines inside quoted fields are never
+    used as split points.
+
+    :param file_path: The path to the CSV file.
+    :param n_ranges: The desired number of ranges (fewer may be returned for small files).
+    :param executor: An executor used to count quotes in parallel (optional).
+    :return: A tuple containing:
+             - header_end: The byte offset just after the header record.
+             - ranges: A list of (start, end) byte offsets.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        header_end = find_record_end(file, 0, False)
+        step = max((size - header_end) // n_ranges, 1)
+        nominal = list(range(header_end, size, step))[1:n_ranges] + [size]
+
+        # Quote parity at each nominal split point, from per-range quote counts
+        starts = [header_end] + nominal[:-1]
+        if executor is not None:
+            counts = list(executor.map(count_quotes, [file_path] * len(starts), starts, nominal))
+        else:
+            counts = [count_quotes(file_path, start, end) for start, end in zip(starts, nominal)]
+
+        boundaries = [header_end]
+        quotes_before = 0
+        for split, count in zip(nominal[:-1], counts[:-1]):
+            quotes_before += count
+            boundary = find_record_end(file, split, quotes_before % 2 == 1)
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+        if boundaries[-1] < size:
+            boundaries.append(size)
+
+    return header_end, list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def parse_byte_range(file_path, start, end, headers, text_columns=None, columns=None):
+    """
+    Parse a byte range of a CSV file into typed column chunks. Runs in a worker process.
+
+    :param file_path: The path to the CSV file.
+    :param start: The first byte offset of the range (the start of a record).
+    :param end: The byte offset just after the range (the end of a record).
+    :param headers: A list of column headers in the dataset.
+    :param text_columns: A collection of column names to keep as text (optional).
+    :param columns: A list of column names to return (optional, defaults to all columns).
+    :return: A tuple (columns, masks, categories) of dictionaries mapping column names to numpy arrays
+             (categories only for the dictionary-encoded text columns).
+    """
+    from mlstart.core.data_loader import read_raw_columns
+
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        chunk = file.read(end - start)
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(chunk), newline=""))
+
+    if columns is None:
+        columns = headers
+    indices = [headers.index(name) for name in columns]
+    raw_columns = read_raw_columns(reader, len(headers), indices=indices)
+    dataset = ColumnarDataset.from_raw_columns(columns, raw_columns, text_columns)
+    return dataset.columns, dataset.masks, dataset.categories
+
+
+class ParallelCSVLoader:
+    """
+    A class to parse a CSV file with several worker processes, each one handling a byte range.
+    """
+
+    def __init__(self, file_path, workers=None, columns=None, exclude_columns=None):
+        """
+        Initialize the ParallelCSVLoader.
+
+        :param file_path: A string representing the path to the dataset file (CSV format).
+        :param workers: The number of worker processes. Defaults to the number of CPUs.
+        :param columns: A list of column names to load (optional, defaults to all columns).
+        :param exclude_columns: A list of column names to skip while parsing (optional).
+        """
+        self.file_path = file_path
+        self.workers = workers or os.cpu_count() or 1
+        self.columns = columns
+        self.exclude_columns = exclude_columns
+
+    def load(self, text_columns=None):
+        """
+        Load the dataset by parsing newline-aligned byte ranges in parallel and concatenating
+        the typed column chunks in file order.
+
+        A column that parses as numeric in some ranges but not in others is re-parsed as text in
+        the numeric ranges, so the result is identical to a single-process load.
+
+        :param text_columns: A list of column names to keep as text even if all values are numeric (optional).
+        :return: A tuple containing:
+                 - headers: A list of the loaded column headers (blank-named columns are skipped).
+                 - dataset: A ColumnarDataset holding the parsed columns.
+        :raises ValueError: If the file is empty or has no header row.
+        """
+        from mlstart.core.data_loader import select_column_indices
+
+        text_columns = set(text_columns or ())
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            header_end, ranges = split_byte_ranges(self.file_path, self.workers, executor)
+
+            with open(self.file_path, "rb") as file:
+                header_bytes = file.read(header_end)
+            file_headers = next(csv.reader(io.TextIOWrapper(io.BytesIO(header_bytes), newline="")), None)
+            if not file_headers:
+                raise ValueError("The CSV file is empty \nor the file is not in CSV format \nor improperly formatted.")
+            indices = select_column_indices(file_headers, self.columns, self.exclude_columns)
+            headers = [file_headers[index] for index in indices]
+
+            futures = [executor.submit(parse_byte_range, self.file_path, start, end, file_headers,
+                                       text_columns, headers)
+                       for start, end in ranges]
+            chunks = [future.result() for future in futures]
+
+            # Re-parse columns whose type differs between ranges as text
+            mixed = [name for name in headers
+                     if len({self._is_text(chunk, name) for chunk in chunks}) > 1]
+            if mixed:
+                reparse = {index: executor.submit(parse_byte_range, self.file_path, start, end,
+                                                  file_headers, mixed, mixed)
+                           for index, (start, end) in enumerate(ranges)
+                           if not all(self._is_text(chunks[index], name) for name in mixed)}
+                for index, future in reparse.items():
+                    for part, reparsed in zip(chunks[index], future.result()):
+                        part.update(reparsed)
+
+        if not chunks:
+            return headers, ColumnarDataset.from_raw_columns(headers, [[] for _ in headers], text_columns)
+        return headers, ColumnarDataset.concat([ColumnarDataset(*chunk) for chunk in chunks])
+
+    @staticmethod
+    def _is_text(chunk, name):
+        """
+        :return: True if a column of a parsed chunk holds text (dictionary codes or objects).
+        """
+        columns, _, categories = chunk
+        return name in categories or columns[name].dtype == object
@@ -0,0 +1,131 @@
+import sys
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+from scipy import sparse
+
+# Byte alignment of each array in the shared block
+ALIGNMENT = 64
+
+# Shared memory blocks attached by this process, mapping each block name to a list [handle, number of
+# open attachments, number of references to its mapping when no array uses it]. A block is detached
+# once it has no open attachment and no array mapped from it is still in use (see `SharedArrays.attach`)
+_attached = {}
+
+
+class SharedArrays:
+    """
+    A set of read-only numpy arrays (and CSR matrices) packed into one block of shared memory.
+
+    The arrays are copied into the block once. Worker processes then receive only a small picklable
+    `descriptor` and map the same memory with `attach`, instead of each receiving a pickled copy of
+    the arrays.
+    """
+
+    def __init__(self, arrays):
+        """
+        Copy arrays into a new shared memory block.
+
+        :param arrays: A dictionary mapping names to numpy arrays or scipy.sparse matrices (stored as CSR).
+        """
+        parts = {}
+        layout = {}
+        for name, array in arrays.items():
+            if sparse.issparse(array):
+                array = sparse.csr_matrix(array)
+                for part in ("data", "indices", "indptr"):
+                    parts[f"{name}.{part}"] = getattr(array, part)
+                layout[name] = ("csr", array.shape)
+            else:
+                parts[name] = np.ascontiguousarray(array)
+                layout[name] = ("array", None)
+
+        offsets = {}
+        size = 0
+        for name, array in parts.items():
+            offsets[name] = (size, array.shape, array.dtype.str)
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in parts.items():
+            offset, shape, dtype = offsets[name]
+            np.ndarray(shape, dtype, buffer=self.shm.buf, offset=offset)[...] = array
+        self.descriptor = (self.shm.name, layout, offsets)
+
+    @staticmethod
+    @contextmanager
+    def attach(descriptor):
+        """
+        Map the arrays of a shared block, for example in a worker process, for the duration of a
+        `with` block.
+
+        On exit the dictionary of arrays is emptied and the block is detached, unless it is attached
+        again elsewhere in this process. Arrays taken out of the dictionary and still in use (for example
+        by a fitted model) keep the block mapped: it is then detached by the exit of a later attachment,
+        once they are gone.
+
+        :param descriptor: The `descriptor` of a SharedArrays.
+        :return: A context manager giving a dictionary mapping names to read-only numpy arrays or CSR matrices.
+        """
+        name, layout, offsets = descriptor
+        if name not in _attached:
+            # Worker processes share the resource tracker of the process that created the block, so
+            # attaching registers nothing new and the block is only unlinked by `close`
+            handle = shared_memory.SharedMemory(name=name)
+            _attached[name] = [handle, 0, sys.getrefcount(handle.buf.obj)]
+        _attached[name][1] += 1
+        arrays = SharedArrays._views(_attached[name][0].buf, layout, offsets)
+        try:
+            yield arrays
+        finally:
+            arrays.clear()
+            _attached[name][1] -= 1
+            detach_unused()
+
+    @staticmethod
+    def _views(buffer, layout, offsets):
+        """
+        Build the read-only arrays of a shared block on its buffer (see `attach`).
+        """
+        def view(part):
+            offset, shape, dtype = offsets[part]
+            array = np.ndarray(shape, dtype, buffer=buffer, offset=offset)
+            array.flags.writeable = False
+            return array
+
+        arrays = {}
+        for key, (kind, shape) in layout.items():
+            if kind == "csr":
+                arrays[key] = sparse.csr_matrix((view(f"{key}.data"), view(f"{key}.indices"), view(f"{key}.indptr")),
+                                                shape=shape, copy=False)
+            else:
+                arrays[key] = view(key)
+        return arrays
+
+    def close(self):
+        """
+        Release and remove the shared memory block. Arrays attached in other processes must no longer be used.
+        """
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def detach_unused():
+    """
+    Detach the shared blocks of this process that have no open attachment and no array still in use.
+
+    :return: The number of blocks that stay attached.
+    """
+    for name, (handle, attachments, unused_references) in list(_attached.items()):
+        # numpy arrays keep a reference to the mapping itself rather than a buffer export, so closing it
+        # would not fail but leave them dangling; they are found by counting the references instead
+        if attachments or sys.getrefcount(handle.buf.obj) > unused_references:
+            continue
+        handle.close()
+        del _attached[name]
+    return len(_attached)
@@ -1,41 +1,103 @@
+import numpy as np
+from mlstart.core.cardinality import HyperLogLog
+from mlstart.core.dataset import ColumnarDataset
+
+# Number of target values examined between two checks of the early-exit condition
+CHUNK_SIZE = 4096
+
+
 class TaskIdentifier:
     """
     A class to determine whether the task is classification or regression
     based on the target column in the dataset.
+
+    Target values are read in chunks and the scan stops as soon as the number of distinct values
+    reaches the classification threshold, so a regression target is usually recognized after the
+    first few thousand values.
     """
 
-    def __init__(self, data, headers, target_column):
+    def __init__(self, data, headers, target_column, class_threshold=10, estimate_cardinality=False):
         """
         Initialize the TaskIdentifier with the dataset and target column.
 
-        :param data: A list of dictionaries representing the loaded dataset.
+        :param data: A ColumnarDataset, a list of dictionaries representing the loaded dataset, or an
+                     iterable of ColumnarDataset batches (for example from DataLoader.iter_batches).
         :param headers: A list of column headers in the dataset.
         :param target_column: A string representing the name of the target column.
+        :param class_threshold: Targets with fewer distinct values than this are treated as classification
+                                targets. Default is 10.
+        :param estimate_cardinality: If True, keep scanning after the threshold is reached and estimate the
+                                     number of distinct target values with a HyperLogLog sketch (constant
+                                     memory). The result is stored in `cardinality`.
         :raises ValueError: If the target column is not specified or invalid.
         """
         self.data = data
         self.headers = headers
         self.target_column = target_column
+        self.class_threshold = class_threshold
+        self.estimate_cardinality = estimate_cardinality
         self.task_type = None
+        self.cardinality = None
 
     def determine_task_type(self):
         """
         Determine whether the task is classification or regression based on the target column.
 
+        After the call, `cardinality` holds the exact number of distinct target values if it is below
+        the threshold, the HyperLogLog estimate if `estimate_cardinality` is set, and None otherwise.
+
         :return: A string indicating the task type: 'classification' or 'regression'.
         :raises ValueError: If the target column is not found in the dataset.
         """
         if self.target_column not in self.headers:
             raise ValueError(f"Target column '{self.target_column}' not found in the dataset.")
 
-        # Extract target column values
-        target_values = [row[self.target_column] for row in self.data if row[self.target_column].strip()]
-        unique_values = set(target_values)
+        unique_values = set()
+        sketch = HyperLogLog() if self.estimate_cardinality else None
+        chunks = self._target_chunks()
+        for chunk in chunks:
+            if len(unique_values) < self.class_threshold:
+                unique_values.update(chunk.tolist())
+            if sketch is not None:
+                sketch.update(chunk)
+            elif len(unique_values) >= self.class_threshold:
+                break  # The threshold is reached; the rest of the stream is never read
+        chunks.close()
 
-        # Classification if unique values are small (≤10); otherwise regression
-        if len(unique_values) < 10:
+        # Classification if unique values are few (< class_threshold); otherwise regression
+        if len(unique_values) < self.class_threshold:
             self.task_type = "classification"
+            self.cardinality = len(unique_values)
         else:
             self.task_type = "regression"
+            self.cardinality = sketch.estimate() if sketch is not None else None
+
+        return self.task_type
+
+    def _target_chunks(self):
+        """
+        Yield the present values of the target column in chunks of at most CHUNK_SIZE values.
+
+        :return: A generator of numpy arrays.
+        """
+        if isinstance(self.data, list):
+            for start in range(0, len(self.data), CHUNK_SIZE):
+                values = [row[self.target_column] for row in self.data[start:start + CHUNK_SIZE]
+                          if row[self.target_column].strip()]
+                yield np.array(values, dtype=object)
+            return
 
-        return self.task_type
\ No newline at end of file
+        batches = [self.data] if isinstance(self.data, ColumnarDataset) else self.data
+        try:
+            for batch in batches:
+                values = batch.columns[self.target_column]
+                mask = batch.masks[self.target_column]
+                categories = batch.categories.get(self.target_column)
+                for start in range(0, len(batch), CHUNK_SIZE):
+                    chunk = values[start:start + CHUNK_SIZE][~mask[start:start + CHUNK_SIZE]]
+                    # Dictionary codes are only comparable within a batch, so compare the values
+                    yield chunk if categories is None else categories[chunk]
+        finally:
+            # Stop a loader stream (and close its file) when the scan exits early
+            if hasattr(batches, "close"):
+                batches.close()
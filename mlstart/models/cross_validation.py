@@ -0,0 +1,162 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import KFold, StratifiedKFold
+from mlstart.core.shared_arrays import SharedArrays
+from mlstart.models.model_evaluation import ModelEvaluator
+from mlstart.models.model_trainer import ModelTrainer
+from mlstart.processing.datahandler import DataHandler
+
+
+# Names of the arrays of each fold
+FOLD_ARRAYS = ("X_train", "y_train", "X_test", "y_test")
+
+
+def evaluate_shared_fold(descriptor, fold, model, task_type):
+    """
+    Train and evaluate a model on one fold whose arrays are in shared memory. Used as a worker task.
+
+    :param descriptor: The `descriptor` of the SharedArrays holding the folds (see `CrossValidator.fold_arrays`).
+    :param fold: The index of the fold.
+    :param model: An unfitted scikit-learn estimator.
+    :param task_type: A string indicating the task type ('classification' or 'regression').
+    :return: A dictionary of evaluation metrics.
+    """
+    with SharedArrays.attach(descriptor) as arrays:
+        return CrossValidator.evaluate_fold(model, task_type, *(arrays[f"{name}{fold}"] for name in FOLD_ARRAYS))
+
+
+class CrossValidator:
+    """
+    A class to evaluate models by K-fold cross-validation.
+
+    The folds are stratified on the target for classification tasks. The preprocessing is fitted on
+    the training rows of each fold only and then applied to its test rows, so no statistics of the
+    test rows leak into training. Every (fold, model) pair is trained on a pool of worker processes;
+    the preprocessed arrays of all folds are copied once into one read-only block of shared memory,
+    which the workers map instead of each receiving a pickled copy.
+    """
+
+    def __init__(self, task_type, n_folds=5, workers=None, random_state=42, dtype=np.float64):
+        """
+        Initialize the CrossValidator class.
+
+        :param task_type: A string indicating the task type ('classification' or 'regression').
+        :param n_folds: The number of folds. Default is 5.
+        :param workers: The number of worker processes. Defaults to the number of CPUs; with 1 every
+                        model is trained in the calling process.
+        :param random_state: The seed of the shuffle before the rows are divided into folds. Default is 42.
+        :param dtype: The dtype of the feature matrices (see DataHandler). Default is float64.
+        """
+        self.task_type = task_type
+        self.n_folds = n_folds
+        self.workers = workers or os.cpu_count() or 1
+        self.random_state = random_state
+        self.dtype = dtype
+
+    def split(self, data, target_column):
+        """
+        Divide the rows of a dataset into folds.
+
+        :param data: A ColumnarDataset (before preprocessing).
+        :param target_column: A string specifying the name of the target column.
+        :return: A list of (train_rows, test_rows) tuples of row index arrays, one per fold.
+        """
+        if self.task_type == "classification":
+            _, labels = np.unique(data.decode(target_column).astype(str), return_inverse=True)
+            folds = StratifiedKFold(self.n_folds, shuffle=True, random_state=self.random_state)
+            return list(folds.split(np.zeros(len(labels)), labels))
+        folds = KFold(self.n_folds, shuffle=True, random_state=self.random_state)
+        return list(folds.split(np.zeros(len(data))))
+
+    def preprocess_folds(self, data, target_column, preprocessor, numeric_columns, categorical_columns,
+                         hashed_columns=()):
+        """
+        Preprocess each fold and build its feature matrices and target vectors.
+
+        :param data: A ColumnarDataset (before preprocessing).
+        :param target_column: A string specifying the name of the target column.
+        :param preprocessor: A fused PreprocessorPipeline. It is refitted on the training rows of each fold
+                             (see PreprocessorPipeline.run_split).
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param hashed_columns: Categorical columns to encode by feature hashing (optional).
+        :return: A list of (X_train, y_train, X_test, y_test) tuples, one per fold. Test rows whose target is
+                 missing or a class that the training rows of the fold do not hold are left out.
+        :raises ValueError: If the preprocessor is not fused, so it cannot be applied to the test rows.
+        """
+        folds = []
+        for train_rows, test_rows in self.split(data, target_column):
+            train, test = preprocessor.run_split(data, train_rows, test_rows, numeric_columns, categorical_columns,
+                                                 hashed_columns, target_column=target_column)
+            X_train, y_train = DataHandler(train, target_column, self.task_type, self.dtype).split_features_and_target()
+            X_test, y_test = DataHandler(test, target_column, self.task_type, self.dtype).split_features_and_target()
+            folds.append((X_train, y_train, X_test, y_test))
+        return folds
+
+    def cross_validate(self, models, folds):
+        """
+        Train and evaluate every model on every fold.
+
+        A model that fails to train on any fold is left out of the result, with an error message.
+
+        :param models: A list of (name, model) tuples of unfitted scikit-learn estimators.
+        :param folds: A list of (X_train, y_train, X_test, y_test) tuples (see `preprocess_folds`).
+        :return: A dictionary mapping model names to lists of metric dictionaries, one per fold.
+        """
+        tasks = [(name, model, fold) for name, model in models for fold in range(len(folds))]
+        if self.workers <= 1 or len(tasks) < 2:
+            outcomes = [self._outcome(lambda: self.evaluate_fold(model, self.task_type, *folds[fold]))
+                        for _, model, fold in tasks]
+        else:
+            with SharedArrays(self.fold_arrays(folds)) as shared, \
+                    ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as executor:
+                futures = [executor.submit(evaluate_shared_fold, shared.descriptor, fold, model, self.task_type)
+                           for _, model, fold in tasks]
+                outcomes = [self._outcome(future.result) for future in futures]
+
+        fold_metrics = {}
+        failed = set()
+        for (name, _, _), (metrics, error) in zip(tasks, outcomes):
+            if error is not None:
+                if name not in failed:
+                    print(f"Failed to train {name}: {error}")
+                failed.add(name)
+            else:
+                fold_metrics.setdefault(name, []).append(metrics)
+        return {name: metrics for name, metrics in fold_metrics.items() if name not in failed}
+
+    @staticmethod
+    def fold_arrays(folds):
+        """
+        Name the arrays of the folds for a SharedArrays block.
+
+        :param folds: A list of (X_train, y_train, X_test, y_test) tuples.
+        :return: A dictionary mapping names such as 'X_train0' to arrays.
+        """
+        return {f"{name}{fold}": array for fold, arrays in enumerate(folds) for name, array in zip(FOLD_ARRAYS, arrays)}
+
+    @staticmethod
+    def evaluate_fold(model, task_type, X_train, y_train, X_test, y_test):
+        """
+        Train a copy of a model on the training rows of a fold and evaluate it on the test rows.
+
+        :param model: An unfitted scikit-learn estimator (it is cloned, not changed).
+        :param task_type: A string indicating the task type ('classification' or 'regression').
+        :return: A dictionary of evaluation metrics.
+        """
+        fitted = ModelTrainer.fit_model(clone(model), X_train, y_train)
+        return ModelEvaluator(task_type).evaluate_model(fitted, X_test, y_test)
+
+    @staticmethod
+    def _outcome(result):
+        """
+        Call a function returning the metrics of a task, catching its error.
+
+        :return: A tuple (metrics, None), or (None, error) if it failed.
+        """
+        try:
+            return result(), None
+        except Exception as e:
+            return None, e
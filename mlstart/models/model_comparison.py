@@ -30,14 +30,48 @@ class ModelComparator:
                  - total_ranks: A dictionary containing ranking information for each model across metrics.
         """
       model_metrics = {}
-      metric_ranks = {}
-      total_ranks = {}
 
       # Evaluate models
       for name, model in trained_models:
-          metrics = self.evaluator.evaluate_model(model, X_test, y_test)
-          model_metrics[name] = metrics
+          model_metrics[name] = self.evaluator.evaluate_model(model, X_test, y_test)
+
+      best_model_name, total_ranks = self.rank_models(model_metrics)
+      best_model = next(model for model_name, model in trained_models if model_name == best_model_name)
+
+      return best_model_name, best_model, model_metrics, total_ranks
+
+  def compare_fold_metrics(self, fold_metrics):
+      """
+        Compare models evaluated by cross-validation, ranking them on their metrics averaged over the folds.
+
+        :param fold_metrics: A dictionary mapping model names to lists of metric dictionaries, one per fold
+                             (see CrossValidator.cross_validate).
+        :return: A tuple containing:
+                 - best_model_name: A string indicating the name of the best-performing model.
+                 - model_metrics: A dictionary containing the fold-averaged evaluation metrics for all models.
+                 - total_ranks: A dictionary containing ranking information for each model across metrics.
+        """
+      model_metrics = {}
+      for name, folds in fold_metrics.items():
+          model_metrics[name] = {metric: sum(metrics[metric] for metrics in folds) / len(folds)
+                                 for metric in folds[0]}
 
+      best_model_name, total_ranks = self.rank_models(model_metrics)
+      return best_model_name, model_metrics, total_ranks
+
+  def rank_models(self, model_metrics):
+      """
+        Rank models on each metric and by their average rank across metrics.
+
+        :param model_metrics: A dictionary mapping model names to dictionaries of evaluation metrics.
+        :return: A tuple containing:
+                 - best_model_name: A string indicating the name of the model with the best average rank.
+                 - total_ranks: A dictionary containing ranking information for each model across metrics.
+        """
+      metric_ranks = {}
+      total_ranks = {}
+
+      for name, metrics in model_metrics.items():
           for metric, value in metrics.items():
               if metric not in metric_ranks:
                   metric_ranks[metric] = []
@@ -61,8 +95,4 @@ class ModelComparator:
           total_ranks[name]["average_rank"] = sum(ranks) / len(ranks)
 
       best_model_name = min(total_ranks, key=lambda name: total_ranks[name]["average_rank"])
-      best_model = next(model for model_name, model in trained_models if model_name == best_model_name)
-
-      return best_model_name, best_model, model_metrics, total_ranks
-
-
+      return best_model_name, total_ranks
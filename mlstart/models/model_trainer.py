@@ -1,22 +1,54 @@
 import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.connection import wait
+from scipy import sparse
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
 from sklearn.linear_model import LogisticRegression, LinearRegression, Ridge
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
 from sklearn.neighbors import KNeighborsClassifier
+from mlstart.core.shared_arrays import SharedArrays
+
+# Seconds between two checks of the models trained under time or memory limits
+POLL_INTERVAL = 0.05
 
 class ModelTrainer:
     """
     A class to train machine learning models for classification and regression tasks.
     """
 
-    def __init__(self, task_type):
+    def __init__(self, task_type, workers=None, pool="process", time_limit=None, memory_limit=None):
         """
         Initialize the ModelTrainer class.
 
         :param task_type: A string representing the type of task, either 'classification' or 'regression'.
-        :raises ValueError: If an invalid task type is provided.
+        :param workers: The number of models trained at the same time. By default (None or 1) the models
+                        are trained one after another.
+        :param pool: The kind of pool the models are trained on with several workers: 'process' (default)
+                     or 'thread'. Processes also run models whose fitting holds the GIL in parallel, and
+                     read the training data from shared memory; threads share it without any copy.
+        :param time_limit: The wall-clock time in seconds a model may take to train (optional). A model
+                           still training at the limit is stopped and reported as 'timed out'.
+        :param memory_limit: The memory in bytes a model may allocate while training (optional). A model
+                             that allocates more is stopped and reported as 'over memory'. The address
+                             space of the training process is capped at its size before fitting plus the
+                             limit, so a larger allocation fails at once; as a fallback, the growth of its
+                             private resident memory is also watched. Both are only available on Linux,
+                             elsewhere the limit is ignored.
+        :raises ValueError: If an invalid pool is provided.
         """
+        if pool not in ("process", "thread"):
+            raise ValueError(f"Invalid pool: {pool}")
         self.task_type = task_type
+        self.workers = workers or 1
+        self.pool = pool
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
         self.models = []  # List to store initialized models
+        self.failures = {}  # Names of the models that failed in the last training, and why
 
     def initialize_models(self):
         """
@@ -43,17 +75,257 @@ class ModelTrainer:
         """
         Train the initialized models on the given training data.
 
-        :param X_train: A list or ndarray representing the feature matrix for training.
+        A sparse feature matrix is passed as it is to the models that accept sparse input. Other models
+        are wrapped in a pipeline that densifies their input, so they still train and predict on the
+        same sparse matrices.
+
+        With several `workers`, the models are trained in parallel. On a process pool, the training
+        data is copied once into shared memory, which every worker maps instead of receiving a pickled
+        copy; the fitted models are sent back to the calling process.
+
+        With a `time_limit` or `memory_limit`, every model is trained in its own process (up to
+        `workers` at a time) that is watched and stopped when it crosses a limit, so a runaway model
+        cannot stall the others. These processes are started with the default start method, like the
+        process pool, so they do not import the main script again. The models that failed, timed out or
+        ran over memory are left out of the result and recorded in `failures`.
+
+        :param X_train: A list, ndarray or scipy.sparse matrix representing the feature matrix for training.
         :param y_train: A list or ndarray representing the target vector for training.
         :return: A list of tuples where each tuple contains the model name and the trained model object.
         :raises Exception: If a model fails to train, an error message is printed.
         """
+        self.failures = {}
+        if self.time_limit is not None or self.memory_limit is not None:
+            return self._train_supervised(X_train, y_train)
+        if self.workers > 1 and len(self.models) > 1:
+            return self._train_in_parallel(X_train, y_train)
+
         trained_models = []
         for name, model in self.models:
             try:
-                model.fit(X_train, y_train)
-                trained_models.append((name, model))
+                trained_models.append((name, self.fit_model(model, X_train, y_train)))
                 #print(f"Trained {name} successfully.")
             except Exception as e:
                 print(f"Failed to train {name}: {e}")
-        return trained_models
\ No newline at end of file
+                self.failures[name] = "failed to train"
+        return trained_models
+
+    def _train_in_parallel(self, X_train, y_train):
+        """
+        Train the models on a pool of `workers` (see `train_models`).
+        """
+        workers = min(self.workers, len(self.models))
+        if self.pool == "thread":
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self.fit_model, model, X_train, y_train) for _, model in self.models]
+                return self._collect(futures)
+
+        with SharedArrays({"X_train": X_train, "y_train": y_train}) as shared, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fit_shared_model, shared.descriptor, model) for _, model in self.models]
+            return self._collect(futures)
+
+    def _collect(self, futures):
+        """
+        Wait for the models trained on a pool, in model order, printing an error message for each failure.
+        """
+        trained_models = []
+        for (name, _), future in zip(self.models, futures):
+            try:
+                trained_models.append((name, future.result()))
+            except Exception as e:
+                print(f"Failed to train {name}: {e}")
+                self.failures[name] = "failed to train"
+        return trained_models
+
+    def _train_supervised(self, X_train, y_train):
+        """
+        Train every model in its own watched process, stopping those that cross a limit (see `train_models`).
+        """
+        outcomes = {}
+        with SharedArrays({"X_train": X_train, "y_train": y_train}) as shared:
+            pending = list(self.models)
+            running = []
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    name, model = pending.pop(0)
+                    receiver, sender = multiprocessing.Pipe(duplex=False)
+                    process = multiprocessing.Process(target=fit_supervised_model,
+                                                      args=(shared.descriptor, model, sender, self.memory_limit),
+                                                      daemon=True)
+                    process.start()
+                    sender.close()
+                    # A forked process starts with the memory of this one; only its growth is counted
+                    running.append((name, process, receiver, time.perf_counter(), process_memory(process.pid)))
+
+                wait([task[2] for task in running] + [task[1].sentinel for task in running], timeout=POLL_INTERVAL)
+                for task in list(running):
+                    name, process, receiver, start, initial_memory = task
+                    outcome = self._supervise(name, process, receiver, start, initial_memory)
+                    if outcome is not None:
+                        outcomes[name] = outcome
+                        running.remove(task)
+                        receiver.close()
+
+        trained_models = []
+        for name, _ in self.models:
+            model, failure = outcomes[name]
+            if failure is None:
+                trained_models.append((name, model))
+            else:
+                self.failures[name] = failure
+        return trained_models
+
+    def _supervise(self, name, process, receiver, start, initial_memory):
+        """
+        Check on a model training in a watched process, stopping it if it crossed a limit.
+
+        :return: None while the model is still training, otherwise a tuple (model, None) of the trained
+                 model or (None, reason) if it failed.
+        """
+        alive = process.is_alive()
+        if receiver.poll() or not alive:
+            try:
+                model, error = receiver.recv()
+            except (EOFError, OSError):  # The process ended without sending a result
+                model, error = None, None
+            process.join()
+            if model is None and error is None:
+                error = f"the training process exited with code {process.exitcode}"
+            if isinstance(error, MemoryError):  # An allocation crossed the address space cap
+                print(f"Stopped training {name} above {self.memory_limit} bytes: over memory")
+                return None, "over memory"
+        elif self.time_limit is not None and time.perf_counter() - start > self.time_limit:
+            process.kill()
+            process.join()
+            print(f"Stopped training {name} after {self.time_limit} seconds: timed out")
+            return None, "timed out"
+        elif (self.memory_limit is not None and initial_memory is not None
+              and (process_memory(process.pid) or 0) - initial_memory > self.memory_limit):
+            process.kill()
+            process.join()
+            print(f"Stopped training {name} above {self.memory_limit} bytes: over memory")
+            return None, "over memory"
+        else:
+            return None
+
+        if error is not None:
+            print(f"Failed to train {name}: {error}")
+            return None, "failed to train"
+        return model, None
+
+    @staticmethod
+    def fit_model(model, X_train, y_train):
+        """
+        Fit one model, wrapping it in a densifying pipeline if the features are sparse and the model
+        does not accept sparse input (see `train_models`).
+
+        :param model: A scikit-learn estimator.
+        :param X_train: A list, ndarray or scipy.sparse matrix representing the feature matrix for training.
+        :param y_train: A list or ndarray representing the target vector for training.
+        :return: The fitted model (the wrapping pipeline, if any).
+        """
+        if sparse.issparse(X_train) and not ModelTrainer.accepts_sparse(model):
+            model = make_pipeline(FunctionTransformer(densify, accept_sparse=True), model)
+        return model.fit(X_train, y_train)
+
+    @staticmethod
+    def accepts_sparse(model):
+        """
+        Check whether a model can be fitted on a scipy.sparse matrix.
+
+        :param model: A scikit-learn estimator.
+        :return: True if the estimator declares support for sparse input.
+        """
+        try:
+            from sklearn.utils import get_tags
+        except ImportError:  # scikit-learn < 1.6 declares input types in the older dictionary of tags
+            try:
+                return "sparse" in model._get_tags().get("X_types", [])
+            except AttributeError:
+                return False
+        return get_tags(model).input_tags.sparse
+
+
+def fit_shared_model(descriptor, model):
+    """
+    Fit a model on training data in shared memory. Used as a worker task (see `ModelTrainer.train_models`).
+
+    :param descriptor: The `descriptor` of a SharedArrays holding 'X_train' and 'y_train'.
+    :param model: A scikit-learn estimator.
+    :return: The fitted model.
+    """
+    with SharedArrays.attach(descriptor) as arrays:
+        return ModelTrainer.fit_model(model, arrays["X_train"], arrays["y_train"])
+
+
+def fit_supervised_model(descriptor, model, connection, memory_limit=None):
+    """
+    Fit a model on training data in shared memory and send it back through a pipe. Runs as the target
+    of a watched process (see `ModelTrainer.train_models`).
+
+    :param descriptor: The `descriptor` of a SharedArrays holding 'X_train' and 'y_train'.
+    :param model: A scikit-learn estimator.
+    :param connection: The sending end of a pipe, which receives a tuple (model, None) of the fitted
+                       model, or (None, error) if fitting failed. The error is a MemoryError if the model
+                       allocated more than `memory_limit`.
+    :param memory_limit: The memory in bytes the model may allocate (optional, see `limit_address_space`).
+    """
+    try:
+        with SharedArrays.attach(descriptor) as arrays:
+            if memory_limit is not None:
+                limit_address_space(memory_limit)
+            result = ModelTrainer.fit_model(model, arrays["X_train"], arrays["y_train"]), None
+    except Exception as e:
+        result = None, e
+    connection.send(result)
+    connection.close()
+
+
+def limit_address_space(memory_limit):
+    """
+    Cap the address space of the calling process at its current size plus a limit, so that any allocation
+    beyond it fails with a MemoryError instead of growing the process.
+
+    :param memory_limit: The number of bytes the process may still allocate.
+    :return: True if the cap was set, False if it is not available (on platforms other than Linux).
+    """
+    try:
+        import resource
+    except ImportError:
+        return False
+    size = process_memory(os.getpid(), "VmSize")
+    if size is None:
+        return False
+    limit = size + memory_limit
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return True
+
+
+def process_memory(pid, field="RssAnon"):
+    """
+    Measure the memory of a process, by default its private resident memory: the memory it allocated
+    itself, excluding shared memory and mapped files.
+
+    :param pid: The process id.
+    :param field: The field of /proc/<pid>/status to read, such as 'RssAnon' or 'VmSize' (the address space).
+    :return: The memory in bytes, or None if it cannot be measured (on platforms other than Linux).
+    """
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def densify(X):
+    """
+    Convert a scipy.sparse matrix to a dense ndarray (other inputs are returned unchanged).
+    """
+    return X.toarray() if sparse.issparse(X) else X
@@ -0,0 +1,134 @@
+import math
+import time
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from mlstart.models.model_comparison import ModelComparator
+from mlstart.models.model_trainer import ModelTrainer
+
+
+class SuccessiveHalving:
+    """
+    A class to select models by successive halving: racing the candidates on growing subsamples of
+    the training data instead of training every candidate on all of it.
+
+    All candidates are first trained on a small subsample and evaluated on validation rows held out
+    from the training data. Only the best 1/`eta` of them, by average rank across the metrics (see
+    ModelComparator.rank_models), are trained again on a subsample `eta` times larger, and so on. The
+    survivors are finally trained on the full training data. The race stops early once a single
+    candidate is left or the time budget is used up; the survivors of the last finished round are then
+    returned as trained on that round. A race always finishes its first round, and datasets no larger
+    than the first subsample are not raced: every candidate is trained on the full training data.
+    """
+
+    def __init__(self, task_type, min_samples=500, eta=3, time_budget=None, validation_size=0.2, workers=None,
+                 random_state=42, time_limit=None, memory_limit=None):
+        """
+        Initialize the SuccessiveHalving class.
+
+        :param task_type: A string indicating the task type ('classification' or 'regression').
+        :param min_samples: The number of rows of the first subsample. Default is 500.
+        :param eta: The factor by which the subsample grows, and the number of candidates shrinks, each
+                    round. Default is 3.
+        :param time_budget: The wall-clock time in seconds after which no new round is started and the
+                            survivors are not retrained on the full data (optional, defaults to no limit).
+        :param validation_size: The fraction of the training rows held out to evaluate the candidates.
+                                Default is 0.2.
+        :param workers: The number of models trained at the same time in each round (see ModelTrainer).
+        :param random_state: The seed of the subsampling. Default is 42.
+        :param time_limit: The wall-clock time in seconds each model may take to train in a round (optional,
+                           see ModelTrainer).
+        :param memory_limit: The memory in bytes each model may allocate while training (optional, see
+                             ModelTrainer).
+        """
+        self.task_type = task_type
+        self.min_samples = min_samples
+        self.eta = eta
+        self.time_budget = time_budget
+        self.validation_size = validation_size
+        self.workers = workers
+        self.random_state = random_state
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+
+    def race(self, models, X_train, y_train):
+        """
+        Race the candidate models and train the survivors.
+
+        :param models: A list of (name, model) tuples of scikit-learn estimators (they are cloned, not changed).
+        :param X_train: An ndarray or scipy.sparse matrix representing the feature matrix for training.
+        :param y_train: A list or ndarray representing the target vector for training.
+        :return: A tuple containing:
+                 - trained_models: A list of (name, trained model) tuples of the surviving models.
+                 - eliminated: A dictionary mapping the names of the other models to the reason they were
+                   dropped, such as 'eliminated after 500 rows' or 'timed out'.
+        """
+        start = time.perf_counter()
+        X_train = X_train if sparse.issparse(X_train) else np.asarray(X_train)
+        y_train = np.asarray(y_train)
+        order = self.subsample_order(y_train)
+        n_validation = max(1, int(len(order) * self.validation_size))
+        validation, pool = order[-n_validation:], order[:-n_validation]
+
+        X_validation, y_validation = X_train[validation], y_train[validation]
+        comparator = ModelComparator(self.task_type)
+
+        survivors = list(models)
+        eliminated = {}
+        trained = {}
+        size = self.min_samples
+        while len(survivors) > 1 and size < len(pool):
+            if trained and self._out_of_time(start):
+                break
+            rows = pool[:size]
+            trained = dict(self._train(survivors, X_train[rows], y_train[rows], eliminated))
+            survivors = [(name, model) for name, model in survivors if name in trained]
+            if len(survivors) < 2:
+                break
+
+            model_metrics = {name: comparator.evaluator.evaluate_model(trained[name], X_validation, y_validation)
+                             for name, _ in survivors}
+            _, total_ranks = comparator.rank_models(model_metrics)
+            ranked = sorted(model_metrics, key=lambda name: total_ranks[name]["average_rank"])
+            for name in ranked[math.ceil(len(ranked) / self.eta):]:
+                eliminated[name] = f"eliminated after {size} rows"
+            survivors = [(name, model) for name, model in survivors if name not in eliminated]
+            size *= self.eta
+
+        if not trained or not self._out_of_time(start):
+            return self._train(survivors, X_train, y_train, eliminated), eliminated
+        return [(name, trained[name]) for name, _ in survivors], eliminated
+
+    def subsample_order(self, y_train):
+        """
+        Shuffle the training rows so that every prefix of the order is a random subsample. For
+        classification, the classes are interleaved so that every prefix is also stratified.
+
+        :param y_train: An ndarray representing the target vector for training.
+        :return: An array of row indices.
+        """
+        order = np.random.default_rng(self.random_state).permutation(len(y_train))
+        if self.task_type != "classification":
+            return order
+        _, labels, counts = np.unique(y_train[order], return_inverse=True, return_counts=True)
+        by_class = np.argsort(labels, kind="stable")
+        within_class = np.empty(len(order))
+        within_class[by_class] = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return order[np.argsort((within_class + 0.5) / counts[labels], kind="stable")]
+
+    def _train(self, models, X, y, eliminated):
+        """
+        Train copies of the models on a subsample, recording the ones that fail in `eliminated`.
+        """
+        model_trainer = ModelTrainer(self.task_type, workers=self.workers, time_limit=self.time_limit,
+                                     memory_limit=self.memory_limit)
+        model_trainer.models = [(name, clone(model)) for name, model in models]
+        trained_models = model_trainer.train_models(X, y)
+        eliminated.update(model_trainer.failures)
+        return trained_models
+
+    def _out_of_time(self, start):
+        """
+        Check whether the time budget is used up.
+        """
+        return self.time_budget is not None and time.perf_counter() - start >= self.time_budget
@@ -1,18 +1,29 @@
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, smallest_int_dtype
+from mlstart.processing.column_executor import ColumnExecutor
+
 class EncodeCategorical:
     """
     Encodes categorical features using Label Encoding or One-Hot Encoding.
     """
 
     @staticmethod
-    def process(data, categorical_columns, task_type):
+    def process(data, categorical_columns, task_type, sparse=False, executor=None):
         """
         Encode categorical features in the dataset.
 
-        :param data: A list of dictionaries representing the dataset.
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
         :param categorical_columns: A list of column names that are categorical.
         :param task_type: A string indicating the type of task, either 'classification' or 'regression'.
-        :return: A list of dictionaries with categorical features encoded.
+        :param sparse: If True, one-hot encoded columns of a ColumnarDataset are kept as sparse
+                       indicator blocks instead of one dense column per category (see `transform`).
+        :param executor: A ColumnExecutor running the columns of a ColumnarDataset in parallel (optional).
+        :return: The dataset (in the same representation) with categorical features encoded.
         """
+        if isinstance(data, ColumnarDataset):
+            state = EncodeCategorical.fit(data, categorical_columns, executor)
+            return EncodeCategorical.transform(data, state, task_type, sparse, executor)
+
         if task_type == "classification":
             # Apply Label Encoding for classification tasks
             for column in categorical_columns:
@@ -31,3 +42,136 @@ class EncodeCategorical:
                 for row in data:
                     row.pop(column, None)
         return data
+
+    @staticmethod
+    def fit(data, categorical_columns, executor=None):
+        """
+        Collect the categories of each categorical column of a ColumnarDataset. Categories are
+        ordered by value, so the encoding is the same on every run; dictionary-encoded columns keep
+        only the categories still in use.
+
+        :param data: A ColumnarDataset.
+        :param categorical_columns: A list of column names that are categorical.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: A JSON-serializable state dictionary with the key 'categories'.
+        """
+        executor = executor or ColumnExecutor()
+        tasks = [(data.select([column]), column) for column in categorical_columns]
+        categories = executor.map(EncodeCategorical.column_categories, tasks,
+                                  executor.python_bound_columns(data, categorical_columns))
+        return {"categories": dict(zip(categorical_columns, categories))}
+
+    @staticmethod
+    def column_categories(data, column):
+        """
+        Collect the sorted categories of one categorical column.
+
+        :param data: A ColumnarDataset holding the column.
+        :param column: The column name.
+        :return: A list of the categories present in the column.
+        """
+        values = data.columns[column]
+        mask = data.masks[column]
+        if column in data.categories:
+            used = np.bincount(values[~mask], minlength=len(data.categories[column])) > 0
+            return data.categories[column][used].tolist()
+        return np.unique(values[~mask]).tolist()
+
+    @staticmethod
+    def transform(data, state, task_type, sparse=False, executor=None):
+        """
+        Encode the categorical columns of a ColumnarDataset with fitted categories. Values that were
+        not seen by `fit` are treated as missing: they get no indicator, or a masked label code.
+
+        In sparse mode, a one-hot encoded column stays a single column of codes into the fitted
+        categories, marked as one-hot. DataHandler expands it into a CSR block of indicators
+        (see ColumnarDataset.one_hot_matrix), so memory grows with the number of rows only, not
+        with rows times categories.
+
+        :param data: A ColumnarDataset.
+        :param state: A state dictionary returned by `fit`.
+        :param task_type: A string indicating the type of task, either 'classification' or 'regression'.
+        :param sparse: If True, keep one-hot encoded columns as sparse indicator blocks.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The encoded ColumnarDataset.
+        """
+        executor = executor or ColumnExecutor()
+        columns = [column for column, categories in state["categories"].items() if len(categories)]
+        tasks = [(data.select([column]), column, state["categories"][column], None, task_type, sparse)
+                 for column in columns]
+        encoded = executor.map(EncodeCategorical.encode_column, tasks, executor.python_bound_columns(data, columns))
+        for column, assignments in zip(columns, encoded):
+            EncodeCategorical.apply(data, column, assignments)
+        return data
+
+    @staticmethod
+    def encode_column(data, column, categories, mode_value, task_type, sparse=False):
+        """
+        Encode one categorical column with fitted categories, without changing the dataset.
+
+        :param data: A ColumnarDataset holding the column.
+        :param column: The column name.
+        :param categories: The sorted list of fitted categories (not empty).
+        :param mode_value: A fitted mode that missing and unseen values are imputed with (optional).
+        :param task_type: A string indicating the type of task, either 'classification' or 'regression'.
+        :param sparse: If True, keep a one-hot encoded column as a sparse indicator block.
+        :return: A list of the column assignments (tuples of `ColumnarDataset.set_column` arguments) that
+                 replace the column, to be applied by `apply`.
+        """
+        categories = np.array(categories, dtype=object)
+        codes, mask = EncodeCategorical.codes(data, column, categories)
+        if mode_value is not None:
+            codes = np.where(mask, np.searchsorted(categories, mode_value), codes).astype(codes.dtype)
+            mask = np.zeros(len(codes), dtype=bool)
+
+        if task_type == "classification":
+            # Label Encoding: replace each category with its index
+            return [(column, codes, mask)]
+        if sparse:
+            # Sparse One-Hot Encoding: the codes stand for one indicator per category
+            return [(column, codes, mask, categories, True)]
+        # One-Hot Encoding: one indicator column per category, appended at the end
+        return [(f"{column}_{val}", ((codes == idx) & ~mask).astype(np.int8)) for idx, val in enumerate(categories)]
+
+    @staticmethod
+    def apply(data, column, assignments):
+        """
+        Replace a categorical column of a dataset with its encoding returned by `encode_column`.
+
+        :param data: A ColumnarDataset.
+        :param column: The name of the encoded column.
+        :param assignments: The column assignments returned by `encode_column` (an empty list keeps the column).
+        """
+        for assignment in assignments:
+            data.set_column(*assignment)
+        if assignments and all(assignment[0] != column for assignment in assignments):
+            data.drop_columns([column])
+
+    @staticmethod
+    def codes(data, column, categories):
+        """
+        Translate a categorical column into codes of a sorted array of fitted categories.
+
+        :param data: A ColumnarDataset.
+        :param column: The name of the categorical column.
+        :param categories: A sorted numpy array of categories.
+        :return: A tuple containing:
+                 - codes: The narrowest integer array of codes (0 where the mask is set).
+                 - mask: A boolean numpy array that is True where the value is missing or unseen.
+        """
+        values = data.columns[column]
+        mask = data.masks[column]
+        if column in data.categories:
+            # Translate the column's own dictionary once; code -1 (missing) selects the trailing entry
+            own = data.categories[column]
+            positions = np.minimum(np.searchsorted(categories, own), len(categories) - 1)
+            known = categories[positions] == own
+            lookup = np.append(np.where(known, positions, -1), -1)
+            codes = lookup[np.where(mask, -1, values)]
+        else:
+            present = np.where(mask, categories[0], values)
+            codes = np.minimum(np.searchsorted(categories, present), len(categories) - 1)
+            codes = np.where(mask | (categories[codes] != present), -1, codes)
+        mask = codes < 0
+        codes = np.where(mask, 0, codes).astype(smallest_int_dtype(0, len(categories)) or np.int64)
+        return codes, mask
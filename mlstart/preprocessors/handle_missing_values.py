@@ -1,4 +1,7 @@
-from collections import Counter
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, to_float64
+from mlstart.processing.accumulators import MeanVariance, ValueCounts
+from mlstart.processing.column_executor import ColumnExecutor, update_accumulator
 
 class HandleMissingValues:
     """
@@ -6,29 +9,171 @@ class HandleMissingValues:
     """
 
     @staticmethod
-    def process(data, numeric_columns, categorical_columns):
+    def process(data, numeric_columns, categorical_columns, executor=None, mode_capacity=None):
         """
         Handle missing values in the dataset by imputing appropriate values.
 
-        :param data: A list of dictionaries representing the dataset.
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
         :param numeric_columns: A list of column names that are numeric.
         :param categorical_columns: A list of column names that are categorical.
-        :return: A list of dictionaries with missing values handled.
+        :param executor: A ColumnExecutor running the columns of a ColumnarDataset in parallel (optional).
+        :param mode_capacity: The number of distinct values tracked per categorical column to find its mode
+                              (optional, see ValueCounts). By default every value is counted exactly.
+        :return: The dataset (in the same representation) with missing values handled.
         """
+        if isinstance(data, ColumnarDataset):
+            state = HandleMissingValues.fit(data, numeric_columns, categorical_columns, executor, mode_capacity)
+            return HandleMissingValues.transform(data, state, executor)
+
         # Handle missing values in numeric columns using the mea
         for column in numeric_columns:
-            values = [float(row[column]) for row in data if row[column] is not None]
-            mean_value = sum(values) / len(values)
+            accumulator = MeanVariance()
+            accumulator.update(np.array([float(row[column]) for row in data if row[column] is not None]))
+            mean_value = accumulator.get_mean()
             for row in data:
                 if row[column] is None:
                     row[column] = mean_value
 
         # Handle missing values in categorical columns using the mode
         for column in categorical_columns:
-            values = [row[column] for row in data if row[column] is not None]
-            mode_value = Counter(values).most_common(1)[0][0]
+            counter = ValueCounts(mode_capacity)
+            counter.update([row[column] for row in data if row[column] is not None])
+            mode_value = counter.get_mode()
             for row in data:
                 if row[column] is None:
                     row[column] = mode_value
 
         return data
+
+    @staticmethod
+    def fit(data, numeric_columns, categorical_columns, executor=None, mode_capacity=None):
+        """
+        Compute the imputation values of a ColumnarDataset: the mean of each numeric column and
+        the mode of each categorical column (ties go to the value seen first).
+
+        :param data: A ColumnarDataset.
+        :param numeric_columns: A list of column names that are numeric.
+        :param categorical_columns: A list of column names that are categorical.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :param mode_capacity: The number of distinct values tracked per categorical column (optional, see
+                              `accumulate`).
+        :return: A JSON-serializable state dictionary with the keys 'means' and 'modes'.
+        """
+        return HandleMissingValues.finalize(
+            HandleMissingValues.accumulate(data, numeric_columns, categorical_columns, executor=executor,
+                                           mode_capacity=mode_capacity))
+
+    @staticmethod
+    def accumulate(data, numeric_columns, categorical_columns, accumulators=None, executor=None, mode_capacity=None):
+        """
+        Add the present values of a ColumnarDataset to streaming accumulators: a MeanVariance per
+        numeric column and a ValueCounts per categorical column. The accumulators of several chunks,
+        or of several processes, can be merged with `merge_accumulators` (in data order, so that
+        ties of the mode still go to the value seen first) before they are finalized.
+
+        :param data: A ColumnarDataset (for example one batch of a stream).
+        :param numeric_columns: A list of column names that are numeric.
+        :param categorical_columns: A list of column names that are categorical.
+        :param accumulators: A dictionary of accumulators to update (optional, a new one is created by default).
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :param mode_capacity: The number of distinct values tracked by each new ValueCounts (optional). With a
+                              capacity the counters are bounded heavy-hitter sketches, so the memory of a
+                              high-cardinality column does not grow with its number of distinct values.
+        :return: The dictionary mapping each column name to its accumulator.
+        """
+        accumulators = {} if accumulators is None else accumulators
+        executor = executor or ColumnExecutor()
+        columns = list(numeric_columns) + list(categorical_columns)
+        tasks = [(accumulators.get(column) or MeanVariance(), data.columns[column], data.masks[column])
+                 for column in numeric_columns]
+        tasks += [(accumulators.get(column) or ValueCounts(mode_capacity), data.columns[column], data.masks[column],
+                   data.categories.get(column)) for column in categorical_columns]
+        accumulators.update(zip(columns, executor.map(update_accumulator, tasks,
+                                                      executor.python_bound_columns(data, columns))))
+        return accumulators
+
+    @staticmethod
+    def finalize(accumulators):
+        """
+        Build the imputation state from accumulators filled by `accumulate`.
+
+        :param accumulators: A dictionary mapping column names to MeanVariance or ValueCounts accumulators.
+        :return: A JSON-serializable state dictionary with the keys 'means' and 'modes'.
+        """
+        means = {}
+        modes = {}
+        for column, accumulator in accumulators.items():
+            if isinstance(accumulator, MeanVariance):
+                means[column] = accumulator.get_mean()
+            else:
+                modes[column] = accumulator.get_mode()
+        return {"means": means, "modes": modes}
+
+    @staticmethod
+    def transform(data, state, executor=None):
+        """
+        Replace the missing values of a ColumnarDataset with fitted imputation values.
+
+        Compact numeric columns without gaps keep their dtype; imputed columns are stored as float64,
+        so compact storage does not change the imputed values.
+
+        :param data: A ColumnarDataset.
+        :param state: A state dictionary returned by `fit`.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The ColumnarDataset with missing values handled.
+        """
+        executor = executor or ColumnExecutor()
+        numeric = list(state["means"])
+        tasks = [(data.columns[column], data.masks[column], state["means"][column]) for column in numeric]
+        for column, values in zip(numeric, executor.map(HandleMissingValues.impute_numeric, tasks)):
+            if values is not None:
+                data.set_column(column, values)
+
+        categorical = list(state["modes"])
+        tasks = [(data.select([column]), column, state["modes"][column]) for column in categorical]
+        imputed = executor.map(HandleMissingValues.impute_categorical, tasks,
+                               executor.python_bound_columns(data, categorical))
+        for column, result in zip(categorical, imputed):
+            if result is not None:
+                data.set_column(column, result[0], categories=result[1])
+        return data
+
+    @staticmethod
+    def impute_numeric(values, mask, mean_value):
+        """
+        Impute the missing values of one numeric column with its mean.
+
+        :param values: A numeric numpy array.
+        :param mask: A boolean array that is True where the value is missing.
+        :param mean_value: The fitted mean.
+        :return: The imputed array, or None if a compact column without gaps is kept as it is.
+        """
+        if not mask.any() and values.dtype.kind in "biuf" and values.dtype != np.float64:
+            return None  # Compact columns without gaps keep their dtype
+        return np.where(mask, mean_value, to_float64(values))
+
+    @staticmethod
+    def impute_categorical(data, column, mode_value):
+        """
+        Impute the missing values of one categorical column with its mode. A dictionary-encoded column
+        stays encoded if the mode is one of its categories.
+
+        :param data: A ColumnarDataset holding the column.
+        :param column: The column name.
+        :param mode_value: The fitted mode (None leaves the column as it is).
+        :return: A tuple (values, categories) of the imputed column (categories is None unless it stays
+                 dictionary-encoded), or None if nothing is imputed.
+        """
+        values = data.columns[column]
+        mask = data.masks[column]
+        if not mask.any() or mode_value is None:
+            return None
+        categories = data.categories.get(column)
+        if categories is not None:
+            position = np.searchsorted(categories, mode_value)
+            if position < len(categories) and categories[position] == mode_value:
+                return np.where(mask, position, values).astype(values.dtype), categories
+            values = data.decode(column)
+        values = values.copy()
+        values[mask] = mode_value
+        return values, None
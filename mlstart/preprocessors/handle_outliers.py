@@ -1,28 +1,175 @@
+import math
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, to_float64
+from mlstart.processing.accumulators import DEFAULT_QUANTILE_ERROR, QuantileSketch
+from mlstart.processing.column_executor import ColumnExecutor, update_accumulator
+
 class HandleOutliers:
     """
     Handles outliers in numeric features using the IQR method.
     """
 
     @staticmethod
-    def process(data, numeric_columns):
+    def process(data, numeric_columns, clip=False, executor=None):
         """
         Handle outliers in numeric columns by filtering out rows with values outside the IQR range.
 
-        :param data: A list of dictionaries representing the dataset.
+        For a ColumnarDataset, the bounds of every column are computed on all rows (see `fit`) and
+        rows are filtered once with a combined mask, so the result does not depend on the column
+        order. Rows of a list of dictionaries are filtered column by column.
+
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
         :param numeric_columns: A list of column names that are numeric.
-        :return: A list of dictionaries with outliers removed based on the IQR method.
+        :param clip: If True, values outside the bounds are clipped to the bounds instead of their
+                     rows being removed.
+        :param executor: A ColumnExecutor running the columns of a ColumnarDataset in parallel (optional).
+        :return: The dataset (in the same representation) with outliers removed based on the IQR method.
         """
-        for column in numeric_columns:
-            # Extract numeric values from the column
-            values = [float(row[column]) for row in data]
+        if isinstance(data, ColumnarDataset):
+            return HandleOutliers.transform(data, HandleOutliers.fit(data, numeric_columns, executor), clip, executor)
 
-            # Calculate Q1, Q3, and IQR
-            q1 = sorted(values)[int(len(values) * 0.25)]
-            q3 = sorted(values)[int(len(values) * 0.75)]
-            iqr = q3 - q1
+        if clip:
+            for column in numeric_columns:
+                lower_bound, upper_bound = HandleOutliers.iqr_bounds(np.array([float(row[column]) for row in data]))
+                for row in data:
+                    row[column] = min(max(float(row[column]), lower_bound), upper_bound)
+            return data
 
-            # Determine bounds for outliers
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
+        for column in numeric_columns:
+            # Determine bounds for outliers from Q1, Q3 and the IQR of the remaining rows
+            lower_bound, upper_bound = HandleOutliers.iqr_bounds(np.array([float(row[column]) for row in data]))
             data = [row for row in data if lower_bound <= float(row[column]) <= upper_bound] # Filter rows that fall within the bounds
         return data
+
+    @staticmethod
+    def fit(data, numeric_columns, executor=None):
+        """
+        Compute the IQR outlier bounds of each numeric column of a ColumnarDataset. Every column is
+        fitted on all rows, so the bounds can be stored and applied to new data.
+
+        :param data: A ColumnarDataset.
+        :param numeric_columns: A list of column names that are numeric.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: A JSON-serializable state dictionary with the key 'bounds' ([lower, upper] per column).
+        """
+        executor = executor or ColumnExecutor()
+        bounds = executor.map(HandleOutliers.iqr_bounds, [(data.columns[column],) for column in numeric_columns],
+                              executor.python_bound_columns(data, numeric_columns))
+        return {"bounds": dict(zip(numeric_columns, bounds))}
+
+    @staticmethod
+    def accumulate(data, numeric_columns, accumulators=None, error=DEFAULT_QUANTILE_ERROR, executor=None):
+        """
+        Add the present values of the numeric columns of a ColumnarDataset to quantile sketches, so
+        that bounds can be fitted on a stream of batches without holding the columns in memory. The
+        sketches of several chunks, or of several processes, can be merged with `merge_accumulators`
+        before they are finalized.
+
+        :param data: A ColumnarDataset (for example one batch of a stream).
+        :param numeric_columns: A list of column names that are numeric.
+        :param accumulators: A dictionary of QuantileSketch accumulators to update (optional, a new one
+                             is created by default).
+        :param error: The rank error of new sketches (see QuantileSketch), or None for exact quartiles.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The dictionary mapping each column name to its QuantileSketch.
+        """
+        accumulators = {} if accumulators is None else accumulators
+        executor = executor or ColumnExecutor()
+        tasks = [(accumulators.get(column) or QuantileSketch(error), data.columns[column], data.masks[column])
+                 for column in numeric_columns]
+        updated = executor.map(update_accumulator, tasks, executor.python_bound_columns(data, numeric_columns))
+        accumulators.update(zip(numeric_columns, updated))
+        return accumulators
+
+    @staticmethod
+    def finalize(accumulators):
+        """
+        Build the outlier bounds from sketches filled by `accumulate`.
+
+        :param accumulators: A dictionary mapping column names to QuantileSketch accumulators.
+        :return: A JSON-serializable state dictionary with the key 'bounds' ([lower, upper] per column).
+        """
+        bounds = {}
+        for column, sketch in accumulators.items():
+            bounds[column] = HandleOutliers.quartile_bounds(*sketch.quantiles([0.25, 0.75])) if sketch.count \
+                else [-math.inf, math.inf]
+        return {"bounds": bounds}
+
+    @staticmethod
+    def transform(data, state, clip=False, executor=None):
+        """
+        Remove the rows of a ColumnarDataset with a value outside the fitted bounds of any column,
+        filtering all rows at once, or clip the values to the bounds.
+
+        :param data: A ColumnarDataset.
+        :param state: A state dictionary returned by `fit`.
+        :param clip: If True, clip values to the bounds instead of removing rows.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The ColumnarDataset with outliers removed or clipped.
+        """
+        executor = executor or ColumnExecutor()
+        columns = list(state["bounds"])
+        tasks = [(data.columns[column], *state["bounds"][column]) for column in columns]
+        if clip:
+            for column, values in zip(columns, executor.map(HandleOutliers.clip, tasks)):
+                data.set_column(column, values, data.masks[column])
+            return data
+
+        keep = np.ones(len(data), dtype=bool)
+        for within in executor.map(HandleOutliers.within_bounds, tasks):
+            keep &= within
+        return data if keep.all() else data.take(keep)
+
+    @staticmethod
+    def iqr_bounds(values):
+        """
+        Compute the IQR outlier bounds of an array. The quartiles are the values at positions
+        int(n * 0.25) and int(n * 0.75) of the sorted array; both are found in one partial
+        selection (np.partition) in linear time instead of a full sort.
+
+        :param values: A numeric numpy array.
+        :return: A list [lower_bound, upper_bound] of floats (infinite for an empty array).
+        """
+        if not len(values):
+            return [-math.inf, math.inf]
+        positions = (int(len(values) * 0.25), int(len(values) * 0.75))
+        q1, q3 = to_float64(np.partition(values, positions)[list(positions)]).tolist()
+        return HandleOutliers.quartile_bounds(q1, q3)
+
+    @staticmethod
+    def quartile_bounds(q1, q3):
+        """
+        Compute the IQR outlier bounds from the first and third quartiles.
+
+        :param q1: The first quartile.
+        :param q3: The third quartile.
+        :return: A list [lower_bound, upper_bound] of floats.
+        """
+        iqr = q3 - q1
+        return [q1 - 1.5 * iqr, q3 + 1.5 * iqr]
+
+    @staticmethod
+    def within_bounds(values, lower_bound, upper_bound):
+        """
+        Flag the values of an array that lie within outlier bounds. The comparison is made in float64,
+        so that compact columns keep the same rows as full-precision ones.
+
+        :param values: A numeric numpy array.
+        :param lower_bound: The lower bound.
+        :param upper_bound: The upper bound.
+        :return: A boolean numpy array that is True where the value is kept.
+        """
+        values = values if values.dtype == np.float64 else to_float64(values)
+        return (values >= lower_bound) & (values <= upper_bound)
+
+    @staticmethod
+    def clip(values, lower_bound, upper_bound):
+        """
+        Clip an array to outlier bounds, in float64.
+
+        :param values: A numeric numpy array.
+        :param lower_bound: The lower bound.
+        :param upper_bound: The upper bound.
+        :return: The clipped array.
+        """
+        return np.clip(to_float64(values), lower_bound, upper_bound)
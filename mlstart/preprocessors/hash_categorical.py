@@ -0,0 +1,103 @@
+import numpy as np
+from mlstart.core.cardinality import hash64
+from mlstart.core.dataset import ColumnarDataset, smallest_int_dtype
+from mlstart.processing.column_executor import ColumnExecutor
+
+# Default number of hash buckets per hashed column
+DEFAULT_BUCKETS = 1024
+
+# Number of values hashed at a time, which bounds the memory used for the distinct values
+CHUNK_SIZE = 65536
+
+
+class HashCategorical:
+    """
+    Encodes high-cardinality categorical features with the hashing trick.
+
+    Each value is hashed into one of a fixed number of buckets, and the column stands for one
+    sparse indicator per bucket (see ColumnarDataset.one_hot_matrix). No vocabulary is built, so
+    memory does not grow with the number of distinct values, and every batch of a stream is
+    encoded the same way without a fitting pass. Distinct values may share a bucket.
+    """
+
+    @staticmethod
+    def process(data, hashed_columns, n_buckets=DEFAULT_BUCKETS, executor=None):
+        """
+        Hash categorical features of the dataset into buckets.
+
+        :param data: A ColumnarDataset.
+        :param hashed_columns: A list of column names to hash.
+        :param n_buckets: The number of buckets per column. Default is DEFAULT_BUCKETS.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The ColumnarDataset with the hashed columns encoded.
+        :raises ValueError: If the data is not a ColumnarDataset.
+        """
+        return HashCategorical.transform(data, HashCategorical.fit(data, hashed_columns, n_buckets), executor)
+
+    @staticmethod
+    def fit(data, hashed_columns, n_buckets=DEFAULT_BUCKETS):
+        """
+        Record the hashing configuration. Nothing is learned from the data.
+
+        :param data: A ColumnarDataset (unused; kept for symmetry with the other steps).
+        :param hashed_columns: A list of column names to hash.
+        :param n_buckets: The number of buckets per column. Default is DEFAULT_BUCKETS.
+        :return: A JSON-serializable state dictionary with the keys 'columns' and 'n_buckets'.
+        :raises ValueError: If the number of buckets is not positive.
+        """
+        if n_buckets < 1:
+            raise ValueError("n_buckets must be at least 1.")
+        return {"columns": list(hashed_columns), "n_buckets": int(n_buckets)}
+
+    @staticmethod
+    def transform(data, state, executor=None):
+        """
+        Replace each hashed column by its bucket codes, marked as one-hot. Missing values get no
+        indicator.
+
+        :param data: A ColumnarDataset.
+        :param state: A state dictionary returned by `fit`.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The encoded ColumnarDataset.
+        :raises ValueError: If the data is not a ColumnarDataset.
+        """
+        if not isinstance(data, ColumnarDataset):
+            raise ValueError("Feature hashing requires a ColumnarDataset.")
+        executor = executor or ColumnExecutor()
+        columns = state["columns"]
+        buckets = np.arange(state["n_buckets"])
+        tasks = [(data.select([column]), column, state["n_buckets"]) for column in columns]
+        codes = executor.map(HashCategorical.bucket_codes, tasks, executor.python_bound_columns(data, columns))
+        for column, column_codes in zip(columns, codes):
+            data.set_column(column, column_codes, data.masks[column], buckets, one_hot=True)
+        return data
+
+    @staticmethod
+    def bucket_codes(data, column, n_buckets):
+        """
+        Compute the bucket of every value of a column. Each distinct value is hashed once; the
+        values of a dictionary-encoded column are hashed through its categories.
+
+        :param data: A ColumnarDataset.
+        :param column: The column name.
+        :param n_buckets: The number of buckets.
+        :return: A numpy array of bucket codes (0 where the value is missing).
+        """
+        values = data.columns[column]
+        mask = data.masks[column]
+        dtype = smallest_int_dtype(0, n_buckets) or np.int64
+        if column in data.categories:
+            # Code -1 (missing) selects the trailing bucket 0
+            lookup = np.append(hash64(data.categories[column]) % np.uint64(n_buckets), 0).astype(dtype)
+            return lookup[np.where(mask, -1, values)]
+
+        codes = np.zeros(len(values), dtype=dtype)
+        for start in range(0, len(values), CHUNK_SIZE):
+            chunk = values[start:start + CHUNK_SIZE]
+            present = ~mask[start:start + CHUNK_SIZE]
+            if not present.any():
+                continue
+            uniques, inverse = np.unique(chunk[present], return_inverse=True)
+            buckets = (hash64(uniques) % np.uint64(n_buckets)).astype(dtype)
+            codes[start:start + CHUNK_SIZE][present] = buckets[inverse]
+        return codes
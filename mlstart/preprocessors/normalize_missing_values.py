@@ -1,4 +1,6 @@
 import re
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, compact_column, is_missing_value
 
 class NormalizeMissingValues:
     """
@@ -11,11 +13,14 @@ class NormalizeMissingValues:
         """
         Normalize missing values and invalid entries in the dataset by replacing them with None.
 
-        :param data: A list of dictionaries representing the dataset.
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
         :param numeric_columns: A list of column names that are numeric.
         :param categorical_columns: A list of column names that are categorical.
-        :return: A list of dictionaries with missing and invalid values normalized.
+        :return: The dataset (in the same representation) with missing and invalid values normalized.
         """
+        if isinstance(data, ColumnarDataset):
+            return NormalizeMissingValues._process_dataset(data, numeric_columns, categorical_columns)
+
         for row in data:
             for key, value in row.items():
                 # Normalize missing values
@@ -39,3 +44,85 @@ class NormalizeMissingValues:
                             row[key] = None
 
         return data
+
+    @staticmethod
+    def is_invalid_category(value):
+        """
+        Check whether a categorical value is missing or made up only of invalid characters.
+
+        :param value: A single categorical value.
+        :return: True if the value should be treated as missing.
+        """
+        if is_missing_value(value) or not isinstance(value, (str, int)):
+            return True
+        stripped = str(value).strip()
+        return len(re.sub(r'[a-zA-Z0-9]', '', stripped)) == len(stripped)
+
+    @staticmethod
+    def _process_dataset(data, numeric_columns, categorical_columns):
+        """
+        Normalize a ColumnarDataset. Numeric columns are converted to float arrays with invalid
+        entries masked; invalid categorical entries are masked. Text columns are dictionary-encoded
+        (if they are not already) so that every distinct value is validated or parsed only once;
+        code -1 marks a missing value.
+
+        :param data: A ColumnarDataset.
+        :param numeric_columns: A list of column names that are numeric.
+        :param categorical_columns: A list of column names that are categorical.
+        :return: The normalized ColumnarDataset.
+        """
+        for column in data.headers:
+            if data.is_numeric(column):
+                continue  # Parsed at load time; missing values are already masked
+            if column not in numeric_columns and column not in categorical_columns:
+                continue
+
+            values = data.columns[column]
+            mask = data.masks[column]
+            categories = data.categories.get(column)
+            if categories is None:
+                values, categories = compact_column(values, mask)
+            if categories is None:
+                # Values of different types cannot be dictionary-encoded; check every cell
+                NormalizeMissingValues._process_cells(data, column, column in numeric_columns)
+                continue
+
+            if column in numeric_columns:
+                parsed_categories = np.full(len(categories) + 1, np.nan)  # Code -1 selects the trailing NaN
+                for i, value in enumerate(categories):
+                    try:
+                        parsed_categories[i] = float(value)
+                    except (ValueError, TypeError):
+                        pass
+                parsed = parsed_categories[np.where(mask, -1, values)]
+                data.set_column(column, parsed, np.isnan(parsed))
+            else:
+                invalid = np.array([NormalizeMissingValues.is_invalid_category(value) for value in categories] + [True],
+                                   dtype=bool)
+                mask = mask | invalid[np.where(mask, -1, values)]
+                data.set_column(column, np.where(mask, -1, values).astype(values.dtype), mask, categories)
+
+        return data
+
+    @staticmethod
+    def _process_cells(data, column, numeric):
+        """
+        Normalize an object column of a ColumnarDataset cell by cell.
+        """
+        values = data.columns[column]
+        mask = data.masks[column]
+        if numeric:
+            parsed = np.full(len(values), np.nan)
+            for i, value in enumerate(values):
+                if not mask[i]:
+                    try:
+                        parsed[i] = float(value)
+                    except (ValueError, TypeError):
+                        pass
+            data.set_column(column, parsed, np.isnan(parsed))
+        else:
+            invalid = np.array([NormalizeMissingValues.is_invalid_category(value) for value in values], dtype=bool)
+            mask = mask | invalid
+            values = values.copy()
+            values[mask] = None
+            data.set_column(column, values, mask)
@@ -1,3 +1,24 @@
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+from mlstart.core.cardinality import hash64
+from mlstart.core.dataset import ColumnarDataset
+
+# Hash of a missing value, whatever the value stored under the mask
+_MISSING_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+# Odd multiplier used to combine the hashes of the columns of a row
+_ROW_PRIME = np.uint64(0x100000001B3)
+
+# Default number of distinct rows whose values SeenRows keeps in memory before spilling them to disk
+DEFAULT_MAX_ROWS = 1000000
+
+# Default number of hash partitions of the rows spilled to disk
+DEFAULT_PARTITIONS = 64
+
+
 class RemoveDuplicates:
     """
     Removes duplicate rows from the dataset.
@@ -8,9 +29,13 @@ class RemoveDuplicates:
         """
         Remove duplicate rows from the dataset.
 
-        :param data: A list of dictionaries representing the dataset.
-        :return: A list of dictionaries with duplicates removed.
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
+        :return: The dataset (in the same representation) with duplicates removed.
         """
+        if isinstance(data, ColumnarDataset):
+            keep = RemoveDuplicates.first_occurrences(data)
+            return data if keep.all() else data.take(keep)
+
         unique_data = []
         seen = set()
         for row in data:
@@ -19,3 +44,290 @@ class RemoveDuplicates:
                 seen.add(row_tuple)
                 unique_data.append(row)
         return unique_data
+
+    @staticmethod
+    def row_hashes(data):
+        """
+        Hash every row of a ColumnarDataset to a 64-bit integer, column by column in bulk. Rows with
+        equal values hash alike in every batch and process: dictionary-encoded columns are hashed
+        through their categories, numbers by value (so 1 and 1.0 hash alike) and missing values to
+        a fixed hash.
+
+        :param data: A ColumnarDataset.
+        :return: A numpy uint64 array with one hash per row.
+        """
+        hashes = np.zeros(len(data), dtype=np.uint64)
+        for column in data.headers:
+            column_hashes = RemoveDuplicates._column_hashes(data, column)
+            hashes = (hashes ^ column_hashes) * _ROW_PRIME
+            hashes ^= hashes >> np.uint64(29)
+        return hashes
+
+    @staticmethod
+    def first_occurrences(data, hashes=None):
+        """
+        Find the first occurrence of every distinct row of a ColumnarDataset.
+
+        Rows are grouped by their hash with one sort, and each row whose hash was seen before is
+        compared exactly with the first row of its group, so a hash collision never drops a row.
+
+        :param data: A ColumnarDataset.
+        :param hashes: The row hashes, if already computed (see `row_hashes`).
+        :return: A boolean array that is True for the rows to keep.
+        """
+        hashes = RemoveDuplicates.row_hashes(data) if hashes is None else hashes
+        keep = np.ones(len(hashes), dtype=bool)
+        if len(hashes) < 2:
+            return keep
+
+        order = np.argsort(hashes, kind="stable")  # Stable, so each group starts with its first occurrence
+        sorted_hashes = hashes[order]
+        starts = np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]]
+        if starts.all():
+            return keep
+        group_first = order[np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))]
+        rows = order[~starts]
+        firsts = group_first[~starts]
+
+        equal = RemoveDuplicates.rows_equal(data, rows, data, firsts)
+        keep[rows[equal]] = False
+        if not equal.all():
+            # Hash collisions: compare the rows of the affected groups by value
+            for group_hash in np.unique(hashes[rows[~equal]]):
+                group = np.flatnonzero(hashes == group_hash)
+                columns = [RemoveDuplicates.canonical_values(data, column, group) for column in data.headers]
+                seen = set()
+                for position, row in enumerate(group):
+                    row_tuple = tuple(None if mask[position] else values[position] for values, mask in columns)
+                    keep[row] = row_tuple not in seen
+                    seen.add(row_tuple)
+        return keep
+
+    @staticmethod
+    def rows_equal(left, left_rows, right, right_rows):
+        """
+        Compare rows of two datasets with the same columns, value by value.
+
+        :param left: A ColumnarDataset.
+        :param left_rows: An array of row indices into `left`.
+        :param right: A ColumnarDataset (or a dictionary with 'columns' and 'masks' of canonical values,
+                      see `canonical_values`).
+        :param right_rows: An array of row indices into `right`, one per left row.
+        :return: A boolean array that is True where the two rows hold the same values.
+        """
+        equal = np.ones(len(left_rows), dtype=bool)
+        for column in left.headers:
+            left_values, left_mask = RemoveDuplicates.canonical_values(left, column, left_rows)
+            if isinstance(right, ColumnarDataset):
+                right_values, right_mask = RemoveDuplicates.canonical_values(right, column, right_rows)
+            else:
+                right_values, right_mask = right["columns"][column][right_rows], right["masks"][column][right_rows]
+            same = np.asarray(left_values == right_values, dtype=bool)
+            equal &= (left_mask & right_mask) | (~left_mask & ~right_mask & same)
+        return equal
+
+    @staticmethod
+    def canonical_values(data, column, rows):
+        """
+        Get the values of some rows of a column in a form that compares equal across batches: decoded
+        categories, float64 numbers or the stored objects.
+
+        :param data: A ColumnarDataset.
+        :param column: The column name.
+        :param rows: An array of row indices.
+        :return: A tuple (values, mask) of numpy arrays.
+        """
+        mask = data.masks[column][rows]
+        if column in data.categories:
+            lookup = np.empty(len(data.categories[column]) + 1, dtype=object)
+            lookup[:-1] = data.categories[column]
+            return lookup[np.where(mask, -1, data.columns[column][rows])], mask
+        values = data.columns[column][rows]
+        return (values.astype(np.float64) if values.dtype.kind in "biuf" else values), mask
+
+    @staticmethod
+    def _column_hashes(data, column):
+        """
+        Hash the values of one column, hashing each distinct category or text value once.
+        """
+        values = data.columns[column]
+        mask = data.masks[column]
+        if column in data.categories:
+            lookup = np.append(hash64(data.categories[column]), _MISSING_HASH)
+            return lookup[np.where(mask, -1, values)]  # Code -1 selects the trailing missing hash
+
+        hashes = np.full(len(values), _MISSING_HASH, dtype=np.uint64)
+        present = values[~mask]
+        if values.dtype == object:
+            try:
+                uniques, inverse = np.unique(present, return_inverse=True)
+                hashes[~mask] = hash64(uniques)[inverse]
+                return hashes
+            except TypeError:
+                pass  # Values of different types cannot be sorted
+        hashes[~mask] = hash64(present)
+        return hashes
+
+
+class SeenRows:
+    """
+    The distinct rows emitted so far by a stream of batches, used to remove duplicates across batches
+    with bounded memory.
+
+    Only the 64-bit hash of each distinct row is kept in memory for good. The row values, needed to
+    rule out hash collisions exactly, are buffered up to `max_rows` rows and then spilled to hash
+    partitions on disk; a partition is only read back when a new row hashes like one of its rows.
+    """
+
+    def __init__(self, max_rows=DEFAULT_MAX_ROWS, spill_dir=None, n_partitions=DEFAULT_PARTITIONS):
+        """
+        Initialize an empty set of rows.
+
+        :param max_rows: The largest number of row values to buffer in memory before spilling them.
+        :param spill_dir: The directory for spilled partitions (optional, defaults to a temporary
+                          directory that `close` removes).
+        :param n_partitions: The number of hash partitions. Default is DEFAULT_PARTITIONS.
+        """
+        self.max_rows = max_rows
+        self.spill_dir = spill_dir
+        self.n_partitions = n_partitions
+        self.hashes = []  # Sorted arrays of the hashes of the distinct rows
+        self.buffers = []  # Blocks of row values not spilled yet, one per batch
+        self.spilled = [[] for _ in range(n_partitions)]  # Paths of spilled blocks, per partition
+        self.n_buffered = 0
+        self._own_dir = False
+
+    def __len__(self):
+        return sum(len(hashes) for hashes in self.hashes)
+
+    def filter(self, batch):
+        """
+        Find the rows of a batch that were not seen in this or an earlier batch, and record them.
+
+        :param batch: A ColumnarDataset with the same columns as the earlier batches.
+        :return: A boolean array that is True for the rows to keep.
+        """
+        hashes = RemoveDuplicates.row_hashes(batch)
+        keep = RemoveDuplicates.first_occurrences(batch, hashes)
+
+        candidates = np.flatnonzero(keep & self._contains(hashes))
+        if len(candidates):
+            keep[candidates[self._seen_before(batch, hashes, candidates)]] = False
+
+        new_rows = np.flatnonzero(keep)
+        if len(new_rows):
+            self._add(batch, hashes, new_rows)
+        return keep
+
+    def close(self):
+        """
+        Remove the spilled partitions from disk.
+        """
+        if self._own_dir and self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._own_dir = False
+        else:
+            for paths in self.spilled:
+                for path in paths:
+                    os.remove(path)
+        self.spilled = [[] for _ in range(self.n_partitions)]
+
+    def _contains(self, hashes):
+        """
+        Check which hashes belong to a row seen before.
+        """
+        found = np.zeros(len(hashes), dtype=bool)
+        for seen in self.hashes:
+            positions = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+            found |= seen[positions] == hashes
+        return found
+
+    def _seen_before(self, batch, hashes, candidates):
+        """
+        Compare candidate rows exactly with the recorded rows of the same hash, in the buffered blocks
+        first and then in the spilled partitions they hash to.
+        """
+        seen = np.zeros(len(candidates), dtype=bool)
+        pending = np.arange(len(candidates))
+        for block in self.buffers:
+            self._compare(batch, hashes, candidates, pending[~seen[pending]], block, seen)
+
+        partitions = self._partition(hashes[candidates])
+        for partition in np.unique(partitions[~seen]):
+            for path in self.spilled[partition]:
+                pending = np.flatnonzero((partitions == partition) & ~seen)
+                if not len(pending):
+                    break
+                with open(path, "rb") as file:
+                    self._compare(batch, hashes, candidates, pending, pickle.load(file), seen)
+        return seen
+
+    @staticmethod
+    def _compare(batch, hashes, candidates, pending, block, seen):
+        """
+        Mark the pending candidates that equal a row of a block with the same hash.
+        """
+        if not len(pending):
+            return
+        order = np.argsort(block["hashes"], kind="stable")
+        sorted_hashes = block["hashes"][order]
+        wanted = hashes[candidates[pending]]
+        first = np.searchsorted(sorted_hashes, wanted, side="left")
+        last = np.searchsorted(sorted_hashes, wanted, side="right")
+        # Recorded rows are distinct, so a candidate equals at most one of the rows sharing its hash
+        for offset in range(int((last - first).max())):
+            matches = first + offset < last
+            rows = pending[matches]
+            seen[rows] |= RemoveDuplicates.rows_equal(batch, candidates[rows], block, order[first[matches] + offset])
+
+    def _add(self, batch, hashes, rows):
+        """
+        Record new distinct rows, spilling the buffered values when there are too many.
+        """
+        # Sorted runs of geometrically growing sizes, so each hash is merged O(log n) times
+        self.hashes.append(np.sort(hashes[rows]))
+        while len(self.hashes) > 1 and len(self.hashes[-2]) <= 2 * len(self.hashes[-1]):
+            last = self.hashes.pop()
+            self.hashes[-1] = np.sort(np.concatenate([self.hashes[-1], last]))
+
+        block = {"hashes": hashes[rows], "columns": {}, "masks": {}}
+        for column in batch.headers:
+            block["columns"][column], block["masks"][column] = RemoveDuplicates.canonical_values(batch, column, rows)
+        self.buffers.append(block)
+        self.n_buffered += len(rows)
+        if self.n_buffered > self.max_rows:
+            self._spill()
+
+    def _spill(self):
+        """
+        Write the buffered row values to their partitions on disk.
+        """
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="mlstart-dedup-")
+            self._own_dir = True
+        buffered = {"hashes": np.concatenate([block["hashes"] for block in self.buffers]), "columns": {}, "masks": {}}
+        for key in ("columns", "masks"):
+            for column in self.buffers[0][key]:
+                buffered[key][column] = np.concatenate([block[key][column] for block in self.buffers])
+
+        partitions = self._partition(buffered["hashes"])
+        for partition in np.unique(partitions):
+            rows = np.flatnonzero(partitions == partition)
+            block = {
+                "hashes": buffered["hashes"][rows],
+                "columns": {column: values[rows] for column, values in buffered["columns"].items()},
+                "masks": {column: mask[rows] for column, mask in buffered["masks"].items()},
+            }
+            path = os.path.join(self.spill_dir, f"partition-{partition}-{len(self.spilled[partition])}.pkl")
+            with open(path, "wb") as file:
+                pickle.dump(block, file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.spilled[partition].append(path)
+        self.buffers = []
+        self.n_buffered = 0
+
+    def _partition(self, hashes):
+        """
+        Map hashes to partitions by their top bits (the low bits already pick positions in sorted arrays).
+        """
+        return (hashes >> np.uint64(40)) % np.uint64(self.n_partitions)
@@ -1,3 +1,5 @@
+from mlstart.core.dataset import ColumnarDataset
+
 class RemoveInvalidColumns:
     """
     Removes columns with empty names or invalid data from the dataset.
@@ -8,9 +10,12 @@ class RemoveInvalidColumns:
         """
         Remove columns with empty names or invalid data from the dataset.
 
-        :param data: A list of dictionaries representing the dataset.
-        :return: A list of dictionaries with invalid columns removed.
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
+        :return: The dataset (in the same representation) with invalid columns removed.
         """
+        if isinstance(data, ColumnarDataset):
+            return data.select([col for col in data.headers if col.strip()])
+
         valid_columns = [col for col in data[0].keys() if col.strip()]
 
         # Remove invalid columns and return the cleaned dataset
@@ -1,4 +1,7 @@
-import math
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, to_float64
+from mlstart.processing.accumulators import MeanVariance
+from mlstart.processing.column_executor import ColumnExecutor, update_accumulator
 
 class ScaleNumeric:
     """
@@ -6,18 +9,22 @@ class ScaleNumeric:
     """
 
     @staticmethod
-    def process(data, numeric_columns):
+    def process(data, numeric_columns, executor=None):
         """
         Scale numeric features using Z-score normalization.
 
-        :param data: A list of dictionaries representing the dataset.
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
         :param numeric_columns: A list of column names that are numeric.
-        :return: A list of dictionaries with numeric features scaled.
+        :param executor: A ColumnExecutor running the columns of a ColumnarDataset in parallel (optional).
+        :return: The dataset (in the same representation) with numeric features scaled.
         """
+        if isinstance(data, ColumnarDataset):
+            return ScaleNumeric.transform(data, ScaleNumeric.fit(data, numeric_columns, executor), executor)
+
         for column in numeric_columns:
-            values = [float(row[column]) for row in data]
-            mean_value = sum(values) / len(values)
-            std_dev = math.sqrt(sum((x - mean_value) ** 2 for x in values) / len(values))
+            accumulator = MeanVariance()
+            accumulator.update(np.array([float(row[column]) for row in data]))
+            mean_value, std_dev = accumulator.get_mean(), accumulator.get_std()
             if std_dev == 0:
                 for row in data:
                     row[column] = 0.0
@@ -25,3 +32,82 @@ class ScaleNumeric:
                 for row in data:
                     row[column] = (float(row[column]) - mean_value) / std_dev
         return data
+
+    @staticmethod
+    def fit(data, numeric_columns, executor=None):
+        """
+        Compute the mean and the (population) standard deviation of each numeric column of a
+        ColumnarDataset, in float64.
+
+        :param data: A ColumnarDataset.
+        :param numeric_columns: A list of column names that are numeric.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: A JSON-serializable state dictionary with the keys 'means' and 'stds'.
+        """
+        return ScaleNumeric.finalize(ScaleNumeric.accumulate(data, numeric_columns, executor=executor))
+
+    @staticmethod
+    def accumulate(data, numeric_columns, accumulators=None, executor=None):
+        """
+        Add the values of the numeric columns of a ColumnarDataset to streaming accumulators. The
+        accumulators of several chunks, or of several processes, can be merged with
+        `merge_accumulators` before they are finalized.
+
+        :param data: A ColumnarDataset (for example one batch of a stream).
+        :param numeric_columns: A list of column names that are numeric.
+        :param accumulators: A dictionary of MeanVariance accumulators to update (optional, a new one
+                             is created by default).
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The dictionary mapping each column name to its MeanVariance accumulator.
+        """
+        accumulators = {} if accumulators is None else accumulators
+        executor = executor or ColumnExecutor()
+        tasks = [(accumulators.get(column) or MeanVariance(), data.columns[column], data.masks[column])
+                 for column in numeric_columns]
+        updated = executor.map(update_accumulator, tasks, executor.python_bound_columns(data, numeric_columns))
+        accumulators.update(zip(numeric_columns, updated))
+        return accumulators
+
+    @staticmethod
+    def finalize(accumulators):
+        """
+        Build the scaling state from accumulators filled by `accumulate`.
+
+        :param accumulators: A dictionary mapping column names to MeanVariance accumulators.
+        :return: A JSON-serializable state dictionary with the keys 'means' and 'stds'.
+        """
+        return {
+            "means": {column: accumulator.get_mean() for column, accumulator in accumulators.items()},
+            "stds": {column: accumulator.get_std() for column, accumulator in accumulators.items()},
+        }
+
+    @staticmethod
+    def transform(data, state, executor=None):
+        """
+        Apply Z-score scaling with fitted statistics. The scaled columns are float64.
+
+        :param data: A ColumnarDataset.
+        :param state: A state dictionary returned by `fit`.
+        :param executor: A ColumnExecutor running the columns in parallel (optional).
+        :return: The ColumnarDataset with numeric features scaled.
+        """
+        executor = executor or ColumnExecutor()
+        columns = list(state["means"])
+        tasks = [(data.columns[column], state["means"][column], state["stds"][column]) for column in columns]
+        for column, values in zip(columns, executor.map(ScaleNumeric.scale, tasks)):
+            data.set_column(column, values)
+        return data
+
+    @staticmethod
+    def scale(values, mean_value, std_dev):
+        """
+        Z-score scale one numeric column in float64.
+
+        :param values: A numeric numpy array.
+        :param mean_value: The fitted mean.
+        :param std_dev: The fitted standard deviation.
+        :return: The scaled array (all zeros if the standard deviation is 0).
+        """
+        if std_dev == 0:
+            return np.zeros(len(values))
+        return (to_float64(values) - mean_value) / std_dev
@@ -0,0 +1,331 @@
+import copy
+import math
+from collections import Counter
+import numpy as np
+from mlstart.core.dataset import to_float64
+
+# Number of values converted to float64 at a time, which bounds the temporary memory of an update
+CHUNK_SIZE = 65536
+
+# Default rank error of quantile sketches, as a share of the values
+DEFAULT_QUANTILE_ERROR = 0.001
+
+# Ratio between the capacity of a quantile sketch and its inverse rank error
+SKETCH_FACTOR = 2.0
+
+
+class MeanVariance:
+    """
+    A streaming accumulator of the count, mean and sum of squared deviations of numeric values.
+
+    Values can be added chunk by chunk, and accumulators fed with different parts of the data (for
+    example in different processes) can be merged. Each chunk is reduced with numpy and combined
+    with the pairwise update of Chan et al. (Welford's update for whole chunks), so the result does
+    not depend on how the data is split, up to floating-point rounding.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty accumulator.
+        """
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values, mask=None):
+        """
+        Add a chunk of values.
+
+        :param values: A numpy array (or sequence) of numbers.
+        :param mask: A boolean array that is True where the value is missing (optional). Missing values
+                     are counted in `missing` but do not enter the statistics.
+        """
+        values = np.asarray(values)
+        if mask is not None:
+            self.missing += int(mask.sum())
+            values = values[~mask]
+        for start in range(0, len(values), CHUNK_SIZE):
+            chunk = to_float64(values[start:start + CHUNK_SIZE])
+            mean = chunk.mean()
+            self._combine(len(chunk), float(mean), float(np.sum((chunk - mean) ** 2)))
+
+    def merge(self, other):
+        """
+        Merge another accumulator into this one.
+
+        :param other: A MeanVariance.
+        """
+        self.missing += other.missing
+        self._combine(other.count, other.mean, other.m2)
+
+    def get_mean(self):
+        """
+        :return: The mean of the values added so far, or NaN if there are none.
+        """
+        return self.mean if self.count else math.nan
+
+    def get_std(self, n_rows=None):
+        """
+        Compute the population standard deviation.
+
+        :param n_rows: The number of rows to divide by (optional, defaults to `count`). Passing
+                       `count + missing` gives the standard deviation after the missing values are
+                       imputed with the mean, since those add rows but no squared deviation.
+        :return: The standard deviation, or 0.0 if there are no rows.
+        """
+        n_rows = self.count if n_rows is None else n_rows
+        return math.sqrt(self.m2 / n_rows) if n_rows else 0.0
+
+    def _combine(self, count, mean, m2):
+        """
+        Combine the statistics of another set of values with the current ones.
+        """
+        if not count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+
+class ValueCounts:
+    """
+    A streaming, mergeable counter of categorical values, used to find modes.
+
+    By default every distinct value is counted exactly, in order of first occurrence, so ties of
+    the mode go to the value seen first (as with collections.Counter). With a `capacity`, the
+    counter becomes a Space-Saving heavy-hitter sketch: at most `capacity` values are tracked, a new
+    value replaces the least frequent one and inherits its count, and the counts become upper
+    bounds. Any value occurring more often than 1 / capacity of the time is guaranteed to be kept,
+    so the mode is exact unless the top counts are close.
+    """
+
+    def __init__(self, capacity=None):
+        """
+        Initialize an empty counter.
+
+        :param capacity: The largest number of distinct values to track (optional, defaults to all).
+        :raises ValueError: If the capacity is not positive.
+        """
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.counts = Counter()
+
+    def update(self, values, mask=None, categories=None):
+        """
+        Add a chunk of values.
+
+        :param values: A numpy array (or sequence) of values, or of dictionary codes if `categories` is given.
+        :param mask: A boolean array that is True where the value is missing (optional).
+        :param categories: The array of categories of a dictionary-encoded column (optional). Codes are
+                           counted with numpy and each category is looked up once.
+        """
+        values = np.asarray(values)
+        if mask is not None:
+            values = values[~mask]
+        if categories is None:
+            self._add(Counter(values.tolist()))
+            return
+        counts = np.bincount(values, minlength=len(categories))
+        used, first = np.unique(values, return_index=True)
+        order = used[np.argsort(first)]
+        self._add(dict(zip(categories[order].tolist(), counts[order].tolist())))
+
+    def merge(self, other):
+        """
+        Merge another counter into this one. Merging the counters of consecutive parts of the data
+        in order keeps the first-occurrence order of the values.
+
+        :param other: A ValueCounts.
+        """
+        self._add(other.counts)
+
+    def get_mode(self):
+        """
+        :return: The most frequent value (ties go to the value seen first), or None if nothing was counted.
+        """
+        return self.counts.most_common(1)[0][0] if self.counts else None
+
+    def values(self):
+        """
+        :return: The sorted list of the counted values.
+        """
+        return sorted(self.counts)
+
+    def _add(self, counts):
+        """
+        Add a mapping of values to counts, evicting the least frequent values beyond the capacity.
+        """
+        if self.capacity is None:
+            self.counts.update(counts)
+            return
+        for value, count in counts.items():
+            if value in self.counts or len(self.counts) < self.capacity:
+                self.counts[value] += count
+                continue
+            smallest = min(self.counts, key=self.counts.__getitem__)
+            self.counts[value] = self.counts.pop(smallest) + count
+
+
+class QuantileSketch:
+    """
+    A streaming, mergeable sketch of the distribution of numeric values, answering quantile queries
+    with bounded memory (a KLL sketch).
+
+    Values are kept in a hierarchy of compactors, where an item on level h stands for 2 ** h values.
+    When the sketch is full, the lowest full level is sorted and every other item (starting at a
+    random offset) is promoted to the next level, so memory stays at about 3 * capacity items no
+    matter how many values are added. A quantile is then off by at most about `error` in rank (as a
+    share of the values), with high probability. With `error=None` nothing is compacted and the
+    quantiles are exact.
+    """
+
+    def __init__(self, error=DEFAULT_QUANTILE_ERROR, seed=0):
+        """
+        Initialize an empty sketch.
+
+        :param error: The targeted rank error of quantile queries, as a share of the values, or None for
+                      exact quantiles with unbounded memory. Default is DEFAULT_QUANTILE_ERROR.
+        :param seed: The seed of the random compaction offsets, so results are reproducible. Default is 0.
+        :raises ValueError: If the error is not between 0 and 1.
+        """
+        if error is not None and not 0 < error < 1:
+            raise ValueError("error must be between 0 and 1.")
+        self.error = error
+        # Number of items kept on the top level; lower levels keep geometrically fewer
+        self.capacity = None if error is None else max(8, math.ceil(SKETCH_FACTOR / error))
+        self.count = 0
+        self.levels = [[]]  # Arrays of float64 items per level
+        self.sizes = [0]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values, mask=None):
+        """
+        Add a chunk of values.
+
+        :param values: A numpy array (or sequence) of numbers.
+        :param mask: A boolean array that is True where the value is missing (optional).
+        """
+        values = np.asarray(values)
+        if mask is not None:
+            values = values[~mask]
+        for start in range(0, len(values), CHUNK_SIZE):
+            chunk = to_float64(values[start:start + CHUNK_SIZE])
+            self._insert(0, chunk)
+            self.count += len(chunk)
+            self._compress()
+
+    def add_repeated(self, value, count):
+        """
+        Add a value `count` times in O(log count) memory, by placing it once on each level matching a
+        set bit of the count.
+
+        :param value: A number.
+        :param count: The number of times to add it.
+        """
+        for level in range(int(count).bit_length()):
+            if count >> level & 1:
+                self._insert(level, np.array([float(value)]))
+        self.count += int(count)
+        self._compress()
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+
+        :param other: A QuantileSketch with the same error.
+        :raises ValueError: If the errors differ.
+        """
+        if other.error != self.error:
+            raise ValueError("Only sketches with the same error can be merged.")
+        for level, items in enumerate(other.levels):
+            for array in items:
+                self._insert(level, array)
+        self.count += other.count
+        self._compress()
+
+    def copy(self):
+        """
+        :return: An independent copy of the sketch.
+        """
+        return copy.deepcopy(self)
+
+    def quantiles(self, fractions):
+        """
+        Compute quantiles of the values added so far. The quantile q is the value at position
+        int(count * q) of the sorted values, as in HandleOutliers.iqr_bounds.
+
+        :param fractions: A sequence of fractions between 0 and 1.
+        :return: A list of floats, one per fraction (NaN if the sketch is empty).
+        """
+        if not self.count:
+            return [math.nan] * len(fractions)
+        positions = [min(int(self.count * fraction), self.count - 1) for fraction in fractions]
+        if len(self.levels) == 1:
+            # Exact: a partial selection over all the values
+            values = np.concatenate(self.levels[0])
+            return np.partition(values, positions)[positions].tolist()
+
+        items = np.concatenate([array for items in self.levels for array in items])
+        weights = np.concatenate([np.full(len(array), 1 << level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels) for array in items])
+        order = np.argsort(items, kind="stable")
+        ranks = np.cumsum(weights[order])
+        return items[order][np.searchsorted(ranks, positions, side="right")].tolist()
+
+    def _level_capacity(self, level):
+        """
+        The number of items a level may hold: the top level holds `capacity`, and every level below
+        two thirds of the one above it (at least 2).
+        """
+        depth = len(self.levels) - 1 - level
+        return max(2, math.ceil(self.capacity * (2 / 3) ** depth))
+
+    def _insert(self, level, items):
+        """
+        Add items to a level, creating the level if needed.
+        """
+        while len(self.levels) <= level:
+            self.levels.append([])
+            self.sizes.append(0)
+        if len(items):
+            self.levels[level].append(items)
+            self.sizes[level] += len(items)
+
+    def _compress(self):
+        """
+        Compact the lowest full level until the sketch fits in its capacity.
+        """
+        if self.capacity is None:
+            return
+        while sum(self.sizes) > sum(self._level_capacity(level) for level in range(len(self.levels))):
+            level = next(level for level in range(len(self.levels)) if self.sizes[level] >= self._level_capacity(level))
+            items = np.sort(np.concatenate(self.levels[level]))
+            kept = items[len(items) - len(items) % 2:]  # The odd item out stays on its level
+            promoted = items[self._rng.integers(2):len(items) - len(items) % 2:2]
+            self.levels[level] = [kept] if len(kept) else []
+            self.sizes[level] = len(kept)
+            self._insert(level + 1, promoted)
+
+
+def merge_accumulators(accumulators, other):
+    """
+    Merge a dictionary of accumulators into another one, column by column. Columns that are only
+    in `other` are added.
+
+    :param accumulators: A dictionary mapping column names to MeanVariance or ValueCounts accumulators.
+    :param other: A dictionary of accumulators of the same kinds, for another part of the data.
+    :return: The merged `accumulators` dictionary.
+    """
+    for column, accumulator in other.items():
+        if column in accumulators:
+            accumulators[column].merge(accumulator)
+        else:
+            accumulators[column] = accumulator
+    return accumulators
@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def update_accumulator(accumulator, *arguments):
+    """
+    Update an accumulator with a chunk of values and return it. Used as a column task, so that an
+    accumulator updated in a worker process is sent back to the caller.
+
+    :param accumulator: A MeanVariance, ValueCounts or QuantileSketch.
+    :param arguments: The arguments of the accumulator's `update` method.
+    :return: The updated accumulator.
+    """
+    accumulator.update(*arguments)
+    return accumulator
+
+
+class ColumnExecutor:
+    """
+    Runs the independent per-column tasks of the preprocessing steps on a pool of workers.
+
+    Tasks on numeric columns spend their time in NumPy kernels, which release the GIL, so they run
+    on threads that share the arrays without copying them. Tasks on object columns (text that is not
+    dictionary-encoded) run Python code that holds the GIL, so they are sent to worker processes
+    instead. Results are returned in task order and applied to the dataset by the caller, so the
+    output is the same for any number of workers.
+    """
+
+    def __init__(self, workers=None, executor=None):
+        """
+        Initialize the ColumnExecutor. No pool is started until a task needs one.
+
+        :param workers: The number of threads, and of processes for tasks on object columns. By default
+                        (None or 1) every task runs in the calling thread.
+        :param executor: A concurrent.futures executor to run every task on instead of the default pools
+                         (optional). Tasks return their results rather than changing their arguments, so
+                         a process pool works as well as a thread pool. It is not shut down by `close`.
+        """
+        self.workers = workers or 1
+        self.executor = executor
+        self._threads = None
+        self._processes = None
+
+    @property
+    def parallel(self):
+        """
+        :return: True if tasks are run on a pool rather than in the calling thread.
+        """
+        return self.executor is not None or self.workers > 1
+
+    def map(self, function, tasks, python_bound=None):
+        """
+        Run a function once per task.
+
+        :param function: A module-level function (so that it can be sent to a worker process).
+        :param tasks: A list of argument tuples, one per task.
+        :param python_bound: A list of booleans, one per task, that are True for tasks running Python
+                             code on object values, which are sent to processes (optional, see
+                             `python_bound_columns`).
+        :return: A list of the results, in task order.
+        """
+        tasks = list(tasks)
+        if not self.parallel or len(tasks) < 2:
+            return [function(*arguments) for arguments in tasks]
+        python_bound = python_bound or [False] * len(tasks)
+        futures = [self._pool(bound).submit(function, *arguments) for arguments, bound in zip(tasks, python_bound)]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def python_bound_columns(data, columns):
+        """
+        Flag the columns of a ColumnarDataset whose values are Python objects.
+
+        :param data: A ColumnarDataset.
+        :param columns: A list of column names.
+        :return: A list of booleans, one per column.
+        """
+        return [data.columns[column].dtype == object for column in columns]
+
+    def close(self):
+        """
+        Shut down the pools started by this executor.
+        """
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown()
+        self._threads = None
+        self._processes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _pool(self, python_bound):
+        """
+        Get the pool a task runs on, starting it on first use.
+        """
+        if self.executor is not None:
+            return self.executor
+        if python_bound:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.workers)
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.workers)
+        return self._threads
@@ -1,31 +1,41 @@
-from sklearn.model_selection import train_test_split
+import numpy as np
+from scipy import sparse
+from sklearn.model_selection import ShuffleSplit, train_test_split
+from mlstart.core.dataset import ColumnarDataset, to_float64
 
 class DataHandler:
     """
     A class to handle data splitting and preparation for training and testing.
     """
 
-    def __init__(self, data, target_column, task_type):
+    def __init__(self, data, target_column, task_type, dtype=np.float64):
         """
         Initializes the DataHandler class.
 
-        :param data: A list of dictionaries representing the preprocessed dataset.
+        :param data: A ColumnarDataset or a list of dictionaries representing the preprocessed dataset.
         :param target_column: A string specifying the name of the target column.
         :param task_type: A string indicating the task type ('classification' or 'regression').
+        :param dtype: The dtype of the feature matrix built from a ColumnarDataset. Default is float64;
+                      float32 halves its memory.
         """
         self.data = data
         self.target_column = target_column
         self.task_type = task_type
+        self.dtype = dtype
 
     def split_features_and_target(self):
         """
         Splits the dataset into features (X) and target (y).
 
         :return: 
-            - X: A list of lists representing the feature matrix.
-            - y: A list representing the target vector.
+            - X: A list of lists representing the feature matrix (an ndarray for a ColumnarDataset, or a
+                 CSR matrix if the dataset has sparse one-hot columns).
+            - y: A list representing the target vector (an ndarray for a ColumnarDataset).
         :raises ValueError: If the task type is invalid or not recognized.
         """
+        if isinstance(self.data, ColumnarDataset):
+            return self._split_dataset()
+
         X = []
         y = []
 
@@ -42,17 +52,85 @@ class DataHandler:
 
         return X, y
 
+    def _split_dataset(self, rows=None):
+        """
+        Splits a ColumnarDataset into a feature matrix and a target vector.
+
+        The dense features are written column by column into one C-contiguous array of `dtype`, which
+        estimators use without converting it again. Columns marked as one-hot are expanded into sparse
+        indicator blocks, appended after the dense features in column order; the feature matrix is then
+        a CSR matrix.
+
+        :param rows: An array of row indices, in the order the rows should appear (optional, defaults to
+                     all rows in order). The rows are gathered while the matrix is built, so no copy of
+                     the matrix is needed to reorder them.
+        :return: A tuple (X, y): a numpy array or CSR matrix of features and a numpy target array.
+        :raises ValueError: If the task type is invalid or not recognized, or if a target value is missing
+                            (for example a class that the preprocessing was not fitted on).
+        """
+        target_mask = self.data.masks[self.target_column]
+        if (target_mask if rows is None else target_mask[rows]).any():
+            raise ValueError(f"The target column '{self.target_column}' has missing values.")
+
+        feature_columns = [column for column in self.data.headers
+                           if column != self.target_column and column not in self.data.one_hot_columns]
+        X = np.empty((len(self.data) if rows is None else len(rows), len(feature_columns)), dtype=self.dtype)
+        for j, column in enumerate(feature_columns):
+            values = self.data.columns[column] if rows is None else self.data.columns[column][rows]
+            # Unscaled compact float32 columns get back their exact values in a float64 matrix
+            X[:, j] = to_float64(values) if values.dtype == np.float32 and X.dtype != np.float32 else values
+
+        one_hot_columns = [column for column in self.data.headers
+                           if column != self.target_column and column in self.data.one_hot_columns]
+        if one_hot_columns:
+            one_hot = self.data if rows is None else self.data.select(one_hot_columns).take(rows)
+            blocks = [sparse.csr_matrix(X)] + [one_hot.one_hot_matrix(column) for column in one_hot_columns]
+            X = sparse.hstack(blocks, format="csr", dtype=self.dtype)
+
+        # Gathered rows are already a copy, which the conversion can reuse
+        target = self.data.columns[self.target_column]
+        if rows is not None:
+            target = target[rows]
+        if self.task_type == "classification":
+            y = target.astype(np.int64, copy=rows is None)  # Ensure target is integer for classification
+        elif self.task_type == "regression":
+            y = target.astype(np.float64, copy=rows is None)  # Ensure target is float for regression
+        else:
+            raise ValueError(f"Invalid task type: {self.task_type}")
+
+        return X, y
+
     def train_test_splitting(self, test_size=0.2, random_state=42):
         """
         Splits the dataset into training and testing sets.
 
         :param test_size: A float representing the proportion of the dataset to include in the test split. Default is 0.2.
         :param random_state: An integer seed for reproducibility of the split. Default is 42.
-        :return: 
+        :return: (numpy arrays, or CSR feature matrices, for a ColumnarDataset)
             - X_train: A list of lists representing the training feature matrix.
             - X_test: A list of lists representing the testing feature matrix.
             - y_train: A list representing the training target vector.
             - y_test: A list representing the testing target vector.
         """
-        X, y = self.split_features_and_target()
-        return train_test_split(X, y, test_size=test_size, random_state=random_state)
\ No newline at end of file
+        if not isinstance(self.data, ColumnarDataset):
+            X, y = self.split_features_and_target()
+            return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+        # Build the matrix with the training rows first and the test rows after them; both sets are
+        # views of that matrix rather than copies
+        train, test = self.split_rows(len(self.data), test_size, random_state)
+        X, y = self._split_dataset(np.concatenate([train, test]))
+        return X[:len(train)], X[len(train):], y[:len(train)], y[len(train):]
+
+    @staticmethod
+    def split_rows(n_rows, test_size=0.2, random_state=42):
+        """
+        Draws the row indices of a train/test split, the same split as train_test_split.
+
+        :param n_rows: The number of rows.
+        :param test_size: A float representing the proportion of the rows to include in the test split. Default is 0.2.
+        :param random_state: An integer seed for reproducibility of the split. Default is 42.
+        :return: A tuple (train, test) of arrays of row indices.
+        """
+        shuffle = ShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+        return next(shuffle.split(np.empty((n_rows, 0))))
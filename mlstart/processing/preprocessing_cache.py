@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from mlstart.core.dataset_cache import DatasetCache
+
+# Default largest total size of the cached preprocessing results, in bytes
+DEFAULT_MAX_BYTES = 2 << 30
+
+
+class PreprocessingCache:
+    """
+    An on-disk cache of preprocessing results, so that reruns on the same data and configuration skip
+    the preprocessing steps.
+
+    An entry is keyed by a fingerprint of the input data, the task type, the column lists and the
+    step configuration (see `key`). It stores the preprocessed dataset as .npy files (see
+    DatasetCache.write_dataset), read back with memory mapping, together with the fitted state of
+    the pipeline. When the entries grow beyond `max_bytes`, the least recently used ones are removed.
+    """
+
+    def __init__(self, cache_dir=".mlstart_cache/preprocessed", max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize the PreprocessingCache.
+
+        :param cache_dir: The directory in which cache entries are stored. Created if needed.
+        :param max_bytes: The largest total size of the entries, in bytes. Default is DEFAULT_MAX_BYTES.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(fingerprint, task_type, numeric_columns, categorical_columns, hashed_columns, config):
+        """
+        Build the key of a preprocessing result.
+
+        :param fingerprint: A string identifying the input data (see `fingerprint_dataset`).
+        :param task_type: A string indicating the task type ('classification' or 'regression').
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param hashed_columns: A list of categorical columns encoded by feature hashing.
+        :param config: A JSON-serializable dictionary of the step configuration.
+        :return: A hexadecimal string.
+        """
+        content = json.dumps([fingerprint, task_type, list(numeric_columns), list(categorical_columns),
+                              list(hashed_columns), config], sort_keys=True)
+        return hashlib.blake2b(content.encode(), digest_size=20).hexdigest()
+
+    @staticmethod
+    def fingerprint_dataset(data):
+        """
+        Compute a fingerprint of the content of a ColumnarDataset: a hash of the names, dtypes, values,
+        masks and categories of its columns. Use the fingerprint of the source file instead when it is
+        known (see DatasetCache.fingerprint), which avoids reading the data.
+
+        :param data: A ColumnarDataset.
+        :return: A hexadecimal string.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for name in data.headers:
+            values = data.columns[name]
+            digest.update(json.dumps([name, values.dtype.str, len(values)]).encode())
+            if values.dtype == object:
+                digest.update(json.dumps(values.tolist(), default=str).encode())
+            else:
+                digest.update(np.ascontiguousarray(values).data)
+            digest.update(np.ascontiguousarray(data.masks[name]).data)
+            if name in data.categories:
+                digest.update(json.dumps(data.categories[name].tolist(), default=str).encode())
+        return digest.hexdigest()
+
+    def load(self, key):
+        """
+        Load a cached preprocessing result, marking it as recently used.
+
+        :param key: The key returned by `key`.
+        :return: A tuple (dataset, state) of the preprocessed ColumnarDataset (memory-mapped) and the
+                 fitted state of the pipeline, or None if there is no entry for the key.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(entry_dir, "manifest.json")
+        try:
+            with open(manifest_path) as file:
+                manifest = json.load(file)
+            dataset = DatasetCache.read_dataset(entry_dir, manifest)
+            os.utime(manifest_path)
+        except (OSError, ValueError):
+            return None
+
+        for name in manifest["one_hot_columns"]:
+            if name in manifest["integer_categories"]:
+                dataset.categories[name] = dataset.categories[name].astype(np.int64)
+            dataset.one_hot_columns.add(name)
+        return dataset, manifest["state"]
+
+    def store(self, key, dataset, state):
+        """
+        Store a preprocessing result, then remove the least recently used entries beyond `max_bytes`.
+
+        The entry is written to a temporary directory and moved into place in one step, so readers
+        never see a partially written entry.
+
+        :param key: The key returned by `key`.
+        :param dataset: The preprocessed ColumnarDataset.
+        :param state: The fitted state of the pipeline (a JSON-serializable dictionary, or None).
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.isdir(entry_dir):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            manifest = DatasetCache.write_dataset(temp_dir, dataset)
+            # One-hot columns are stored as dictionary codes; hashed columns have integer buckets
+            manifest["one_hot_columns"] = [name for name in dataset.headers if name in dataset.one_hot_columns]
+            manifest["integer_categories"] = [name for name in manifest["one_hot_columns"]
+                                              if dataset.categories[name].dtype.kind in "iu"]
+            manifest["state"] = state
+            manifest["size"] = sum(os.path.getsize(os.path.join(temp_dir, name)) for name in os.listdir(temp_dir))
+            with open(os.path.join(temp_dir, "manifest.json"), "w") as file:
+                json.dump(manifest, file)
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the total size is at most `max_bytes`.
+
+        :return: The list of removed keys.
+        """
+        entries = []
+        for key in os.listdir(self.cache_dir) if os.path.isdir(self.cache_dir) else ():
+            manifest_path = os.path.join(self.cache_dir, key, "manifest.json")
+            try:
+                with open(manifest_path) as file:
+                    size = json.load(file)["size"]
+                entries.append((os.path.getmtime(manifest_path), key, size))
+            except (OSError, ValueError, KeyError):
+                continue
+
+        total = sum(size for _, _, size in entries)
+        removed = []
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+        return removed
@@ -0,0 +1,332 @@
+import math
+import numpy as np
+from mlstart.core.dataset import to_float64
+from mlstart.preprocessors.handle_outliers import HandleOutliers
+from mlstart.preprocessors.hash_categorical import DEFAULT_BUCKETS, HashCategorical
+from mlstart.preprocessors.remove_duplicates import RemoveDuplicates
+from mlstart.processing.accumulators import MeanVariance, QuantileSketch, ValueCounts, merge_accumulators
+from mlstart.processing.column_executor import ColumnExecutor, update_accumulator
+
+# Preprocessing steps in their default order
+DEFAULT_STEPS = (
+    "remove_invalid_columns",
+    "normalize_missing_values",
+    "handle_missing_values",
+    "encode_categorical",
+    "scale_numeric",
+    "remove_duplicates",
+    "handle_outliers",
+)
+
+
+class PreprocessingPlan:
+    """
+    A compiled form of the preprocessing steps that runs in two scans over columnar data.
+
+    The configured steps are reduced to the statistics they need (means and standard deviations,
+    modes, category sets and outlier bounds) and to one transform per column. `fit` gathers every
+    statistic in a single scan over the data, and `transform` applies duplicate removal, imputation,
+    scaling, outlier filtering and encoding in one more scan, dropping rows before the categorical
+    columns are expanded. Both work batch by batch, so the same plan serves in-memory datasets
+    (a single batch) and streamed files.
+
+    Duplicate rows are found on the prepared values, before imputation and scaling, by hashing the
+    rows in bulk (see RemoveDuplicates). Outlier bounds are fitted on all rows before duplicates are
+    removed, whereas the sequential steps fit them on the rows left after duplicate removal.
+
+    The statistics and transforms of different columns are independent, so with a ColumnExecutor
+    they run in parallel, one task per column; the results are applied in column order.
+    """
+
+    def __init__(self, task_type, numeric_columns, categorical_columns, steps=DEFAULT_STEPS, sparse=False,
+                 hashed_columns=(), n_buckets=DEFAULT_BUCKETS, clip_outliers=False, quantile_error=None,
+                 executor=None, mode_capacity=None):
+        """
+        Compile the preprocessing steps for a set of columns.
+
+        :param task_type: A string indicating the task type ('classification' or 'regression').
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param steps: The names of the steps to run (see DEFAULT_STEPS). Outlier handling only applies
+                      to regression tasks.
+        :param sparse: If True, one-hot encoded columns are kept as sparse indicator blocks (see
+                       EncodeCategorical.transform).
+        :param hashed_columns: Categorical columns to encode by feature hashing (see HashCategorical)
+                               instead of a vocabulary. Hashed columns need no category counts: their
+                               missing values are left without an indicator rather than imputed.
+        :param n_buckets: The number of hash buckets per hashed column.
+        :param clip_outliers: If True, values outside the outlier bounds are clipped to the bounds instead
+                              of their rows being removed.
+        :param quantile_error: The rank error of the quantile sketches the outlier bounds are fitted
+                               from (see QuantileSketch), or None (default) for exact quartiles, which
+                               keeps every numeric value in memory while fitting.
+        :param executor: A ColumnExecutor running the per-column work in parallel (optional, by default
+                         the columns are processed one after another).
+        :param mode_capacity: The number of distinct values tracked per categorical column to find its
+                              mode (see ValueCounts), or None (default) to count every value exactly. It only
+                              applies without the 'encode_categorical' step, since the vocabulary of an
+                              encoded column needs all of its categories.
+        :raises ValueError: If a step name is unknown.
+        """
+        unknown = [step for step in steps if step not in DEFAULT_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {unknown}")
+
+        self.task_type = task_type
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.remove_invalid = "remove_invalid_columns" in steps
+        self.normalize = "normalize_missing_values" in steps
+        self.impute = "handle_missing_values" in steps
+        self.encode = "encode_categorical" in steps
+        self.scale = "scale_numeric" in steps
+        self.deduplicate = "remove_duplicates" in steps
+        self.filter_outliers = "handle_outliers" in steps and task_type == "regression"
+        self.clip_outliers = clip_outliers
+        self.quantile_error = quantile_error
+        self.mode_capacity = None if self.encode else mode_capacity
+        self.sparse = sparse
+        self.hashed_columns = [column for column in hashed_columns if column in self.categorical_columns] \
+            if self.encode else []
+        self.n_buckets = n_buckets
+        self.executor = executor or ColumnExecutor()
+        # Categorical columns encoded (and imputed) through a vocabulary of their categories
+        self.vocabulary_columns = [column for column in self.categorical_columns if column not in self.hashed_columns]
+
+    def prepare(self, batch):
+        """
+        Apply the stateless steps (invalid column removal and missing value normalization) to a batch.
+
+        :param batch: A ColumnarDataset.
+        :return: The prepared ColumnarDataset.
+        """
+        from mlstart.preprocessors.remove_invalid_columns import RemoveInvalidColumns
+        from mlstart.preprocessors.normalize_missing_values import NormalizeMissingValues
+
+        if self.remove_invalid:
+            batch = RemoveInvalidColumns.process(batch)
+        if self.normalize:
+            batch = NormalizeMissingValues.process(batch, self.numeric_columns, self.categorical_columns)
+        return batch
+
+    def fit(self, batches):
+        """
+        Gather the statistics of every column in one scan over prepared batches.
+
+        Each batch is added to streaming accumulators (see `accumulate`), so the result does not
+        depend on how the data is split into batches.
+
+        :param batches: An iterable of prepared ColumnarDataset batches.
+        :return: A JSON-serializable state dictionary keyed by step name, holding for each fitted step
+                 the same state as the step's own `fit` ('handle_missing_values', 'encode_categorical',
+                 'scale_numeric' and 'handle_outliers').
+        """
+        accumulators = None
+        for batch in batches:
+            accumulators = self.accumulate(batch, accumulators)
+        return self.finalize(accumulators or self.accumulate(None))
+
+    def accumulate(self, batch, accumulators=None):
+        """
+        Add one prepared batch to the accumulators of the plan: a MeanVariance per numeric column, a
+        ValueCounts per vocabulary column and, when outliers are handled, a QuantileSketch per numeric
+        column. Accumulators of consecutive parts of the data, for example filled in
+        different processes, can be merged with `merge` and then turned into a state by `finalize`.
+
+        :param batch: A prepared ColumnarDataset batch, or None to only create empty accumulators.
+        :param accumulators: The accumulators returned for earlier batches (optional).
+        :return: The updated accumulators.
+        """
+        if accumulators is None:
+            accumulators = {
+                "numeric": {column: MeanVariance() for column in self.numeric_columns},
+                "categorical": {column: ValueCounts(self.mode_capacity) for column in self.vocabulary_columns},
+                "quantiles": {column: QuantileSketch(self.quantile_error) for column in self.numeric_columns}
+                if self.filter_outliers else {},
+            }
+        if batch is None:
+            return accumulators
+
+        # One task per accumulator; each updates its own accumulator, so the tasks can run in parallel
+        tasks = []
+        for kind in ("numeric", "quantiles"):
+            for column, accumulator in accumulators[kind].items():
+                tasks.append(((kind, column), (accumulator, batch.columns[column], batch.masks[column])))
+        for column, counter in accumulators["categorical"].items():
+            tasks.append((("categorical", column),
+                          (counter, batch.columns[column], batch.masks[column], batch.categories.get(column))))
+        python_bound = self.executor.python_bound_columns(batch, [column for (_, column), _ in tasks])
+        updated = self.executor.map(update_accumulator, [arguments for _, arguments in tasks], python_bound)
+        for ((kind, column), _), accumulator in zip(tasks, updated):
+            accumulators[kind][column] = accumulator
+        return accumulators
+
+    @staticmethod
+    def merge(accumulators, other):
+        """
+        Merge the accumulators of a later part of the data into those of an earlier part.
+
+        :param accumulators: Accumulators returned by `accumulate`.
+        :param other: Accumulators returned by `accumulate` for the data that follows.
+        :return: The merged `accumulators`.
+        """
+        merge_accumulators(accumulators["numeric"], other["numeric"])
+        merge_accumulators(accumulators["categorical"], other["categorical"])
+        merge_accumulators(accumulators["quantiles"], other["quantiles"])
+        return accumulators
+
+    def finalize(self, accumulators):
+        """
+        Build the state of every fitted step from accumulators.
+
+        :param accumulators: Accumulators returned by `accumulate` (and `merge`).
+        :return: The state dictionary described in `fit`.
+        """
+        means = {}
+        stds = {}
+        bounds = {}
+        for column, accumulator in accumulators["numeric"].items():
+            # Imputed values equal the mean, so they add rows but no squared deviation
+            n_rows = accumulator.count + accumulator.missing if self.impute else accumulator.count
+            means[column] = accumulator.get_mean()
+            stds[column] = accumulator.get_std(n_rows)
+            if self.filter_outliers:
+                bounds[column] = self._outlier_bounds(accumulators["quantiles"][column], means[column], stds[column],
+                                                      accumulator.missing)
+
+        counters = accumulators["categorical"]
+        state = {}
+        if self.impute:
+            state["handle_missing_values"] = {
+                "means": means,
+                "modes": {column: counter.get_mode() for column, counter in counters.items()},
+            }
+        if self.encode:
+            state["encode_categorical"] = {
+                "categories": {column: counter.values() for column, counter in counters.items()},
+            }
+        if self.hashed_columns:
+            state["hash_categorical"] = {"columns": self.hashed_columns, "n_buckets": self.n_buckets}
+        if self.scale:
+            state["scale_numeric"] = {"means": means, "stds": stds}
+        if self.filter_outliers:
+            state["handle_outliers"] = {"bounds": bounds}
+        return state
+
+    def transform(self, batch, state, seen=None, filter_rows=True):
+        """
+        Transform one prepared batch with a fitted state in a single scan.
+
+        :param batch: A prepared ColumnarDataset batch.
+        :param state: The state returned by `fit`.
+        :param seen: A SeenRows holding the rows already emitted, shared between the batches of one run
+                     so that duplicates are removed across batches (optional).
+        :param filter_rows: If False, duplicate and outlier rows are kept, so that every input row
+                            has an output row (as needed to score new data).
+        :return: The preprocessed ColumnarDataset batch.
+        """
+        imputation = state.get("handle_missing_values")
+        scaling = state.get("scale_numeric")
+
+        # Remove duplicate rows first, found on the values as loaded before any arithmetic on them
+        if self.deduplicate and filter_rows:
+            keep = RemoveDuplicates.first_occurrences(batch) if seen is None else seen.filter(batch)
+            batch = batch if keep.all() else batch.take(keep)
+
+        # Impute and scale numeric columns
+        columns = self.numeric_columns if imputation or scaling else []
+        tasks = [(batch.columns[column], batch.masks[column],
+                  imputation["means"][column] if imputation else None,
+                  (scaling["means"][column], scaling["stds"][column]) if scaling else None)
+                 for column in columns]
+        for column, (values, mask) in zip(columns, self.executor.map(self._transform_numeric, tasks)):
+            batch.set_column(column, values, mask)
+
+        bounds = [state["handle_outliers"]["bounds"][column] for column in self.numeric_columns] \
+            if self.filter_outliers else []
+        tasks = [(batch.columns[column], *column_bounds) for column, column_bounds in zip(self.numeric_columns, bounds)]
+        if self.filter_outliers and self.clip_outliers:
+            # Clip the values to the bounds; every row is kept
+            for column, values in zip(self.numeric_columns, self.executor.map(HandleOutliers.clip, tasks)):
+                batch.set_column(column, values, batch.masks[column])
+        elif self.filter_outliers and filter_rows:
+            # Or remove rows outside the fitted outlier bounds, before categorical columns are expanded
+            keep = np.ones(len(batch), dtype=bool)
+            for within in self.executor.map(HandleOutliers.within_bounds, tasks):
+                keep &= within
+            batch = batch if keep.all() else batch.take(keep)
+
+        # Impute and encode categorical columns of the rows that are kept
+        from mlstart.preprocessors.encode_categorical import EncodeCategorical
+
+        columns = self.vocabulary_columns
+        tasks = [(batch.select([column]), column,
+                  state["encode_categorical"]["categories"][column] if self.encode else None,
+                  imputation["modes"][column] if imputation else None,
+                  self.task_type, self.sparse)
+                 for column in columns]
+        encoded = self.executor.map(self._transform_categorical, tasks,
+                                    self.executor.python_bound_columns(batch, columns))
+        for column, assignments in zip(columns, encoded):
+            EncodeCategorical.apply(batch, column, assignments)
+        if self.hashed_columns:
+            n_buckets = state["hash_categorical"]["n_buckets"]
+            HashCategorical.transform(batch, {"columns": self.hashed_columns, "n_buckets": n_buckets}, self.executor)
+        return batch
+
+    @staticmethod
+    def _transform_numeric(values, mask, mean, scaling):
+        """
+        Impute (with the mean, unless it is None) and scale (with the (mean, std) pair `scaling`,
+        unless it is None) one numeric column, in float64.
+        """
+        values = to_float64(values)
+        if mean is not None:
+            values = np.where(mask, mean, values)
+            mask = None
+        if scaling is not None:
+            values = PreprocessingPlan._scale(values, *scaling)
+        return values, mask
+
+    @staticmethod
+    def _transform_categorical(batch, column, categories, mode, task_type, sparse):
+        """
+        Impute and encode one categorical column of a batch. Values missing from the fitted
+        categories are treated as missing. Returns the column assignments (see
+        EncodeCategorical.encode_column).
+        """
+        from mlstart.preprocessors.encode_categorical import EncodeCategorical
+
+        if categories is None:
+            if mode is not None and batch.masks[column].any():
+                return [(column, np.where(batch.masks[column], mode, batch.decode(column)))]
+            return []
+        if not len(categories):
+            return []
+        return EncodeCategorical.encode_column(batch, column, categories, mode, task_type, sparse)
+
+    def _outlier_bounds(self, sketch, mean, std, missing):
+        """
+        Compute the outlier bounds of a numeric column from the quantile sketch of its present values.
+
+        Imputation and scaling do not change the order of the values, so the quartiles of the
+        transformed column are the transformed quartiles (with the imputed means added to the sketch).
+        """
+        if self.impute and missing:
+            sketch = sketch.copy()
+            sketch.add_repeated(mean, missing)
+        if not sketch.count:
+            return [-math.inf, math.inf]
+        quartiles = np.array(sketch.quantiles([0.25, 0.75]))
+        if self.scale:
+            quartiles = self._scale(quartiles, mean, std)
+        return HandleOutliers.quartile_bounds(*quartiles.tolist())
+
+    @staticmethod
+    def _scale(values, mean, std):
+        """
+        Applies Z-score scaling with fitted statistics.
+        """
+        if std == 0:
+            return np.zeros(len(values))
+        return (values - mean) / std
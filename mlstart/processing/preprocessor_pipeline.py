@@ -1,24 +1,203 @@
+import hashlib
+import json
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.preprocessors.hash_categorical import DEFAULT_BUCKETS
+from mlstart.preprocessors.remove_duplicates import SeenRows
+from mlstart.processing.accumulators import DEFAULT_QUANTILE_ERROR
+from mlstart.processing.column_executor import ColumnExecutor
+from mlstart.processing.preprocessing_plan import DEFAULT_STEPS, PreprocessingPlan
+from mlstart.processing.step_planner import StepPlan, StepPlanner
+
 class PreprocessorPipeline:
     """
     Orchestrates the preprocessing pipeline.
     """
 
-    def __init__(self, task_type):
+    def __init__(self, task_type, steps=DEFAULT_STEPS, fused=True, sparse=False, n_buckets=DEFAULT_BUCKETS,
+                 clip_outliers=False, quantile_error=DEFAULT_QUANTILE_ERROR, reorder=True, workers=None, executor=None,
+                 mode_capacity=None):
         """
         Initializes the PreprocessorPipeline class.
 
         :param task_type: A string indicating the task type ('classification' or 'regression').
+        :param steps: The names of the preprocessing steps to run, in order (see DEFAULT_STEPS).
+        :param fused: If True (default), columnar datasets are preprocessed by a compiled
+                      PreprocessingPlan in two scans instead of running the steps one after another.
+        :param sparse: If True, one-hot encoded columns of columnar datasets are kept as sparse
+                       indicator blocks, which DataHandler turns into a CSR feature matrix.
+        :param n_buckets: The number of hash buckets for each column encoded by feature hashing.
+        :param clip_outliers: If True, outlier handling clips values to the IQR bounds instead of removing
+                              rows.
+        :param quantile_error: The rank error of the quantile sketches that outlier bounds are fitted from
+                               in `run_batches` (see QuantileSketch), so that streamed columns need not fit
+                               in memory. None fits exact quartiles. In-memory datasets always get exact
+                               quartiles.
+        :param reorder: If True (default), the sequential steps on a ColumnarDataset run in the order chosen
+                        by a StepPlanner, which removes duplicate and outlier rows before encoding and
+                        scaling where that gives the same result.
+        :param workers: The number of workers the per-column statistics and transforms are spread over
+                        (see ColumnExecutor): numeric columns run on threads, since NumPy releases the
+                        GIL, and object columns on processes. By default columns are processed one after
+                        another.
+        :param executor: A concurrent.futures executor to run the per-column work on instead (optional).
+        :param mode_capacity: The number of distinct values tracked per categorical column to find the mode it
+                              is imputed with (see ValueCounts), which bounds the memory of high-cardinality
+                              columns at the cost of an approximate mode when the top counts are close. None
+                              (default) counts every value exactly. The fused plan only applies it without
+                              the 'encode_categorical' step, whose vocabulary needs every category.
         """
         self.task_type = task_type
+        self.steps = tuple(steps)
+        self.fused = fused
+        self.sparse = sparse
+        self.n_buckets = n_buckets
+        self.clip_outliers = clip_outliers
+        self.quantile_error = quantile_error
+        self.reorder = reorder
+        self.workers = workers
+        self.executor = executor
+        self.mode_capacity = mode_capacity
+        self.state = None
+        self.step_plan = None
+
+    def compile(self, numeric_columns, categorical_columns, hashed_columns=(), quantile_error=None,
+                column_executor=None):
+        """
+        Compiles the configured steps into a two-scan preprocessing plan.
+
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param hashed_columns: Categorical columns to encode by feature hashing instead of a vocabulary
+                               (optional, see HashCategorical).
+        :param quantile_error: The rank error of the outlier quantile sketches, or None (default) for exact
+                               quartiles.
+        :param column_executor: The ColumnExecutor of the plan (optional, see `column_executor`).
+        :return: A PreprocessingPlan.
+        """
+        return PreprocessingPlan(self.task_type, numeric_columns, categorical_columns, self.steps, self.sparse,
+                                 hashed_columns, self.n_buckets, self.clip_outliers, quantile_error,
+                                 column_executor, self.mode_capacity)
+
+    def column_executor(self):
+        """
+        Creates the ColumnExecutor for one run, which the caller closes once the run is over.
 
-    def run(self, data, numeric_columns, categorical_columns):
+        :return: A ColumnExecutor configured with `workers` and `executor`.
         """
-        Executes the preprocessing pipeline in a sequential manner.
+        return ColumnExecutor(self.workers, self.executor)
 
-        :param data: A list of dictionaries representing the dataset.
+    def run(self, data, numeric_columns, categorical_columns, hashed_columns=(), cache=None, fingerprint=None):
+        """
+        Executes the preprocessing pipeline.
+
+        A ColumnarDataset is preprocessed by the fused plan (see `compile`) unless `fused` is off;
+        a list of row dictionaries always runs the steps in a sequential manner. The fused plan
+        keeps its fitted state in `state`, so the same preprocessing can later be applied to new
+        data with `transform`. The order of the sequential steps is kept in `step_plan` (see
+        `explain`).
+
+        With a cache, the result for a ColumnarDataset is looked up by the fingerprint of the data,
+        the task type, the column lists and the step configuration. On a hit the cached dataset is
+        returned and its fitted state restored in `state`, without running any step; otherwise the
+        result is stored in the cache.
+
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
         :param numeric_columns: A list of column names identified as numeric.
         :param categorical_columns: A list of column names identified as categorical.
-        :return: A preprocessed dataset as a list of dictionaries.
+        :param hashed_columns: Categorical columns to encode by feature hashing instead of a vocabulary
+                               (optional, see HashCategorical).
+        :param cache: A PreprocessingCache (optional, only used for a ColumnarDataset).
+        :param fingerprint: A string identifying the data, such as the fingerprint of its source file
+                            together with the loading options (optional, by default the content of the
+                            dataset is hashed, see PreprocessingCache.fingerprint_dataset).
+        :return: A preprocessed dataset, in the same representation as the input.
+        """
+        if cache is None or not isinstance(data, ColumnarDataset):
+            return self._run(data, numeric_columns, categorical_columns, hashed_columns)
+
+        key = cache.key(fingerprint or cache.fingerprint_dataset(data), self.task_type, numeric_columns,
+                        categorical_columns, hashed_columns, self._config())
+        cached = cache.load(key)
+        if cached is not None:
+            data, self.state = cached
+            return data
+        data = self._run(data, numeric_columns, categorical_columns, hashed_columns)
+        cache.store(key, data, self.state if self.fused else None)
+        return data
+
+    def run_split(self, data, train_rows, test_rows, numeric_columns, categorical_columns, hashed_columns=(),
+                  cache=None, fingerprint=None, target_column=None):
+        """
+        Preprocesses a train/test split of a ColumnarDataset without letting the test rows leak into
+        training. The steps are fitted on the training rows only, which are preprocessed as in `run`
+        (duplicate and outlier rows are removed), and then applied to the test rows with `transform`,
+        which keeps every test row unless `target_column` is given.
+
+        :param data: A ColumnarDataset.
+        :param train_rows: An array of the indices of the training rows.
+        :param test_rows: An array of the indices of the test rows.
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param hashed_columns: Categorical columns to encode by feature hashing instead of a vocabulary
+                               (optional, see HashCategorical).
+        :param cache: A PreprocessingCache for the preprocessed training rows (optional, see `run`).
+        :param fingerprint: A string identifying `data` (optional, see `run`). The training rows are
+                            added to it, so that each split has its own cache entry.
+        :param target_column: The name of the target column (optional). Test rows whose target cannot be
+                              encoded are dropped (see `labelled_rows`) instead of being imputed.
+        :return: A tuple (train, test) of preprocessed ColumnarDatasets.
+        :raises ValueError: If the pipeline is not fused, so it cannot be applied to the test rows.
+        """
+        if not self.fused:
+            raise ValueError("A train/test split requires a fused preprocessing pipeline.")
+        if fingerprint is not None:
+            rows_digest = hashlib.blake2b(np.asarray(train_rows, dtype=np.int64).tobytes(), digest_size=20)
+            fingerprint = json.dumps([fingerprint, "train_rows", rows_digest.hexdigest()])
+        train = self.run(data.take(train_rows), numeric_columns, categorical_columns, hashed_columns, cache,
+                         fingerprint)
+        test = data.take(test_rows)
+        if target_column is not None:
+            test = test.take(self.labelled_rows(test, target_column))
+        return train, self.transform(test)
+
+    def labelled_rows(self, data, target_column):
+        """
+        Finds the rows of a dataset whose target value the fitted pipeline can encode. The target of
+        the other rows is missing or, for a categorical target, a class that was not seen while fitting;
+        `transform` would impute it, giving those rows a label they do not have.
+
+        :param data: A ColumnarDataset (before preprocessing).
+        :param target_column: The name of the target column.
+        :return: A boolean numpy array that is True for the rows to keep.
+        :raises ValueError: If the pipeline has not been fitted.
+        """
+        if self.state is None:
+            raise ValueError("The preprocessing pipeline has not been fitted.")
+        keep = ~data.masks[target_column]
+        categories = self.state["steps_state"].get("encode_categorical", {}).get("categories", {}).get(target_column)
+        if categories is None:
+            return keep
+        fitted = set(categories)
+        if target_column in data.categories:
+            known = np.array([category in fitted for category in data.categories[target_column]] + [False])
+            return keep & known[np.where(keep, data.columns[target_column], -1)]
+        return keep & np.array([value in fitted for value in data.decode(target_column)], dtype=bool)
+
+    def _run(self, data, numeric_columns, categorical_columns, hashed_columns):
+        """
+        Runs the fused plan or the sequential steps (see `run`).
+        """
+        with self.column_executor() as executor:
+            if self.fused and isinstance(data, ColumnarDataset):
+                plan = self.compile(numeric_columns, categorical_columns, hashed_columns, column_executor=executor)
+                data = plan.prepare(data)
+                return plan.transform(data, self._set_state(plan, plan.fit([data])))
+            return self._run_steps(data, numeric_columns, categorical_columns, hashed_columns, executor)
+
+    def _run_steps(self, data, numeric_columns, categorical_columns, hashed_columns, executor):
+        """
+        Runs the steps one after another, in the order chosen by the StepPlanner (see `run`).
         """
         from mlstart.preprocessors.remove_invalid_columns import RemoveInvalidColumns
         from mlstart.preprocessors.normalize_missing_values import NormalizeMissingValues
@@ -27,14 +206,198 @@ class PreprocessorPipeline:
         from mlstart.preprocessors.scale_numeric import ScaleNumeric
         from mlstart.preprocessors.remove_duplicates import RemoveDuplicates
         from mlstart.preprocessors.handle_outliers import HandleOutliers
+        from mlstart.preprocessors.hash_categorical import HashCategorical
 
-        data = RemoveInvalidColumns.process(data)
-        data = NormalizeMissingValues.process(data, numeric_columns,categorical_columns)
-        data = HandleMissingValues.process(data, numeric_columns, categorical_columns)
-        data = EncodeCategorical.process(data, categorical_columns, self.task_type)
-        data = ScaleNumeric.process(data, numeric_columns)
-        data = RemoveDuplicates.process(data)
-        if self.task_type == "regression":
-            data = HandleOutliers.process(data, numeric_columns)
+        # Hashed columns are encoded without a vocabulary, so they are not imputed with a mode either
+        if "encode_categorical" in self.steps:
+            hashed_columns = [column for column in hashed_columns if column in categorical_columns]
+        else:
+            hashed_columns = []
+        vocabulary_columns = [column for column in categorical_columns if column not in hashed_columns]
+
+        planner = StepPlanner(self.task_type, self.steps, hashed_columns, self.clip_outliers)
+        if self.reorder:
+            self.step_plan = planner.plan(data, numeric_columns, categorical_columns)
+        else:
+            self.step_plan = StepPlan([("run", step) for step in planner.steps])
+
+        states = {}
+        for kind, step in self.step_plan.operations:
+            if kind == "fit":
+                if step == "encode_categorical":
+                    states[step] = EncodeCategorical.fit(data, vocabulary_columns, executor)
+                elif step == "scale_numeric":
+                    states[step] = ScaleNumeric.fit(data, numeric_columns, executor)
+            elif kind == "transform":
+                if step == "encode_categorical":
+                    data = EncodeCategorical.transform(data, states[step], self.task_type, self.sparse, executor)
+                    if hashed_columns:
+                        data = HashCategorical.process(data, hashed_columns, self.n_buckets, executor)
+                elif step == "scale_numeric":
+                    data = ScaleNumeric.transform(data, states[step], executor)
+            elif step == "remove_invalid_columns":
+                data = RemoveInvalidColumns.process(data)
+            elif step == "normalize_missing_values":
+                data = NormalizeMissingValues.process(data, numeric_columns, categorical_columns)
+            elif step == "handle_missing_values":
+                data = HandleMissingValues.process(data, numeric_columns, vocabulary_columns, executor,
+                                                   self.mode_capacity)
+            elif step == "encode_categorical":
+                data = EncodeCategorical.process(data, vocabulary_columns, self.task_type, self.sparse, executor)
+                if hashed_columns:
+                    data = HashCategorical.process(data, hashed_columns, self.n_buckets, executor)
+            elif step == "scale_numeric":
+                data = ScaleNumeric.process(data, numeric_columns, executor)
+            elif step == "remove_duplicates":
+                data = RemoveDuplicates.process(data)
+            elif step == "handle_outliers" and self.task_type == "regression":
+                data = HandleOutliers.process(data, numeric_columns, self.clip_outliers, executor)
 
         return data
+
+    def explain(self, data, numeric_columns, categorical_columns, hashed_columns=()):
+        """
+        Describes the order in which `run` would apply the steps to a dataset, with the estimated
+        cost of that order and of the configured one (see StepPlanner).
+
+        :param data: A ColumnarDataset or a list of dictionaries representing the dataset.
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param hashed_columns: Categorical columns to encode by feature hashing (optional).
+        :return: A multi-line string describing the plan.
+        """
+        planner = StepPlanner(self.task_type, self.steps, hashed_columns, self.clip_outliers)
+        if self.fused and isinstance(data, ColumnarDataset):
+            return planner.plan_fused(data, numeric_columns, categorical_columns).report()
+        if not self.reorder:
+            return StepPlan([("run", step) for step in planner.steps]).report()
+        return planner.plan(data, numeric_columns, categorical_columns).report()
+
+    def run_batches(self, batch_source, numeric_columns, categorical_columns, hashed_columns=()):
+        """
+        Executes the preprocessing pipeline over a stream of batches in two passes, so that only one
+        batch is held in memory at a time.
+
+        The first pass fits every statistic the steps need (means, standard deviations, modes,
+        category sets and outlier bounds); the second pass transforms each batch with those
+        statistics (see PreprocessingPlan). Outlier bounds are fitted from quantile sketches with a
+        rank error of `quantile_error`, so no column is held in memory; otherwise the results match
+        the fused `run` (exactly so for streams shorter than the sketch capacity, or with
+        `quantile_error=None`).
+
+        :param batch_source: A callable returning a new iterator over ColumnarDataset batches, for
+                             example ``lambda: loader.iter_batches(10000)``. It is called once per pass.
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param hashed_columns: Categorical columns to encode by feature hashing instead of a vocabulary
+                               (optional, see HashCategorical).
+        :return: A generator yielding preprocessed ColumnarDataset batches.
+        """
+        executor = self.column_executor()
+        seen = SeenRows()  # Rows already emitted, used to drop duplicates across batches
+        try:
+            plan = self.compile(numeric_columns, categorical_columns, hashed_columns, self.quantile_error, executor)
+            state = self._set_state(plan, plan.fit(plan.prepare(batch) for batch in batch_source()))
+            for batch in batch_source():
+                yield plan.transform(plan.prepare(batch), state, seen)
+        finally:
+            seen.close()
+            executor.close()
+
+    def fit(self, data, numeric_columns, categorical_columns, hashed_columns=()):
+        """
+        Fits the preprocessing steps on a dataset without transforming it. The fitted state (means,
+        standard deviations, modes, category sets and outlier bounds) is kept in `state`.
+
+        :param data: A ColumnarDataset.
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :param hashed_columns: Categorical columns to encode by feature hashing instead of a vocabulary
+                               (optional, see HashCategorical).
+        :return: The fitted state, a JSON-serializable dictionary.
+        """
+        with self.column_executor() as executor:
+            plan = self.compile(numeric_columns, categorical_columns, hashed_columns, column_executor=executor)
+            self._set_state(plan, plan.fit([plan.prepare(data.copy())]))
+        return self.state
+
+    def transform(self, data, filter_rows=False):
+        """
+        Applies the fitted preprocessing to a dataset, for example new data to be scored. Columns of
+        the fitted state that are missing from the data (such as the target) are skipped, and
+        categories that were not seen while fitting are treated as missing values.
+
+        :param data: A ColumnarDataset.
+        :param filter_rows: If True, duplicate and outlier rows are removed as in `run`. By default every
+                            input row is kept, so the output rows line up with the input rows.
+        :return: The preprocessed ColumnarDataset.
+        :raises ValueError: If the pipeline has not been fitted.
+        """
+        if self.state is None:
+            raise ValueError("The preprocessing pipeline has not been fitted.")
+        with self.column_executor() as executor:
+            plan = self.compile(
+                [column for column in self.state["numeric_columns"] if column in data.columns],
+                [column for column in self.state["categorical_columns"] if column in data.columns],
+                [column for column in self.state["hashed_columns"] if column in data.columns],
+                column_executor=executor,
+            )
+            return plan.transform(plan.prepare(data), self.state["steps_state"], filter_rows=filter_rows)
+
+    def save_state(self, file_path):
+        """
+        Saves the fitted state to a JSON file.
+
+        :param file_path: The path of the JSON file to write.
+        :raises ValueError: If the pipeline has not been fitted.
+        """
+        if self.state is None:
+            raise ValueError("The preprocessing pipeline has not been fitted.")
+        with open(file_path, "w") as file:
+            json.dump(self.state, file, indent=2)
+
+    @classmethod
+    def load_state(cls, file_path):
+        """
+        Creates a fitted PreprocessorPipeline from a state file written by `save_state`.
+
+        :param file_path: The path of the JSON state file.
+        :return: A PreprocessorPipeline ready to `transform` new data.
+        """
+        with open(file_path) as file:
+            state = json.load(file)
+        pipeline = cls(state["task_type"], state["steps"], sparse=state["sparse"], n_buckets=state["n_buckets"],
+                       clip_outliers=state["clip_outliers"])
+        pipeline.state = state
+        return pipeline
+
+    def _config(self):
+        """
+        The configuration that determines the result of `run` (workers and executors do not).
+        """
+        return {
+            "steps": list(self.steps),
+            "fused": self.fused,
+            "sparse": self.sparse,
+            "n_buckets": self.n_buckets,
+            "clip_outliers": self.clip_outliers,
+            "reorder": self.reorder,
+            "mode_capacity": self.mode_capacity,
+        }
+
+    def _set_state(self, plan, steps_state):
+        """
+        Records the state fitted by a plan, together with the configuration needed to rebuild it.
+        """
+        self.state = {
+            "task_type": self.task_type,
+            "steps": list(self.steps),
+            "sparse": self.sparse,
+            "numeric_columns": plan.numeric_columns,
+            "categorical_columns": plan.categorical_columns,
+            "hashed_columns": plan.hashed_columns,
+            "n_buckets": plan.n_buckets,
+            "clip_outliers": plan.clip_outliers,
+            "steps_state": steps_state,
+        }
+        return steps_state
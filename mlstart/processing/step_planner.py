@@ -0,0 +1,244 @@
+import itertools
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset
+
+# Steps that drop rows, and the transforms each of them may run ahead of. Duplicates found before
+# encoding and scaling are the same rows (both are one-to-one per column), except through feature
+# hashing, which may map different values to one bucket. Outlier bounds are defined on scaled values,
+# so outlier filtering may only run ahead of encoding, which does not touch numeric columns.
+FILTER_STEPS = {
+    "remove_duplicates": ("encode_categorical", "scale_numeric"),
+    "handle_outliers": ("encode_categorical",),
+}
+
+# Transforms that work on disjoint columns and can therefore be applied in either order
+COMMUTING_STEPS = ("encode_categorical", "scale_numeric")
+
+
+class StepPlan:
+    """
+    An ordered list of preprocessing operations chosen by StepPlanner, with its estimated cost.
+
+    Each operation is a tuple (kind, step): 'run' applies a step as usual, while a step that a
+    filter was moved ahead of is split into a 'fit' at its original position (so it is fitted on
+    the same rows as in the configured order) and a 'transform' after the filter.
+    """
+
+    def __init__(self, operations, cost=None, baseline_cost=None, estimates=None):
+        """
+        :param operations: A list of (kind, step) tuples.
+        :param cost: The estimated cost of the operations, in cells processed (optional).
+        :param baseline_cost: The estimated cost of the configured order (optional).
+        :param estimates: A dictionary mapping each filter step to the estimated share of rows it keeps.
+        """
+        self.operations = operations
+        self.cost = cost
+        self.baseline_cost = baseline_cost
+        self.estimates = estimates or {}
+
+    def steps(self):
+        """
+        :return: The step names in the order their rows are transformed (fits are left out).
+        """
+        return [step for kind, step in self.operations if kind != "fit"]
+
+    def report(self):
+        """
+        Describe the plan in a few lines of text.
+
+        :return: A string with one line per operation and the estimated costs.
+        """
+        if self.cost is None:
+            lines = ["Preprocessing plan (configured order):"]
+        else:
+            lines = [f"Preprocessing plan (estimated cost {self.cost:,.0f} cells, "
+                     f"{self.baseline_cost:,.0f} in the configured order):"]
+        for position, (kind, step) in enumerate(self.operations, start=1):
+            line = f"  {position}. {kind} {step}"
+            if step in self.estimates and kind != "fit":
+                line += f" (keeps about {self.estimates[step]:.0%} of the rows)"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class StepPlanner:
+    """
+    Chooses the order of the sequential preprocessing steps.
+
+    Row-dropping filters (duplicate and outlier removal) are moved ahead of the transforms listed in
+    FILTER_STEPS when that is safe, so that encoding, which may expand a column into one column per
+    category, and scaling only process the rows that are kept. Every candidate order is costed
+    with a simple model (rows times columns touched by each operation, with the share of rows each
+    filter keeps estimated from the data) and the cheapest one is chosen; ties keep the configured order.
+    """
+
+    def __init__(self, task_type, steps, hashed_columns=(), clip_outliers=False):
+        """
+        :param task_type: A string indicating the task type ('classification' or 'regression').
+        :param steps: The configured step names, in order.
+        :param hashed_columns: Categorical columns encoded by feature hashing (see HashCategorical).
+        :param clip_outliers: If True, outlier handling clips values and drops no rows.
+        """
+        self.task_type = task_type
+        self.steps = [step for step in steps if step != "handle_outliers" or task_type == "regression"]
+        self.hashed_columns = list(hashed_columns)
+        self.clip_outliers = clip_outliers
+
+    def plan(self, data, numeric_columns, categorical_columns):
+        """
+        Choose the cheapest safe order of the steps for a dataset.
+
+        :param data: A ColumnarDataset (or a list of dictionaries, which keeps the configured order since
+                     its steps cannot be split into fit and transform).
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :return: A StepPlan.
+        """
+        baseline = [("run", step) for step in self.steps]
+        if not isinstance(data, ColumnarDataset):
+            return StepPlan(baseline)
+
+        estimates = self._estimate_filters(data, numeric_columns)
+        profile = self._profile(data, numeric_columns, categorical_columns)
+        baseline_cost = self._cost(baseline, profile, estimates)
+        best, best_cost = baseline, baseline_cost
+        filters = [step for step in self.steps if self._is_filter(step)]
+        for size in range(1, len(filters) + 1):
+            for hoisted in itertools.combinations(filters, size):
+                operations = self._hoist(hoisted)
+                cost = self._cost(operations, profile, estimates)
+                if cost < best_cost:
+                    best, best_cost = operations, cost
+        return StepPlan(best, best_cost, baseline_cost, estimates)
+
+    def plan_fused(self, data, numeric_columns, categorical_columns):
+        """
+        Describe the order of the fused plan (see PreprocessingPlan), which fits every step in a first
+        scan and can therefore always drop rows before transforming the rest of the batch.
+
+        :param data: A ColumnarDataset.
+        :param numeric_columns: A list of column names identified as numeric.
+        :param categorical_columns: A list of column names identified as categorical.
+        :return: A StepPlan.
+        """
+        stateful = ("handle_missing_values", "encode_categorical", "scale_numeric")
+        operations = [("run", step) for step in ("remove_invalid_columns", "normalize_missing_values")
+                      if step in self.steps]
+        operations += [("fit", step) for step in self.steps if step in stateful + ("handle_outliers",)]
+        operations += [(kind, step) for kind, step in (("run", "remove_duplicates"),
+                                                       ("transform", "handle_missing_values"),
+                                                       ("transform", "scale_numeric"),
+                                                       ("run", "handle_outliers"),
+                                                       ("transform", "encode_categorical"))
+                       if step in self.steps]
+
+        estimates = self._estimate_filters(data, numeric_columns)
+        profile = self._profile(data, numeric_columns, categorical_columns)
+        baseline = [("run", step) for step in self.steps]
+        return StepPlan(operations, self._cost(operations, profile, estimates),
+                        self._cost(baseline, profile, estimates), estimates)
+
+    def _is_filter(self, step):
+        return step in FILTER_STEPS and not (step == "handle_outliers" and self.clip_outliers)
+
+    def _can_overtake(self, step, transform):
+        """
+        Check whether a filter may be applied before a transform.
+        """
+        if transform not in FILTER_STEPS[step]:
+            return False
+        return not (transform == "encode_categorical" and step == "remove_duplicates" and self.hashed_columns)
+
+    def _hoist(self, hoisted):
+        """
+        Build the operations with the given filters moved ahead of the transforms they may overtake.
+        """
+        operations = [("run", step) for step in self.steps]
+        for step in hoisted:
+            position = operations.index(("run", step))
+            start = position
+            # The commuting transforms right before the filter can be reordered among themselves
+            while start and operations[start - 1][0] != "fit" and operations[start - 1][1] in COMMUTING_STEPS:
+                start -= 1
+            window = operations[start:position]
+            moved = [operation for operation in window if self._can_overtake(step, operation[1])]
+            if not moved:
+                continue
+            stay = [operation for operation in window if operation not in moved]
+            fits = [("fit", name) for kind, name in moved if kind == "run"]
+            operations = (operations[:start] + fits + stay + [("run", step)]
+                          + [("transform", name) for _, name in moved] + operations[position + 1:])
+        return operations
+
+    def _profile(self, data, numeric_columns, categorical_columns):
+        """
+        Gather the sizes the cost model needs.
+        """
+        encoded_width = 0
+        for column in categorical_columns:
+            if self.task_type == "regression" and column not in self.hashed_columns:
+                if column in data.categories:
+                    encoded_width += len(data.categories[column])
+                else:
+                    encoded_width += len(set(data.columns[column][~data.masks[column]].tolist()))
+            else:
+                encoded_width += 1
+        return {
+            "rows": len(data),
+            "width": len(data.headers),
+            "numeric": len(numeric_columns),
+            "categorical": len(categorical_columns),
+            "encoded_width": encoded_width,
+        }
+
+    def _estimate_filters(self, data, numeric_columns):
+        """
+        Estimate the share of rows each filter keeps, from the data as loaded.
+        """
+        from mlstart.preprocessors.handle_outliers import HandleOutliers
+        from mlstart.preprocessors.remove_duplicates import RemoveDuplicates
+
+        estimates = {}
+        if not len(data):
+            return estimates
+        if "remove_duplicates" in self.steps:
+            estimates["remove_duplicates"] = len(np.unique(RemoveDuplicates.row_hashes(data))) / len(data)
+        if self._is_filter("handle_outliers") and "handle_outliers" in self.steps:
+            keep = np.ones(len(data), dtype=bool)
+            for column in numeric_columns:
+                values = data.columns[column]
+                if column in data.categories or values.dtype.kind not in "biuf":
+                    continue
+                present = ~data.masks[column]
+                lower_bound, upper_bound = HandleOutliers.iqr_bounds(values[present])
+                keep &= ~present | ((values >= lower_bound) & (values <= upper_bound))
+            estimates["handle_outliers"] = float(keep.mean())
+        return estimates
+
+    @staticmethod
+    def _cost(operations, profile, estimates):
+        """
+        Estimate the cost of operations as the number of cells they read or write.
+        """
+        rows = profile["rows"]
+        width = profile["width"]
+        cost = 0.0
+        for kind, step in operations:
+            if step == "encode_categorical":
+                if kind != "fit":
+                    cost += rows * profile["encoded_width"]
+                    width += profile["encoded_width"] - profile["categorical"]
+                if kind != "transform":
+                    cost += rows * profile["categorical"]
+            elif step == "scale_numeric":
+                cost += rows * profile["numeric"] * ((kind != "fit") + (kind != "transform"))
+            elif step == "handle_missing_values":
+                cost += rows * (profile["numeric"] + profile["categorical"])
+            elif step == "handle_outliers":
+                cost += rows * profile["numeric"]
+                if kind != "fit":
+                    rows *= estimates.get(step, 1.0)
+            else:
+                cost += rows * width
+                rows *= estimates.get(step, 1.0)
+        return cost
@@ -11,18 +11,23 @@ class ReportGenerator:
         """
         self.task_type = task_type
 
-    def generate_report(self, model_metrics, best_model_name, rankings):
+    def generate_report(self, model_metrics, best_model_name, rankings, n_folds=None, excluded_models=None):
         """
         Generates a detailed report with a summary table and detailed metric rankings.
 
         :param model_metrics: Dictionary containing model names and their evaluation metrics.
         :param best_model_name: Name of the best-performing model.
         :param rankings: Rankings of models across all metrics.
+        :param n_folds: The number of cross-validation folds the metrics are averaged over (optional).
+        :param excluded_models: Dictionary mapping the names of models that were not ranked to the reason,
+                                such as 'eliminated after 500 rows' (optional).
         :return: A formatted detailed report string.
         """
         report_lines = []
         report_lines.append(f"Model Performance Report ({self.task_type.capitalize()} Task)")
         report_lines.append("=" * 50)
+        if n_folds:
+            report_lines.append(f"Metrics are averaged over {n_folds} cross-validation folds.")
 
         # Summary Table Section
         report_lines.append("\nSummary Table (All Metrics at a Glance):")
@@ -88,6 +93,13 @@ class ReportGenerator:
             row = "{:<25} {:<15.2f}{}".format(model_name, avg_rank, best_indicator)
             report_lines.append(row)
 
+        # Models left out of the rankings
+        if excluded_models:
+            report_lines.append("\nModels Not Ranked")
+            report_lines.append("-" * 50)
+            for model_name, reason in excluded_models.items():
+                report_lines.append("{:<25} {}".format(model_name, reason))
+
         # Recommendation Section
         report_lines.append("=" * 50)
         report_lines.append(f"\nBest Model: {best_model_name}")
@@ -1,12 +1,20 @@
 from mlstart.core.data_loader import DataLoader
 from mlstart.core.task_identifier import TaskIdentifier
 from mlstart.core.column_identifier import ColumnIdentifier
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.core.dataset_cache import DatasetCache
+from mlstart.preprocessors.hash_categorical import DEFAULT_BUCKETS
+from mlstart.processing.preprocessing_cache import PreprocessingCache
 from mlstart.processing.preprocessor_pipeline import PreprocessorPipeline
 from mlstart.processing.datahandler import DataHandler
 from mlstart.models.model_trainer import ModelTrainer
+from mlstart.models.cross_validation import CrossValidator
+from mlstart.models.successive_halving import SuccessiveHalving
 from mlstart.models.model_comparison import ModelComparator
 from mlstart.reporting.report_generator import ReportGenerator
+import json
 import os
+import numpy as np
 
 
 class MLStartPipeline:
@@ -15,7 +23,10 @@ class MLStartPipeline:
     from data loading to report generation.
     """
 
-    def __init__(self, file_name, target_column):
+    def __init__(self, file_name, target_column, batch_size=None, workers=None, cache_dir=".mlstart_cache",
+                 columns=None, exclude_columns=None, compact_dtypes=True, sparse=False, hash_threshold=None,
+                 n_buckets=DEFAULT_BUCKETS, clip_outliers=False, float32=False, cv_folds=None,
+                 successive_halving=False, time_budget=None, time_limit=None, memory_limit=None):
         """
         Initializes the MLStartPipeline with the dataset file and target column.
 
@@ -23,14 +34,101 @@ class MLStartPipeline:
         :type file_name: str
         :param target_column: Name of the target column in the dataset.
         :type target_column: str
+        :param batch_size: If set, the dataset is streamed in batches of this many rows and preprocessed
+                           in two passes, so the raw file never has to fit in memory (optional). The
+                           preprocessed rows are still collected in memory for the split and training.
+        :type batch_size: int
+        :param workers: Number of worker processes used to parse large CSV files in parallel, of workers
+                        the preprocessing of the columns is spread over, and of models trained at the
+                        same time (optional).
+        :type workers: int
+        :param cache_dir: Directory of the parsed-dataset cache. Unchanged files are memory-mapped from the
+                          cache instead of being parsed again, and the preprocessed data of a rerun with the
+                          same columns and preprocessing settings is reused. Set to None to disable the cache.
+        :type cache_dir: str
+        :param columns: Names of the columns to load (optional, defaults to all columns). The target column
+                        is always loaded. Other columns are skipped while parsing the file.
+        :type columns: list
+        :param exclude_columns: Names of columns to skip while parsing the file (optional). The target
+                                column is never skipped.
+        :type exclude_columns: list
+        :param compact_dtypes: Store each column in the narrowest dtype that holds it (bool, small integers,
+                               float32 or dictionary-encoded categories) while preprocessing. Imputed, scaled
+                               and clipped values are still computed in float64, from the exact values of
+                               float32 columns (see `to_float64`), so the result does not depend on this
+                               setting. Default is True.
+        :type compact_dtypes: bool
+        :param sparse: One-hot encode categorical columns (regression tasks) into a sparse CSR feature matrix
+                       instead of one dense column per category. Use for high-cardinality columns.
+        :type sparse: bool
+        :param hash_threshold: Categorical columns with more distinct values than this are encoded by feature
+                               hashing into `n_buckets` sparse indicators, without building a vocabulary
+                               (optional, defaults to no hashing).
+        :type hash_threshold: int
+        :param n_buckets: Number of hash buckets per hashed column. Default is 1024.
+        :type n_buckets: int
+        :param clip_outliers: For regression tasks, clip numeric values to the IQR outlier bounds instead of
+                              removing the rows that fall outside them. Default is False.
+        :type clip_outliers: bool
+        :param float32: Build the feature matrix the models are trained on in float32 instead of float64,
+                        which halves its memory. Default is False.
+        :type float32: bool
+        :param cv_folds: If set, the models are evaluated by cross-validation over this many folds (stratified
+                         for classification) instead of a single train/test split, with the preprocessing
+                         fitted on the training rows of each fold, and ranked on their fold-averaged metrics.
+                         The folds and models are trained in parallel over `workers` processes (optional).
+        :type cv_folds: int
+        :param successive_halving: Race the models on growing subsamples of the training data, dropping the
+                                   worse ones after each round, so that only the best are trained on all of
+                                   it (see SuccessiveHalving). Default is False.
+        :type successive_halving: bool
+        :param time_budget: With `successive_halving`, the wall-clock time in seconds after which the race
+                            stops and the models trained so far are compared (optional).
+        :type time_budget: float
+        :param time_limit: The wall-clock time in seconds each model may take to train (optional). Models are
+                           then trained in watched processes; one still training at the limit is stopped and
+                           reported as 'timed out'.
+        :type time_limit: float
+        :param memory_limit: The memory in bytes each model may allocate while training (optional, Linux only).
+                             A model allocating more is stopped and reported as 'over memory'.
+        :type memory_limit: int
+        :raises ValueError: If `cv_folds` is combined with `batch_size`, `successive_halving` or a time or
+                            memory limit.
         """
+        if cv_folds and batch_size:
+            raise ValueError("Cross-validation is not supported with batch_size.")
+        if cv_folds and successive_halving:
+            raise ValueError("Cross-validation is not supported with successive_halving.")
+        if cv_folds and (time_limit is not None or memory_limit is not None):
+            raise ValueError("Cross-validation is not supported with time or memory limits.")
         self.file_name = os.path.splitext(file_name)[0] + ".txt"  # Assuming all datasets are in the 'data' folder
         self.file_path = f"data/{file_name}"
         self.target_column = target_column
+        self.batch_size = batch_size
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.columns = columns
+        if columns is not None and target_column not in columns:
+            self.columns = list(columns) + [target_column]
+        self.exclude_columns = exclude_columns
+        if exclude_columns is not None:
+            self.exclude_columns = [name for name in exclude_columns if name != target_column]
+        self.compact_dtypes = compact_dtypes
+        self.sparse = sparse
+        self.hash_threshold = hash_threshold
+        self.n_buckets = n_buckets
+        self.clip_outliers = clip_outliers
+        self.float32 = float32
+        self.cv_folds = cv_folds
+        self.successive_halving = successive_halving
+        self.time_budget = time_budget
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
         self.task_type = None
         self.data = None
         self.numeric_columns = []
         self.categorical_columns = []
+        self.hashed_columns = []
 
     def evaluate_and_recommend_model(self):
         """
@@ -41,9 +139,10 @@ class MLStartPipeline:
             - Loads the dataset from the specified file path.
             - Determines whether the task is 'classification' or 'regression' based on the target column.
             - Identifies numeric and categorical columns in the dataset.
-            - Prepares the data for modeling by handling missing values, encoding categorical variables,
-              scaling numeric variables, and removing outliers (if applicable).
             - Splits the dataset into training and testing sets.
+            - Prepares the data for modeling by handling missing values, encoding categorical variables,
+              scaling numeric variables, and removing outliers (if applicable), fitted on the training
+              rows only. (With `batch_size`, the preprocessing is fitted on all rows before the split.)
             - Trains multiple baseline models based on the task type.
             - Evaluates and ranks the trained models to identify the best-performing one.
             - Generates a detailed performance report and saves it as a text file.
@@ -51,26 +150,56 @@ class MLStartPipeline:
         :raises Exception: If any step in the pipeline fails, an error message will be printed.
         """
         try:
-            # Step 1: Load data
-            #print("Loading data...")
-            data_loader = DataLoader(self.file_path)
-            headers, self.data = data_loader.load_data()
+            if self.batch_size:
+                # Steps 1-4: Stream the data through the preprocessing pipeline
+                preprocessed_data = self._preprocess_in_batches()
+
+                # Step 5: Split the data
+                data_handler = DataHandler(preprocessed_data, self.target_column, self.task_type,
+                                           np.float32 if self.float32 else np.float64)
+                X_train, X_test, y_train, y_test = data_handler.train_test_splitting()
+            else:
+                # Step 1: Load data
+                #print("Loading data...")
+                data_loader = DataLoader(self.file_path, self.columns, self.exclude_columns)
+                cache = DatasetCache(self.cache_dir) if self.cache_dir else None
+                headers, self.data = data_loader.load_dataset(workers=self.workers, cache=cache)
 
-            # Step 2: Determine task type
-            task_identifier = TaskIdentifier(self.data, headers, self.target_column)
-            self.task_type = task_identifier.determine_task_type()
+                # Step 2: Determine task type
+                task_identifier = TaskIdentifier(self.data, headers, self.target_column)
+                self.task_type = task_identifier.determine_task_type()
 
-            # Step 3: Identify column types
-            column_identifier = ColumnIdentifier(self.data)
-            self.numeric_columns, self.categorical_columns = column_identifier.identify_column_types()
+                # Step 3: Identify column types
+                column_identifier = ColumnIdentifier(self.data, hash_threshold=self.hash_threshold)
+                self.numeric_columns, self.categorical_columns = column_identifier.identify_column_types()
+                self.hashed_columns = [column for column in column_identifier.hashed_columns
+                                       if column != self.target_column]
+                if self.compact_dtypes:
+                    self.data = column_identifier.compact_dtypes()
 
-            # Step 4: Preprocess the data
-            preprocessor = PreprocessorPipeline(self.task_type)
-            preprocessed_data = preprocessor.run(self.data, self.numeric_columns, self.categorical_columns)
+                # Steps 4-7: Evaluate the models by cross-validation
+                if self.cv_folds:
+                    self._cross_validate()
+                    return
 
-            # Step 5: Split the data
-            data_handler = DataHandler(preprocessed_data, self.target_column, self.task_type)
-            X_train, X_test, y_train, y_test = data_handler.train_test_splitting()
+                # Steps 4-5: Split the rows, fit the preprocessing on the training rows (or reuse the result
+                # of an earlier run) and apply it to the test rows
+                preprocessor = PreprocessorPipeline(self.task_type, sparse=self.sparse, n_buckets=self.n_buckets,
+                                                    clip_outliers=self.clip_outliers, workers=self.workers)
+                preprocessing_cache = None
+                fingerprint = None
+                if cache is not None:
+                    preprocessing_cache = PreprocessingCache(os.path.join(self.cache_dir, "preprocessed"))
+                    fingerprint = json.dumps([cache.fingerprint(self.file_path), headers, self.compact_dtypes])
+                train_rows, test_rows = DataHandler.split_rows(len(self.data))
+                train_data, test_data = preprocessor.run_split(self.data, train_rows, test_rows, self.numeric_columns,
+                                                               self.categorical_columns, self.hashed_columns,
+                                                               preprocessing_cache, fingerprint, self.target_column)
+                dtype = np.float32 if self.float32 else np.float64
+                X_train, y_train = DataHandler(train_data, self.target_column, self.task_type,
+                                               dtype).split_features_and_target()
+                X_test, y_test = DataHandler(test_data, self.target_column, self.task_type,
+                                             dtype).split_features_and_target()
 
             # Handle case where training data contains only one class
             if len(set(y_train)) == 1:
@@ -78,9 +207,20 @@ class MLStartPipeline:
                 return
 
             # Step 6: Training models
-            model_trainer = ModelTrainer(self.task_type)
+            model_trainer = ModelTrainer(self.task_type, workers=self.workers, time_limit=self.time_limit,
+                                         memory_limit=self.memory_limit)
             model_trainer.initialize_models()
-            trained_models = model_trainer.train_models(X_train, y_train)
+            if self.successive_halving:
+                racer = SuccessiveHalving(self.task_type, time_budget=self.time_budget, workers=self.workers,
+                                          time_limit=self.time_limit, memory_limit=self.memory_limit)
+                trained_models, excluded_models = racer.race(model_trainer.models, X_train, y_train)
+            else:
+                trained_models = model_trainer.train_models(X_train, y_train)
+                excluded_models = model_trainer.failures
+            if not trained_models:
+                reasons = ", ".join(f"{name} {reason}" for name, reason in excluded_models.items())
+                print(f"No model could be trained: {reasons}.")
+                return
 
             # Step 7: Comparing models
             comparator = ModelComparator(self.task_type)
@@ -90,7 +230,8 @@ class MLStartPipeline:
 
             # Step 8: Generating report
             report_generator = ReportGenerator(self.task_type)
-            report = report_generator.generate_report(model_metrics, best_model_name, total_ranks)
+            report = report_generator.generate_report(model_metrics, best_model_name, total_ranks,
+                                                      excluded_models=excluded_models)
 
             # Print the report
             print(report)
@@ -99,4 +240,62 @@ class MLStartPipeline:
             report_generator.save_report(report,f"report_output/model_report_{self.task_type}_{self.file_name}")
 
         except Exception as e:
-            print(f"An error occurred: {e}")
\ No newline at end of file
+            print(f"An error occurred: {e}")
+
+    def _cross_validate(self):
+        """
+        Evaluates the models by cross-validation, preprocessing each fold separately, and generates
+        the report from their fold-averaged metrics.
+        """
+        preprocessor = PreprocessorPipeline(self.task_type, sparse=self.sparse, n_buckets=self.n_buckets,
+                                            clip_outliers=self.clip_outliers, workers=self.workers)
+        cross_validator = CrossValidator(self.task_type, self.cv_folds, self.workers,
+                                         dtype=np.float32 if self.float32 else np.float64)
+        folds = cross_validator.preprocess_folds(self.data, self.target_column, preprocessor, self.numeric_columns,
+                                                 self.categorical_columns, self.hashed_columns)
+
+        model_trainer = ModelTrainer(self.task_type)
+        model_trainer.initialize_models()
+        fold_metrics = cross_validator.cross_validate(model_trainer.models, folds)
+
+        comparator = ModelComparator(self.task_type)
+        best_model_name, model_metrics, total_ranks = comparator.compare_fold_metrics(fold_metrics)
+
+        report_generator = ReportGenerator(self.task_type)
+        report = report_generator.generate_report(model_metrics, best_model_name, total_ranks, self.cv_folds)
+        print(report)
+        report_generator.save_report(report, f"report_output/model_report_{self.task_type}_{self.file_name}")
+
+    def _preprocess_in_batches(self):
+        """
+        Loads and preprocesses the dataset in streaming mode. Column types are identified from the
+        first batch, and only the preprocessed (numeric) batches are kept in memory. They are
+        concatenated into one dataset, since the models are trained in memory, so peak memory grows
+        with the number of preprocessed rows rather than with `batch_size`; only the preprocessing
+        passes over the raw file run in flat memory.
+
+        :return: The preprocessed ColumnarDataset.
+        """
+        data_loader = DataLoader(self.file_path, self.columns, self.exclude_columns)
+        headers = data_loader.read_headers()
+
+        # Determine task type from the target column alone; the scan stops once the type is known
+        target_loader = DataLoader(self.file_path, columns=[self.target_column])
+        task_identifier = TaskIdentifier(target_loader.iter_batches(self.batch_size), headers, self.target_column)
+        self.task_type = task_identifier.determine_task_type()
+
+        first_batch = next(data_loader.iter_batches(self.batch_size))
+        column_identifier = ColumnIdentifier(first_batch, hash_threshold=self.hash_threshold)
+        self.numeric_columns, self.categorical_columns = column_identifier.identify_column_types()
+        self.hashed_columns = [column for column in column_identifier.hashed_columns if column != self.target_column]
+
+        # Categorical columns are read as text so that every batch stores them the same way
+        preprocessor = PreprocessorPipeline(self.task_type, sparse=self.sparse, n_buckets=self.n_buckets,
+                                            clip_outliers=self.clip_outliers, workers=self.workers)
+        batches = preprocessor.run_batches(
+            lambda: data_loader.iter_batches(self.batch_size, text_columns=self.categorical_columns),
+            self.numeric_columns,
+            self.categorical_columns,
+            self.hashed_columns,
+        )
+        return ColumnarDataset.concat(list(batches))
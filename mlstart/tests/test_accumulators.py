@@ -0,0 +1,140 @@
+import unittest
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.preprocessors.handle_missing_values import HandleMissingValues
+from mlstart.preprocessors.scale_numeric import ScaleNumeric
+from mlstart.processing.accumulators import MeanVariance, QuantileSketch, ValueCounts, merge_accumulators
+from mlstart.processing.preprocessing_plan import PreprocessingPlan
+
+class TestAccumulators(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a sample dataset for testing"""
+        rng = np.random.default_rng(0)
+        self.values = rng.normal(50, 10, 1000)
+        self.rows = [{'age': '' if i % 7 == 0 else str(value), 'city': ['Boston', 'Seattle', 'Austin', ''][i % 4 if i % 5 else 1]}
+                     for i, value in enumerate(self.values)]
+
+    def test_mean_variance_matches_numpy(self):
+        """Test that chunked and merged updates give the mean and standard deviation of all values"""
+        chunked = MeanVariance()
+        for start in range(0, 1000, 300):
+            chunked.update(self.values[start:start + 300])
+        left, right = MeanVariance(), MeanVariance()
+        left.update(self.values[:123])
+        right.update(self.values[123:])
+        left.merge(right)
+
+        for accumulator in (chunked, left):
+            self.assertEqual(accumulator.count, 1000)
+            self.assertAlmostEqual(accumulator.get_mean(), self.values.mean(), places=10)
+            self.assertAlmostEqual(accumulator.get_std(), self.values.std(), places=10)
+
+    def test_mean_variance_missing_values(self):
+        """Test that masked values are counted as missing and that empty accumulators are handled"""
+        accumulator = MeanVariance()
+        accumulator.update(np.array([1.0, np.nan, 3.0]), np.array([False, True, False]))
+        self.assertEqual((accumulator.count, accumulator.missing), (2, 1))
+        self.assertEqual(accumulator.get_mean(), 2.0)
+        self.assertAlmostEqual(accumulator.get_std(3), np.sqrt(2 / 3))
+        self.assertTrue(np.isnan(MeanVariance().get_mean()))
+        self.assertEqual(MeanVariance().get_std(), 0.0)
+
+    def test_value_counts_mode(self):
+        """Test that ties of the mode go to the value seen first, also across merged counters and codes"""
+        left, right = ValueCounts(), ValueCounts()
+        left.update(np.array(['b', 'a', None], dtype=object), np.array([False, False, True]))
+        right.update(np.array([0, 1, 1]), categories=np.array(['a', 'c'], dtype=object))
+        left.merge(right)
+        self.assertEqual(left.counts, {'b': 1, 'a': 2, 'c': 2})
+        self.assertEqual(left.get_mode(), 'a')
+        self.assertEqual(left.values(), ['a', 'b', 'c'])
+        self.assertIsNone(ValueCounts().get_mode())
+
+    def test_heavy_hitters(self):
+        """Test that a bounded counter keeps the frequent values"""
+        counter = ValueCounts(capacity=3)
+        for start in range(0, 1000, 100):
+            chunk = [f'rare{i}' for i in range(start, start + 50)] + ['common'] * 40 + ['second'] * 10
+            counter.update(chunk)
+        self.assertLessEqual(len(counter.counts), 3)
+        self.assertEqual(counter.get_mode(), 'common')
+        self.assertGreaterEqual(counter.counts['common'], 400)
+        with self.assertRaises(ValueError):
+            ValueCounts(capacity=0)
+
+    def test_quantile_sketch_is_exact_below_capacity(self):
+        """Test that small inputs and sketches without an error bound give the exact quantiles"""
+        positions = [int(1000 * q) for q in (0.25, 0.75)]
+        expected = np.sort(self.values)[positions].tolist()
+        for error in (None, 0.001):
+            sketch = QuantileSketch(error)
+            sketch.update(self.values[:500])
+            sketch.update(self.values[500:])
+            self.assertEqual(sketch.quantiles([0.25, 0.75]), expected)
+        self.assertTrue(np.isnan(QuantileSketch().quantiles([0.5])[0]))
+        with self.assertRaises(ValueError):
+            QuantileSketch(error=0)
+
+    def test_quantile_sketch_error_bound(self):
+        """Test that the rank error of a bounded sketch stays within its error bound"""
+        rng = np.random.default_rng(1)
+        values = rng.lognormal(0, 1, 200000)
+        left, right = QuantileSketch(error=0.01), QuantileSketch(error=0.01)
+        for start in range(0, 120000, 30000):
+            left.update(values[start:start + 30000])
+        right.update(values[120000:])
+        left.merge(right)
+
+        self.assertEqual(left.count, 200000)
+        self.assertLess(sum(left.sizes), 1000)
+        ordered = np.sort(values)
+        for fraction, estimate in zip((0.01, 0.25, 0.5, 0.75, 0.99), left.quantiles([0.01, 0.25, 0.5, 0.75, 0.99])):
+            self.assertLess(abs(np.searchsorted(ordered, estimate) / 200000 - fraction), 0.01)
+        with self.assertRaises(ValueError):
+            left.merge(QuantileSketch(error=0.1))
+
+    def test_quantile_sketch_repeated_values(self):
+        """Test that a value added many times is weighted by its count"""
+        sketch = QuantileSketch(error=0.01)
+        sketch.update(np.arange(100.0))
+        sketch.add_repeated(1000.0, 300)
+        self.assertEqual(sketch.count, 400)
+        self.assertEqual(sketch.quantiles([0.2, 0.25, 0.75]), [80.0, 1000.0, 1000.0])
+
+    def test_steps_fit_from_merged_accumulators(self):
+        """Test that the scaler and the imputer built from merged chunks match fitting on all the data"""
+        dataset = ColumnarDataset.from_rows(self.rows)
+        parts = [ColumnarDataset.from_rows(self.rows[start:start + 250]) for start in range(0, 1000, 250)]
+
+        for step, args in ((ScaleNumeric, (['age'],)), (HandleMissingValues, (['age'], ['city']))):
+            accumulators = {}
+            for part in parts:
+                merge_accumulators(accumulators, step.accumulate(part, *args))
+            expected = step.fit(dataset, *args)
+            result = step.finalize(accumulators)
+            self.assertEqual(result.keys(), expected.keys())
+            for key, values in expected.items():
+                for column, value in values.items():
+                    if isinstance(value, float):
+                        self.assertAlmostEqual(result[key][column], value, places=10)
+                    else:
+                        self.assertEqual(result[key][column], value)
+
+    def test_plan_merge_matches_fit(self):
+        """Test that a plan state built from merged accumulators matches a plan fitted in one scan"""
+        plan = PreprocessingPlan('regression', ['age'], ['city'])
+        batches = [plan.prepare(ColumnarDataset.from_rows(self.rows[start:start + 400])) for start in range(0, 1000, 400)]
+        expected = plan.fit(batches)
+        accumulators = plan.accumulate(None)
+        for batch in batches:
+            plan.merge(accumulators, plan.accumulate(batch))
+        result = plan.finalize(accumulators)
+
+        self.assertEqual(result['handle_missing_values']['modes'], expected['handle_missing_values']['modes'])
+        self.assertEqual(result['encode_categorical'], expected['encode_categorical'])
+        self.assertAlmostEqual(result['scale_numeric']['stds']['age'], expected['scale_numeric']['stds']['age'], places=10)
+        self.assertEqual(result['handle_outliers'], expected['handle_outliers'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+from mlstart.core.cardinality import HyperLogLog, hash64
+
+class TestCardinality(unittest.TestCase):
+
+    def test_hash64_is_consistent(self):
+        """Test that equal values hash alike and different values hash differently"""
+        self.assertEqual(hash64(np.array([1, 2]))[0], hash64(np.array([1.0]))[0])
+        self.assertEqual(hash64(np.array([0.0]))[0], hash64(np.array([-0.0]))[0])
+        self.assertEqual(hash64(np.array(["a", "b"], dtype=object))[1], hash64(["b"])[0])
+        hashes = hash64(np.arange(10000, dtype=np.float64))
+        self.assertEqual(len(np.unique(hashes)), 10000)
+
+    def test_small_cardinality_is_exact(self):
+        """Test that small distinct counts are estimated exactly"""
+        sketch = HyperLogLog()
+        sketch.update(np.array(["x", "y", "z", "x"], dtype=object))
+        self.assertEqual(sketch.estimate(), 3)
+
+    def test_large_cardinality_estimate(self):
+        """Test that the estimate is within a few standard errors for many distinct values"""
+        sketch = HyperLogLog(precision=12)
+        for start in range(0, 200000, 50000):
+            sketch.update(np.arange(start, start + 50000, dtype=np.float64))
+        self.assertLess(abs(sketch.estimate() - 200000) / 200000, 0.05)
+
+    def test_merge(self):
+        """Test that merging two sketches estimates the union"""
+        left, right = HyperLogLog(), HyperLogLog()
+        left.update(np.arange(0, 6000))
+        right.update(np.arange(4000, 10000))
+        left.merge(right)
+        self.assertLess(abs(left.estimate() - 10000) / 10000, 0.05)
+        with self.assertRaises(ValueError):
+            left.merge(HyperLogLog(precision=10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.preprocessors.encode_categorical import EncodeCategorical
+from mlstart.processing.accumulators import MeanVariance
+from mlstart.processing.column_executor import ColumnExecutor, update_accumulator
+
+
+def process_id(value):
+    return value, os.getpid()
+
+
+class TestColumnExecutor(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a sample dataset with a numeric and an object column"""
+        self.data = ColumnarDataset({
+            'age': np.array([25.0, 32.0, 47.0, 51.0]),
+            'city': np.array(['Boston', 'Seattle', 'Boston', 'Austin'], dtype=object),
+        })
+
+    def test_serial_by_default(self):
+        """Test that tasks run in the calling thread without workers"""
+        executor = ColumnExecutor()
+        self.assertFalse(executor.parallel)
+        self.assertEqual(executor.map(process_id, [(1,), (2,)]), [(1, os.getpid()), (2, os.getpid())])
+
+    def test_tasks_are_routed_by_column_type(self):
+        """Test that numeric tasks run on threads, object tasks on processes, and results keep their order"""
+        python_bound = ColumnExecutor.python_bound_columns(self.data, ['age', 'city', 'age'])
+        self.assertEqual(python_bound, [False, True, False])
+        with ColumnExecutor(workers=2) as executor:
+            results = executor.map(process_id, [(1,), (2,), (3,)], python_bound)
+        self.assertEqual([value for value, _ in results], [1, 2, 3])
+        self.assertEqual(results[0][1], os.getpid())
+        self.assertNotEqual(results[1][1], os.getpid())
+
+    def test_given_executor(self):
+        """Test that a given executor runs every task and is left open"""
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            executor = ColumnExecutor(executor=pool)
+            results = executor.map(process_id, [(1,), (2,)], [True, True])
+            executor.close()
+            self.assertEqual(pool.submit(process_id, 3).result()[0], 3)
+        self.assertEqual([value for value, _ in results], [1, 2])
+        self.assertEqual(results[0][1], os.getpid())
+
+    def test_accumulators_are_returned_from_processes(self):
+        """Test that an accumulator updated in a worker process comes back updated"""
+        with ColumnExecutor(workers=2) as executor:
+            updated = executor.map(update_accumulator, [(MeanVariance(), np.array([1.0, 3.0]))] * 2, [True, True])
+        self.assertEqual([(accumulator.count, accumulator.mean) for accumulator in updated], [(2, 2.0), (2, 2.0)])
+
+    def test_parallel_step_matches_serial(self):
+        """Test that a step gives the same result with parallel workers"""
+        expected = EncodeCategorical.process(self.data.copy(), ['city'], 'regression')
+        with ColumnExecutor(workers=2) as executor:
+            result = EncodeCategorical.process(self.data.copy(), ['city'], 'regression', executor=executor)
+        self.assertEqual(result.headers, expected.headers)
+        for column in expected.headers:
+            self.assertEqual(result.to_list(column), expected.to_list(column))
+
+
+if __name__ == '__main__':
+    unittest.main()
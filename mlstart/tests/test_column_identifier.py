@@ -1,5 +1,7 @@
 import unittest
 from mlstart.core.column_identifier import ColumnIdentifier
+from mlstart.core.data_loader import DataLoader
+from mlstart.core.dataset import ColumnarDataset
 
 class TestColumnIdentifier(unittest.TestCase):
 
@@ -77,7 +79,8 @@ class TestColumnIdentifier(unittest.TestCase):
             {"age": "25", "salary": "50000", "city": "Boston"},
             {"age": "thirty", "salary": "60000", "city": "Seattle"},
         ]
-        column_identifier = ColumnIdentifier(data)
+        # Half of the ages fail to parse, far more than the default allows
+        column_identifier = ColumnIdentifier(data, max_failure_rate=0.5)
         numeric_columns, categorical_columns = column_identifier.identify_column_types()
 
         self.assertEqual(numeric_columns, ["age", "salary"])
@@ -91,5 +94,78 @@ class TestColumnIdentifier(unittest.TestCase):
             column_identifier.identify_column_types()
         self.assertIn("Dataset is empty or improperly formatted", str(context.exception))
 
+    def test_type_decided_by_failure_rate(self):
+        """Test that a single value does not decide the type of a column."""
+        data = [{"code": str(i) if i == 0 else f"A{i}", "price": "n/a" if i == 0 else str(10 + i)} for i in range(25)]
+        column_identifier = ColumnIdentifier(data)
+        numeric_columns, categorical_columns = column_identifier.identify_column_types()
+
+        self.assertEqual(numeric_columns, ["price"])
+        self.assertEqual(categorical_columns, ["code"])
+        self.assertEqual(column_identifier.column_stats["code"]["failure_rate"], 0.96)
+        self.assertEqual(column_identifier.column_stats["price"]["failure_rate"], 0.04)
+
+    def test_mixed_column_stays_categorical(self):
+        """Test that a column with a sizable share of text values stays categorical, so no text is discarded."""
+        data = [{"size": size} for size in ["1", "2", "S", "3", "M", "4", "L", "5", "XL", "6"]]
+        column_identifier = ColumnIdentifier(data)
+        numeric_columns, categorical_columns = column_identifier.identify_column_types()
+
+        self.assertEqual(column_identifier.column_stats["size"]["failure_rate"], 0.4)
+        self.assertEqual((numeric_columns, categorical_columns), ([], ["size"]))
+
+    def test_column_stats(self):
+        """Test the null rate and cardinality recorded for each column."""
+        data = ColumnarDataset.from_rows([
+            {"age": "25", "city": "Boston"},
+            {"age": "?", "city": "Boston"},
+            {"age": "30", "city": "Seattle"},
+            {"age": None, "city": None},
+        ])
+        column_identifier = ColumnIdentifier(data)
+        column_identifier.identify_column_types()
+
+        self.assertEqual(column_identifier.column_stats["age"],
+                         {"null_rate": 0.5, "failure_rate": 0.0, "cardinality": 2, "sample_size": 4})
+        self.assertEqual(column_identifier.column_stats["city"]["cardinality"], 2)
+        self.assertEqual(column_identifier.column_stats["city"]["null_rate"], 0.25)
+
+    def test_sample_size(self):
+        """Test that only a sample of the rows is profiled when a sample size is given."""
+        _, dataset = DataLoader("data/auto_mpg.csv").load_dataset()
+        column_identifier = ColumnIdentifier(dataset, sample_size=50)
+        numeric_columns, categorical_columns = column_identifier.identify_column_types()
+
+        self.assertEqual(categorical_columns, ["car name"])
+        self.assertIn("horsepower", numeric_columns)
+        self.assertEqual(column_identifier.column_stats["mpg"]["sample_size"], 50)
+
+    def test_compact_dtypes(self):
+        """Test that columns are converted to compact dtypes without changing their values."""
+        _, dataset = DataLoader("data/auto_mpg.csv").load_dataset()
+        expected = {column: dataset.to_list(column) for column in dataset.headers}
+        column_identifier = ColumnIdentifier(dataset)
+        compact = column_identifier.compact_dtypes()
+
+        self.assertEqual(column_identifier.column_stats["cylinders"]["dtype"], "int8")
+        self.assertEqual(column_identifier.column_stats["mpg"]["dtype"], "float32")
+        self.assertEqual(column_identifier.column_stats["car name"]["dtype"], "category")
+        self.assertEqual(compact.to_list("car name"), expected["car name"])
+        self.assertEqual(compact.masks["horsepower"].sum(), 6)
+        for column in ["mpg", "cylinders", "acceleration"]:
+            self.assertEqual(compact.columns[column].astype(str).astype(float).tolist(), expected[column])
+
+    def test_hash_threshold(self):
+        """Test that high-cardinality categorical columns are routed to feature hashing."""
+        _, dataset = DataLoader("data/auto_mpg.csv").load_dataset()
+        column_identifier = ColumnIdentifier(dataset, hash_threshold=100)
+        column_identifier.identify_column_types()
+        self.assertGreater(column_identifier.column_stats["car name"]["cardinality"], 100)
+        self.assertEqual(column_identifier.hashed_columns, ["car name"])
+
+        column_identifier = ColumnIdentifier(dataset)
+        column_identifier.identify_column_types()
+        self.assertEqual(column_identifier.hashed_columns, [])
+
 if __name__ == "__main__":
     unittest.main()
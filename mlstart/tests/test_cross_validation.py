@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+from sklearn.base import BaseEstimator
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from mlstart.core.column_identifier import ColumnIdentifier
+from mlstart.core.data_loader import DataLoader
+from mlstart.models.cross_validation import CrossValidator
+from mlstart.models.model_comparison import ModelComparator
+from mlstart.processing.preprocessor_pipeline import PreprocessorPipeline
+
+
+class FailingModel(BaseEstimator):
+
+    def fit(self, X, y):
+        raise ValueError("cannot fit")
+
+
+class TestCrossValidator(unittest.TestCase):
+
+    def setUp(self):
+        """Load a sample classification dataset"""
+        self.data = DataLoader("data/Iris.csv").load_dataset()[1]
+        self.numeric_columns, self.categorical_columns = ColumnIdentifier(self.data).identify_column_types()
+        self.models = [
+            ("Logistic Regression", LogisticRegression(max_iter=200)),
+            ("Decision Tree", DecisionTreeClassifier(random_state=42)),
+        ]
+
+    def preprocess_folds(self, cross_validator):
+        return cross_validator.preprocess_folds(self.data, "Species", PreprocessorPipeline("classification"),
+                                                self.numeric_columns, self.categorical_columns)
+
+    def test_folds_are_stratified(self):
+        """Test that every fold holds out each class in proportion and the folds cover every row once"""
+        folds = CrossValidator("classification", n_folds=5).split(self.data, "Species")
+        self.assertEqual(len(folds), 5)
+        self.assertEqual(sorted(np.concatenate([test for _, test in folds]).tolist()), list(range(len(self.data))))
+        species = self.data.decode("Species")
+        for train, test in folds:
+            self.assertEqual(len(np.intersect1d(train, test)), 0)
+            _, counts = np.unique(species[test].astype(str), return_counts=True)
+            self.assertEqual(counts.tolist(), [10, 10, 10])
+
+    def test_preprocessing_is_fitted_per_fold(self):
+        """Test that the scaling of each fold is fitted on its training rows and applied to its test rows"""
+        cross_validator = CrossValidator("classification", n_folds=3)
+        folds = self.preprocess_folds(cross_validator)
+        for (X_train, y_train, X_test, y_test), (_, test_rows) in zip(folds, cross_validator.split(self.data, "Species")):
+            np.testing.assert_allclose(X_train.mean(axis=0), 0.0, atol=1e-9)
+            self.assertEqual(X_test.shape, (len(test_rows), X_train.shape[1]))
+            self.assertEqual(len(y_test), len(test_rows))
+            self.assertTrue(np.abs(X_test.mean(axis=0)).max() > 1e-6)
+
+    def test_class_of_one_fold_is_left_out_of_its_test_rows(self):
+        """Test that test rows of a class missing from the training rows of their fold are left out, not relabelled"""
+        species = self.data.decode("Species")
+        species[0] = "Iris-rare"
+        self.data.set_column("Species", species)
+        cross_validator = CrossValidator("classification", n_folds=3)
+        folds = self.preprocess_folds(cross_validator)
+
+        for (_, y_train, _, y_test), (_, test_rows) in zip(folds, cross_validator.split(self.data, "Species")):
+            if 0 not in test_rows:
+                self.assertEqual(len(y_test), len(test_rows))
+                continue
+            kept = species[test_rows[test_rows != 0]].astype(str)
+            classes = np.unique(species[np.arange(1, len(species))].astype(str)).tolist()
+            self.assertEqual(y_test.tolist(), [classes.index(label) for label in kept])
+            self.assertTrue(set(y_test.tolist()) <= set(y_train.tolist()))
+
+    def test_parallel_matches_serial(self):
+        """Test that training the folds on worker processes gives the same metrics as in the calling process"""
+        serial = CrossValidator("classification", n_folds=3, workers=1)
+        folds = self.preprocess_folds(serial)
+        expected = serial.cross_validate(self.models, folds)
+        result = CrossValidator("classification", n_folds=3, workers=2).cross_validate(self.models, folds)
+        self.assertEqual(result, expected)
+        self.assertEqual([len(metrics) for metrics in result.values()], [3, 3])
+
+        best_model_name, model_metrics, total_ranks = ModelComparator("classification").compare_fold_metrics(result)
+        self.assertIn(best_model_name, model_metrics)
+        self.assertAlmostEqual(model_metrics["Decision Tree"]["Accuracy"],
+                               np.mean([metrics["Accuracy"] for metrics in result["Decision Tree"]]))
+
+    def test_failing_model_is_left_out(self):
+        """Test that a model failing to train is reported and left out, without affecting the others"""
+        for workers in (1, 2):
+            cross_validator = CrossValidator("classification", n_folds=3, workers=workers)
+            result = cross_validator.cross_validate(self.models + [("Failing", FailingModel())],
+                                                    self.preprocess_folds(cross_validator))
+            self.assertEqual(list(result), ["Logistic Regression", "Decision Tree"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from mlstart.core.data_loader import DataLoader
+from mlstart.core.dataset import ColumnarDataset
 
 class TestDataLoader(unittest.TestCase):
     def test_valid_file(self):
@@ -33,4 +34,75 @@ class TestDataLoader(unittest.TestCase):
         data_loader = DataLoader("data/partial_valid.csv")
         headers, data = data_loader.load_data()
         self.assertIsNotNone(headers)
-        self.assertGreater(len(data), 0) 
\ No newline at end of file
+        self.assertGreater(len(data), 0)
+
+    def test_load_dataset(self):
+        """Test loading a CSV file into a typed columnar dataset."""
+        headers, dataset = DataLoader("data/auto_mpg.csv").load_dataset()
+        _, rows = DataLoader("data/auto_mpg.csv").load_data()
+        self.assertIsInstance(dataset, ColumnarDataset)
+        self.assertEqual(dataset.headers, headers)
+        self.assertEqual(len(dataset), len(rows))
+        self.assertTrue(dataset.is_numeric("mpg"))
+        self.assertFalse(dataset.is_numeric("car name"))
+        # 'horsepower' contains '?' entries, which are masked at load time
+        self.assertTrue(dataset.is_numeric("horsepower"))
+        self.assertTrue(dataset.masks["horsepower"].any())
+
+    def test_load_dataset_partially_valid_file(self):
+        """Test that short rows are padded with missing values when loading a dataset."""
+        headers, dataset = DataLoader("data/partial_valid.csv").load_dataset()
+        _, rows = DataLoader("data/partial_valid.csv").load_data()
+        self.assertEqual(len(dataset), len(rows))
+        self.assertTrue(dataset.masks["origin"].any())
+
+    def test_iter_batches(self):
+        """Test streaming a CSV file in fixed-size batches."""
+        _, dataset = DataLoader("data/auto_mpg.csv").load_dataset()
+        batches = list(DataLoader("data/auto_mpg.csv").iter_batches(batch_size=100))
+        self.assertEqual([len(batch) for batch in batches], [100, 100, 100, len(dataset) - 300])
+        self.assertEqual(ColumnarDataset.concat(batches).to_list("mpg"), dataset.to_list("mpg"))
+
+    def test_iter_batches_text_columns(self):
+        """Test that text columns stay text even in batches where every value is numeric."""
+        batch = next(DataLoader("data/auto_mpg.csv").iter_batches(batch_size=10, text_columns=["origin"]))
+        self.assertFalse(batch.is_numeric("origin"))
+        self.assertEqual(batch.to_list("origin")[0], "1")
+
+    def test_load_dataset_skips_blank_columns(self):
+        """Test that columns with a blank name are not parsed."""
+        headers, dataset = DataLoader("data/Breast_Cancer_Wisconsin.csv").load_dataset()
+        self.assertNotIn("", headers)
+        self.assertEqual(dataset.headers, headers)
+
+    def test_load_dataset_columns(self):
+        """Test that only the requested columns are parsed, in file order."""
+        headers, dataset = DataLoader("data/auto_mpg.csv", columns=["weight", "mpg"]).load_dataset()
+        self.assertEqual(headers, ["mpg", "weight"])
+        self.assertEqual(dataset.headers, ["mpg", "weight"])
+        _, full = DataLoader("data/auto_mpg.csv").load_dataset()
+        self.assertEqual(dataset.to_list("weight"), full.to_list("weight"))
+
+    def test_load_dataset_exclude_columns(self):
+        """Test that excluded columns are skipped by every loading method."""
+        data_loader = DataLoader("data/auto_mpg.csv", exclude_columns=["car name", "origin"])
+        headers, dataset = data_loader.load_dataset()
+        self.assertNotIn("car name", headers)
+        self.assertEqual(len(headers), 7)
+        self.assertEqual(data_loader.read_headers(), headers)
+        self.assertEqual(next(data_loader.iter_batches(batch_size=10)).headers, headers)
+        rows_headers, rows = DataLoader("data/auto_mpg.csv", exclude_columns=["car name", "origin"]).load_data()
+        self.assertEqual(rows_headers, headers)
+        self.assertEqual(list(rows[0].keys()), headers)
+
+    def test_load_dataset_unknown_column(self):
+        """Test that requesting a column that is not in the file raises an error."""
+        with self.assertRaises(ValueError) as context:
+            DataLoader("data/auto_mpg.csv", columns=["mpg", "colour"]).load_dataset()
+        self.assertIn("colour", str(context.exception))
+
+    def test_load_dataset_empty_file(self):
+        """Test behavior with an empty CSV file when loading a dataset."""
+        with self.assertRaises(ValueError) as context:
+            DataLoader("data/empty.csv").load_dataset()
+        self.assertIn("The CSV file is empty", str(context.exception))
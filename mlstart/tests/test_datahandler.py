@@ -1,6 +1,9 @@
 import unittest
+from scipy import sparse
+import numpy as np
 from sklearn.model_selection import train_test_split
 from mlstart.processing.datahandler import DataHandler
+from mlstart.core.dataset import ColumnarDataset
 
 class TestDataHandler(unittest.TestCase):
 
@@ -47,6 +50,16 @@ class TestDataHandler(unittest.TestCase):
         for row in X:
             self.assertTrue(all(isinstance(val, float) for val in row))
 
+    def test_split_columnar_dataset(self):
+        """Test splitting a ColumnarDataset into a feature matrix and target vector"""
+        dataset = ColumnarDataset.from_rows(self.data)
+        handler = DataHandler(dataset, self.target_column, task_type='classification')
+        X, y = handler.split_features_and_target()
+
+        self.assertEqual(X.shape, (5, 2))
+        self.assertEqual(X[0].tolist(), [25.0, 5000.0])
+        self.assertEqual(y.tolist(), [0, 1, 0, 1, 0])
+
     def test_invalid_task_type(self):
         """Test invalid task type raises a ValueError"""
         handler = DataHandler(self.data, self.target_column, task_type='invalid')
@@ -92,5 +105,54 @@ class TestDataHandler(unittest.TestCase):
         self.assertEqual(y_train1, y_train2)
         self.assertEqual(y_test1, y_test2)
 
+    def test_split_sparse_one_hot_columns(self):
+        """Test that one-hot columns are appended to the features as a CSR block"""
+        dataset = ColumnarDataset.from_rows(self.data)
+        dataset.set_column('city', np.array([0, 1, 2, 0, 1], dtype=np.int8),
+                           categories=np.array(['A', 'B', 'C'], dtype=object), one_hot=True)
+        handler = DataHandler(dataset, self.target_column, task_type='regression')
+        X, y = handler.split_features_and_target()
+
+        self.assertTrue(sparse.isspmatrix_csr(X))
+        self.assertEqual(X.shape, (5, 5))
+        self.assertEqual(X[1].toarray().tolist(), [[30.0, 6000.0, 0.0, 1.0, 0.0]])
+
+        X_train, X_test, _, _ = handler.train_test_splitting()
+        self.assertEqual((X_train.shape[0], X_test.shape[0]), (4, 1))
+
+    def test_columnar_split_matches_train_test_split(self):
+        """Test that the permuted columnar split draws the same rows as train_test_split, as views of one array"""
+        dataset = ColumnarDataset.from_rows(self.data * 4)
+        handler = DataHandler(dataset, self.target_column, task_type='regression')
+        expected = train_test_split(*handler.split_features_and_target(), test_size=0.25, random_state=7)
+        result = handler.train_test_splitting(test_size=0.25, random_state=7)
+
+        for actual, wanted in zip(result, expected):
+            self.assertEqual(actual.tolist(), wanted.tolist())
+        X_train, X_test = result[:2]
+        self.assertTrue(X_train.flags.c_contiguous and X_test.flags.c_contiguous)
+        self.assertIs(X_train.base, X_test.base)
+
+    def test_float32_features(self):
+        """Test that the feature matrix can be built in float32"""
+        dataset = ColumnarDataset.from_rows(self.data)
+        handler = DataHandler(dataset, self.target_column, task_type='classification', dtype=np.float32)
+        X, y = handler.split_features_and_target()
+        X_train, _, y_train, _ = handler.train_test_splitting()
+
+        self.assertEqual((X.dtype, X_train.dtype), (np.float32, np.float32))
+        self.assertEqual(X[1].tolist(), [30.0, 6000.0])
+        self.assertEqual(y_train.dtype, np.int64)
+
+    def test_missing_target_raises(self):
+        """Test that a missing target value raises instead of becoming class 0"""
+        dataset = ColumnarDataset.from_rows(self.data)
+        dataset.set_column(self.target_column, dataset.columns[self.target_column],
+                           np.array([False, False, True, False, False]))
+        handler = DataHandler(dataset, self.target_column, task_type='classification')
+
+        with self.assertRaises(ValueError):
+            handler.split_features_and_target()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset, compact_column, parse_column, to_float64
+
+class TestColumnarDataset(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a sample row-oriented dataset for testing"""
+        self.rows = [
+            {'age': '25', 'salary': '5000', 'city': 'Boston'},
+            {'age': '?', 'salary': '6000', 'city': ''},
+            {'age': '35', 'salary': 'NaN', 'city': 'Seattle'},
+        ]
+
+    def test_parse_numeric_column(self):
+        """Test that numeric columns are parsed once into float arrays with a missing mask"""
+        values, mask = parse_column(['1', ' 2.5 ', 'null', ''])
+        self.assertEqual(values.dtype, np.float64)
+        self.assertEqual(values[:2].tolist(), [1.0, 2.5])
+        self.assertEqual(mask.tolist(), [False, False, True, True])
+
+    def test_parse_text_column(self):
+        """Test that text columns keep the original values and mask missing tokens"""
+        values, mask = parse_column(['red', '?', '3'])
+        self.assertEqual(values.dtype, object)
+        self.assertEqual(values.tolist(), ['red', None, '3'])
+        self.assertEqual(mask.tolist(), [False, True, False])
+
+    def test_from_rows(self):
+        """Test building a dataset from rows"""
+        dataset = ColumnarDataset.from_rows(self.rows)
+        self.assertEqual(dataset.headers, ['age', 'salary', 'city'])
+        self.assertEqual(len(dataset), 3)
+        self.assertTrue(dataset.is_numeric('age'))
+        self.assertFalse(dataset.is_numeric('city'))
+        self.assertEqual(dataset.masks['salary'].tolist(), [False, False, True])
+
+    def test_to_rows(self):
+        """Test the row-oriented compatibility view"""
+        rows = ColumnarDataset.from_rows(self.rows).to_rows()
+        self.assertEqual(rows[0], {'age': 25.0, 'salary': 5000.0, 'city': 'Boston'})
+        self.assertEqual(rows[1], {'age': None, 'salary': 6000.0, 'city': None})
+
+    def test_take_and_select(self):
+        """Test row and column subsets share arrays without modifying the original"""
+        dataset = ColumnarDataset.from_rows(self.rows)
+        subset = dataset.take(np.array([0, 2])).select(['age', 'city'])
+        self.assertEqual(subset.headers, ['age', 'city'])
+        self.assertEqual(subset.to_list('age'), [25.0, 35.0])
+        self.assertEqual(len(dataset), 3)
+
+    def test_column_length_mismatch(self):
+        """Test that columns of different lengths are rejected"""
+        with self.assertRaises(ValueError):
+            ColumnarDataset({'a': np.zeros(3), 'b': np.zeros(2)})
+
+    def test_compact_numeric_columns(self):
+        """Test that numeric columns get the narrowest lossless dtype"""
+        mask = np.array([False, False, True])
+        cases = [
+            ([0.0, 1.0, np.nan], np.bool_),
+            ([-3.0, 100.0, np.nan], np.int8),
+            ([-3.0, 1000.0, np.nan], np.int16),
+            ([5.1, 0.25, np.nan], np.float32),
+            ([0.1 + 0.2, 1.0, np.nan], np.float64),
+        ]
+        for values, dtype in cases:
+            compact, categories = compact_column(np.array(values), mask)
+            self.assertEqual(compact.dtype, dtype)
+            self.assertIsNone(categories)
+            self.assertTrue(np.array_equal(compact[:2], np.array(values[:2], dtype=dtype)))
+
+    def test_float32_column_restores_exact_values(self):
+        """Test that a compact float32 column converts back to the float64 values it was compacted from"""
+        values = np.array([5.1, 0.25, 24.7, 5.1, 0.00632])
+        compact, _ = compact_column(values, np.zeros(len(values), dtype=bool))
+        self.assertEqual(compact.dtype, np.float32)
+        self.assertFalse(np.array_equal(compact.astype(np.float64), values))
+        self.assertEqual(to_float64(compact).tolist(), values.tolist())
+
+    def test_dictionary_encoded_column(self):
+        """Test that text columns are dictionary-encoded and decoded back to the same values"""
+        dataset = ColumnarDataset.from_rows(self.rows)
+        codes, categories = compact_column(dataset.decode('city'), dataset.masks['city'])
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertEqual(categories.tolist(), ['Boston', 'Seattle'])
+        self.assertEqual(dataset.columns['city'].tolist(), codes.tolist())
+        self.assertEqual(dataset.categories['city'].tolist(), categories.tolist())
+
+        dataset.set_column('city', codes, dataset.masks['city'], categories)
+        self.assertFalse(dataset.is_numeric('city'))
+        self.assertEqual(dataset.to_list('city'), ['Boston', None, 'Seattle'])
+        self.assertEqual(dataset.take(np.array([2, 0])).to_list('city'), ['Seattle', 'Boston'])
+        combined = ColumnarDataset.concat([dataset, dataset])
+        self.assertIn('city', combined.categories)
+        self.assertEqual(combined.to_list('city'), ['Boston', None, 'Seattle'] * 2)
+
+    def test_one_hot_column(self):
+        """Test that one-hot columns survive row and column selection and build a CSR matrix"""
+        dataset = ColumnarDataset({'city': np.array([1, 0, 0, 1], dtype=np.int8), 'x': np.arange(4.0)},
+                                  {'city': np.array([False, False, True, False])},
+                                  {'city': np.array(['Boston', 'Seattle'], dtype=object)},
+                                  one_hot_columns=['city'])
+        subset = dataset.take(np.array([0, 2, 3])).select(['city'])
+        self.assertEqual(subset.one_hot_columns, {'city'})
+        self.assertEqual(subset.one_hot_matrix('city').toarray().tolist(), [[0, 1], [0, 0], [0, 1]])
+
+        combined = ColumnarDataset.concat([dataset, dataset])
+        self.assertEqual(combined.one_hot_matrix('city').shape, (8, 2))
+
+        dataset.set_column('city', np.zeros(4))
+        self.assertEqual(dataset.one_hot_columns, set())
+
+    def test_text_columns_are_dictionary_encoded_at_parse_time(self):
+        """Test that text columns are parsed into codes and a sorted table of distinct values"""
+        dataset = ColumnarDataset.from_raw_columns(
+            ['city', 'count'], [['b', 'a', 'NULL', 'b', ' ? '], ['1', '', '3', 'nan', '5']])
+        self.assertEqual(dataset.categories['city'].tolist(), ['a', 'b'])
+        self.assertEqual(dataset.columns['city'].tolist(), [1, 0, -1, 1, -1])
+        self.assertEqual(dataset.columns['city'].dtype, np.int8)
+        self.assertEqual(dataset.masks['city'].tolist(), [False, False, True, False, True])
+        self.assertTrue(dataset.is_numeric('count'))
+        self.assertEqual(dataset.to_list('count'), [1.0, None, 3.0, None, 5.0])
+
+        parts = [ColumnarDataset.from_raw_columns(['city'], [values]) for values in (['b', 'c'], ['a', '', 'c'])]
+        combined = ColumnarDataset.concat(parts)
+        self.assertEqual(combined.categories['city'].tolist(), ['a', 'b', 'c'])
+        self.assertEqual(combined.to_list('city'), ['b', 'c', 'a', None, 'c'])
+
+if __name__ == '__main__':
+    unittest.main()
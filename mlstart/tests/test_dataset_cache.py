@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mlstart.core.data_loader import DataLoader
+from mlstart.core.dataset_cache import DatasetCache
+
+class TestDatasetCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a temporary cache directory and a copy of a sample dataset"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "auto_mpg.csv")
+        shutil.copy("data/auto_mpg.csv", self.file_path)
+        self.cache = DatasetCache(os.path.join(self.temp_dir, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        """Test that a cached dataset is identical to the parsed dataset"""
+        headers, dataset = DataLoader(self.file_path).load_dataset(cache=self.cache)
+        cached_headers, cached = self.cache.load(self.file_path)
+
+        self.assertEqual(cached_headers, headers)
+        for column in headers:
+            self.assertEqual(cached.columns[column].dtype, dataset.columns[column].dtype)
+            self.assertEqual(cached.to_list(column), dataset.to_list(column))
+
+    def test_numeric_columns_are_memory_mapped(self):
+        """Test that cached numeric columns are memory-mapped and read-only"""
+        DataLoader(self.file_path).load_dataset(cache=self.cache)
+        _, cached = DataLoader(self.file_path).load_dataset(cache=self.cache)
+        self.assertFalse(cached.columns["mpg"].flags.writeable)
+
+    def test_miss_before_store(self):
+        """Test that a file that was never stored is not found in the cache"""
+        self.assertIsNone(self.cache.load(self.file_path))
+
+    def test_changed_content_invalidates_entry(self):
+        """Test that modifying the file produces a different fingerprint"""
+        DataLoader(self.file_path).load_dataset(cache=self.cache)
+        with open(self.file_path, "a") as file:
+            file.write("20,4,100,90,2000,15,80,1,test car\n")
+        self.assertIsNone(self.cache.load(self.file_path))
+
+    def test_touched_file_reuses_entry(self):
+        """Test that a new modification time with the same content still hits the cache"""
+        before = self.cache.fingerprint(self.file_path)
+        DataLoader(self.file_path).load_dataset(cache=self.cache)
+        stat = os.stat(self.file_path)
+        os.utime(self.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.cache.fingerprint(self.file_path), before)
+        self.assertIsNotNone(self.cache.load(self.file_path))
+
+    def test_projected_load_uses_full_entry(self):
+        """Test that a projected load maps only the requested columns of a full entry"""
+        DataLoader(self.file_path).load_dataset(cache=self.cache)
+        headers, cached = DataLoader(self.file_path, columns=["mpg", "car name"]).load_dataset(cache=self.cache)
+        self.assertEqual(headers, ["mpg", "car name"])
+        self.assertEqual(cached.headers, headers)
+        self.assertFalse(cached.columns["mpg"].flags.writeable)
+
+    def test_projected_entries_are_separate(self):
+        """Test that a projected load does not stand in for a full load"""
+        DataLoader(self.file_path, exclude_columns=["car name"]).load_dataset(cache=self.cache)
+        self.assertIsNone(self.cache.load(self.file_path))
+        headers, _ = DataLoader(self.file_path, exclude_columns=["car name"]).load_dataset(cache=self.cache)
+        self.assertNotIn("car name", headers)
+        self.assertIsNotNone(self.cache.load(self.file_path, headers))
+
+    def test_text_columns_are_cached_as_codes(self):
+        """Test that cached text columns come back dictionary-encoded and memory-mapped"""
+        DataLoader(self.file_path).load_dataset(cache=self.cache)
+        _, cached = DataLoader(self.file_path).load_dataset(cache=self.cache)
+        self.assertIn("car name", cached.categories)
+        self.assertFalse(cached.columns["car name"].flags.writeable)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
 import unittest
+from mlstart.core.dataset import ColumnarDataset
+import numpy as np
 from mlstart.preprocessors.encode_categorical import EncodeCategorical
 
 class TestEncodeCategorical(unittest.TestCase):
@@ -43,5 +45,33 @@ class TestEncodeCategorical(unittest.TestCase):
         # Assertions for no categorical columns
         self.assertEqual(encoded_data, expected_data)
 
+    def test_fit_transform_unseen_category(self):
+        """Test that fitted categories are reused and unseen values are treated as missing"""
+        train = ColumnarDataset.from_rows([{"color": "red"}, {"color": "blue"}, {"color": "red"}])
+        state = EncodeCategorical.fit(train, ["color"])
+        self.assertEqual(state, {"categories": {"color": ["blue", "red"]}})
+
+        new = ColumnarDataset.from_rows([{"color": "red"}, {"color": "green"}, {"color": "blue"}])
+        labels = EncodeCategorical.transform(new.copy(), state, "classification")
+        self.assertEqual(labels.to_list("color"), [1, None, 0])
+
+        one_hot = EncodeCategorical.transform(new, state, "regression")
+        self.assertEqual(one_hot.headers, ["color_blue", "color_red"])
+        self.assertEqual(one_hot.columns["color_red"].tolist(), [1, 0, 0])
+        self.assertEqual(one_hot.columns["color_blue"].tolist(), [0, 0, 1])
+
+    def test_sparse_one_hot_encoding(self):
+        """Test that sparse mode keeps one code column that expands to the dense indicators"""
+        rows = [{"color": "red"}, {"color": "blue"}, {"color": ""}, {"color": "green"}]
+        dense = EncodeCategorical.process(ColumnarDataset.from_rows(rows), ["color"], "regression")
+        encoded = EncodeCategorical.process(ColumnarDataset.from_rows(rows), ["color"], "regression", sparse=True)
+
+        self.assertEqual(encoded.headers, ["color"])
+        self.assertEqual(encoded.one_hot_columns, {"color"})
+        matrix = encoded.one_hot_matrix("color")
+        self.assertEqual(matrix.nnz, 3)
+        expected = np.column_stack([dense.columns[column] for column in dense.headers])
+        self.assertEqual(matrix.toarray().tolist(), expected.tolist())
+
 if __name__ == "__main__":
     unittest.main()
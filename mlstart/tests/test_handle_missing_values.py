@@ -0,0 +1,44 @@
+import unittest
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.preprocessors.handle_missing_values import HandleMissingValues
+
+class TestHandleMissingValues(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a sample dataset for testing"""
+        self.data = [
+            {'age': 20.0, 'city': 'Boston'},
+            {'age': None, 'city': 'Seattle'},
+            {'age': 40.0, 'city': None},
+            {'age': 30.0, 'city': 'Seattle'},
+        ]
+
+    def test_impute_mean_and_mode(self):
+        """Test that numeric gaps get the mean and categorical gaps the mode"""
+        result = HandleMissingValues.process(self.data, ['age'], ['city'])
+        self.assertEqual(result[1]['age'], 30.0)
+        self.assertEqual(result[2]['city'], 'Seattle')
+
+    def test_fit_transform(self):
+        """Test that new data is imputed with the values fitted on the training data"""
+        train = ColumnarDataset.from_rows([{'age': str(row['age']), 'city': row['city'] or ''} for row in self.data])
+        state = HandleMissingValues.fit(train, ['age'], ['city'])
+        self.assertEqual(state, {'means': {'age': 30.0}, 'modes': {'city': 'Seattle'}})
+
+        new = ColumnarDataset.from_rows([{'age': '', 'city': ''}, {'age': '50', 'city': 'Boston'}])
+        result = HandleMissingValues.transform(new, state)
+        self.assertEqual(result.to_list('age'), [30.0, 50.0])
+        self.assertEqual(result.to_list('city'), ['Seattle', 'Boston'])
+
+    def test_bounded_mode_counters(self):
+        """Test that a mode capacity bounds the counters of a high-cardinality column and keeps its mode"""
+        rows = [{'id': f'user{i}' if i % 3 else 'guest'} for i in range(300)] + [{'id': ''}]
+        data = ColumnarDataset.from_rows(rows)
+        accumulators = HandleMissingValues.accumulate(data, [], ['id'], mode_capacity=10)
+        self.assertLessEqual(len(accumulators['id'].counts), 10)
+
+        result = HandleMissingValues.process(data, [], ['id'], mode_capacity=10)
+        self.assertEqual(result.to_list('id')[-1], 'guest')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
 import unittest
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset
 from mlstart.preprocessors.handle_outliers import HandleOutliers 
 
 class TestHandleOutliers(unittest.TestCase):
@@ -80,5 +82,64 @@ class TestHandleOutliers(unittest.TestCase):
         ]
         self.assertEqual(result, expected_result)
 
+    def test_fit_transform(self):
+        """Test that fitted bounds filter new rows on every column at once"""
+        train = ColumnarDataset.from_rows([{k: str(v) for k, v in row.items()} for row in self.data])
+        state = HandleOutliers.fit(train, self.numeric_columns)
+        self.assertEqual(set(state['bounds']), {'age', 'salary'})
+
+        new = ColumnarDataset.from_rows([
+            {'age': '30', 'salary': '6000'},
+            {'age': '500', 'salary': '6000'},
+            {'age': '30', 'salary': '90000'},
+        ])
+        result = HandleOutliers.transform(new, state)
+        self.assertEqual(result.to_list('age'), [30.0])
+
+    def test_iqr_bounds_match_sorted_quartiles(self):
+        """Test that partial selection finds the same quartiles as a full sort"""
+        values = np.random.default_rng(0).normal(size=1001)
+        sorted_values = np.sort(values)
+        q1, q3 = sorted_values[250], sorted_values[750]
+        self.assertEqual(HandleOutliers.iqr_bounds(values), [q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)])
+
+    def outlier_dataset(self):
+        """Build a dataset with one outlier in each column"""
+        rows = [{'age': str(20 + i), 'salary': str(5000 + 100 * i)} for i in range(20)]
+        rows[3]['age'] = '500'
+        rows[7]['salary'] = '90000'
+        return ColumnarDataset.from_rows(rows)
+
+    def test_dataset_columns_are_filtered_at_once(self):
+        """Test that the columnar result does not depend on the column order"""
+        dataset = self.outlier_dataset()
+        result = HandleOutliers.process(dataset.copy(), ['age', 'salary'])
+        reversed_result = HandleOutliers.process(dataset.copy(), ['salary', 'age'])
+        self.assertEqual(len(result), 18)
+        self.assertNotIn(500.0, result.to_list('age'))
+        self.assertNotIn(90000.0, result.to_list('salary'))
+        self.assertEqual(reversed_result.to_list('age'), result.to_list('age'))
+
+    def test_clip(self):
+        """Test that clipping keeps every row and moves outliers to the bounds"""
+        dataset = self.outlier_dataset()
+        upper_bound = HandleOutliers.fit(dataset, ['salary'])['bounds']['salary'][1]
+        rows = dataset.to_rows()
+        result = HandleOutliers.process(dataset, ['salary'], clip=True)
+        self.assertEqual(len(result), 20)
+        self.assertEqual(max(result.to_list('salary')), upper_bound)
+
+        rows = HandleOutliers.process(rows, ['salary'], clip=True)
+        self.assertEqual([row['salary'] for row in rows], result.to_list('salary'))
+
+    def test_streamed_bounds(self):
+        """Test that bounds fitted from quantile sketches over batches match the exact bounds"""
+        dataset = self.outlier_dataset()
+        expected = HandleOutliers.fit(dataset, ['age', 'salary'])
+        accumulators = {}
+        for start in range(0, 20, 6):
+            HandleOutliers.accumulate(dataset.take(np.arange(start, min(start + 6, 20))), ['age', 'salary'], accumulators)
+        self.assertEqual(HandleOutliers.finalize(accumulators), expected)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.preprocessors import hash_categorical
+from mlstart.preprocessors.hash_categorical import HashCategorical
+
+class TestHashCategorical(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a sample dataset with an ID-like column"""
+        self.rows = [{'user': f'u{i % 50}', 'x': str(i)} for i in range(200)]
+        self.rows[3]['user'] = ''
+
+    def object_dataset(self):
+        """Build the sample dataset with the ID-like column stored as an object array"""
+        dataset = ColumnarDataset.from_rows(self.rows)
+        dataset.set_column('user', dataset.decode('user'), dataset.masks['user'])
+        return dataset
+
+    def test_bounded_buckets(self):
+        """Test that values are hashed into at most n_buckets sparse indicators"""
+        dataset = HashCategorical.process(ColumnarDataset.from_rows(self.rows), ['user'], n_buckets=8)
+        self.assertEqual(dataset.one_hot_columns, {'user'})
+        matrix = dataset.one_hot_matrix('user')
+        self.assertEqual(matrix.shape, (200, 8))
+        self.assertEqual(matrix.nnz, 199)  # The missing value gets no indicator
+        self.assertTrue(dataset.masks['user'][3])
+
+    def test_equal_values_share_a_bucket(self):
+        """Test that hashing is the same for plain, dictionary-encoded and chunked columns"""
+        plain = HashCategorical.process(self.object_dataset(), ['user'], n_buckets=16)
+        dataset = ColumnarDataset.from_rows(self.rows)
+        self.assertIn('user', dataset.categories)
+        encoded = HashCategorical.process(dataset, ['user'], n_buckets=16)
+        self.assertEqual(encoded.columns['user'].tolist(), plain.columns['user'].tolist())
+
+        chunk_size = hash_categorical.CHUNK_SIZE
+        hash_categorical.CHUNK_SIZE = 7
+        try:
+            chunked = HashCategorical.process(self.object_dataset(), ['user'], n_buckets=16)
+        finally:
+            hash_categorical.CHUNK_SIZE = chunk_size
+        self.assertEqual(chunked.columns['user'].tolist(), plain.columns['user'].tolist())
+
+        users = np.array([row['user'] for row in self.rows])
+        first = plain.columns['user'][users == 'u7']
+        self.assertEqual(len(set(first.tolist())), 1)
+
+    def test_invalid_input(self):
+        """Test that rows and empty bucket counts are rejected"""
+        with self.assertRaises(ValueError):
+            HashCategorical.process(self.rows, ['user'])
+        with self.assertRaises(ValueError):
+            HashCategorical.fit(ColumnarDataset.from_rows(self.rows), ['user'], n_buckets=0)
+
+if __name__ == '__main__':
+    unittest.main()
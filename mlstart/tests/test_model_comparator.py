@@ -76,6 +76,19 @@ class TestModelComparator(unittest.TestCase):
         mse = model_metrics[best_model_name]["MSE"]
         self.assertLess(mse, 50) 
 
+    def test_compare_fold_metrics(self):
+        """Test that models are ranked on their metrics averaged over cross-validation folds."""
+        fold_metrics = {
+            "Linear Regression": [{"MAE": 1.0, "MSE": 2.0, "RMSE": 1.5}, {"MAE": 3.0, "MSE": 4.0, "RMSE": 2.0}],
+            "Decision Tree": [{"MAE": 1.5, "MSE": 2.5, "RMSE": 1.6}, {"MAE": 1.5, "MSE": 2.5, "RMSE": 1.6}],
+        }
+        model_comparator = ModelComparator(task_type="regression")
+        best_model_name, model_metrics, total_ranks = model_comparator.compare_fold_metrics(fold_metrics)
+
+        self.assertEqual(model_metrics["Linear Regression"], {"MAE": 2.0, "MSE": 3.0, "RMSE": 1.75})
+        self.assertEqual(best_model_name, "Decision Tree")
+        self.assertEqual(total_ranks["Decision Tree"]["average_rank"], 1.0)
+
     def test_invalid_task_type(self):
         """Test that an invalid task type raises a ValueError."""
         with self.assertRaises(ValueError):
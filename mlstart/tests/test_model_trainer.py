@@ -1,4 +1,7 @@
+import time
 import unittest
+import numpy as np
+from scipy import sparse
 from sklearn.datasets import load_iris, fetch_california_housing
 from sklearn.linear_model import LogisticRegression, LinearRegression, Ridge
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
@@ -6,6 +9,40 @@ from sklearn.neighbors import KNeighborsClassifier
 from sklearn.model_selection import train_test_split
 from mlstart.models.model_trainer import ModelTrainer
 
+class DenseOnlyClassifier(DecisionTreeClassifier):
+    """A classifier that rejects sparse input, like estimators without sparse support."""
+
+    def __sklearn_tags__(self):
+        tags = super().__sklearn_tags__()
+        tags.input_tags.sparse = False
+        return tags
+
+    def fit(self, X, y):
+        if sparse.issparse(X):
+            raise TypeError("Sparse input is not supported.")
+        return super().fit(X, y)
+
+class FailingClassifier(DecisionTreeClassifier):
+    """A classifier that always fails to train."""
+
+    def fit(self, X, y):
+        raise ValueError("cannot fit")
+
+class SlowClassifier(DecisionTreeClassifier):
+    """A classifier that takes too long to train."""
+
+    def fit(self, X, y):
+        time.sleep(60)
+        return super().fit(X, y)
+
+class MemoryHungryClassifier(DecisionTreeClassifier):
+    """A classifier that uses too much memory to train."""
+
+    def fit(self, X, y):
+        buffer = np.ones(50_000_000)
+        time.sleep(60)
+        return super().fit(X, y)
+
 class TestModelTrainer(unittest.TestCase):
     
     def test_classification_models(self):
@@ -56,5 +93,62 @@ class TestModelTrainer(unittest.TestCase):
         # Adjust the R-squared threshold to avoid false negatives in the test
         self.assertGreater(r2_score, 0.59)
 
+    def test_sparse_input(self):
+        """Test that sparse input reaches sparse-capable models and is densified for the others."""
+        data = load_iris()
+        X = sparse.csr_matrix(data.data)
+
+        model_trainer = ModelTrainer("classification")
+        model_trainer.initialize_models()
+        model_trainer.models.append(("Dense Only", DenseOnlyClassifier()))
+        trained_models = dict(model_trainer.train_models(X, data.target))
+
+        self.assertIsInstance(trained_models["Logistic Regression"], LogisticRegression)
+        self.assertIn("Dense Only", trained_models)
+        self.assertEqual(len(trained_models["Dense Only"].predict(X)), X.shape[0])
+
+    def test_parallel_training(self):
+        """Test that models trained on process and thread pools predict like serially trained ones, and failures stay isolated."""
+        data = load_iris()
+        for X in (data.data, sparse.csr_matrix(data.data)):
+            serial = ModelTrainer("classification")
+            serial.initialize_models()
+            expected = serial.train_models(X, data.target)
+            for pool in ("process", "thread"):
+                model_trainer = ModelTrainer("classification", workers=2, pool=pool)
+                model_trainer.initialize_models()
+                model_trainer.models.insert(1, ("Failing", FailingClassifier()))
+                model_trainer.models.append(("Dense Only", DenseOnlyClassifier(random_state=0)))
+                trained_models = model_trainer.train_models(X, data.target)
+
+                self.assertEqual([name for name, _ in trained_models],
+                                 ["Logistic Regression", "Decision Tree", "K-Nearest Neighbors", "Dense Only"])
+                for (_, expected_model), (_, model) in zip(expected[::2], trained_models[::2]):
+                    self.assertEqual(model.predict(X).tolist(), expected_model.predict(X).tolist())
+
+    def test_time_and_memory_limits(self):
+        """Test that models crossing the time or memory limit are stopped and reported, without affecting the others."""
+        data = load_iris()
+        model_trainer = ModelTrainer("classification", workers=2, time_limit=5, memory_limit=300 << 20)
+        model_trainer.models = [
+            ("Logistic Regression", LogisticRegression(max_iter=500)),
+            ("Slow", SlowClassifier()),
+            ("Memory Hungry", MemoryHungryClassifier()),
+            ("Failing", FailingClassifier()),
+        ]
+        start = time.perf_counter()
+        trained_models = model_trainer.train_models(sparse.csr_matrix(data.data), data.target)
+
+        self.assertLess(time.perf_counter() - start, 30)
+        self.assertEqual([name for name, _ in trained_models], ["Logistic Regression"])
+        self.assertEqual(len(trained_models[0][1].predict(data.data)), len(data.target))
+        self.assertEqual(model_trainer.failures,
+                         {"Slow": "timed out", "Memory Hungry": "over memory", "Failing": "failed to train"})
+
+    def test_invalid_pool(self):
+        """Test that an invalid pool raises a ValueError."""
+        with self.assertRaises(ValueError):
+            ModelTrainer("classification", pool="invalid")
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from mlstart.core.dataset import ColumnarDataset
 from mlstart.preprocessors.normalize_missing_values import NormalizeMissingValues
 
 class TestNormalizeMissingValues(unittest.TestCase):
@@ -21,7 +22,19 @@ class TestNormalizeMissingValues(unittest.TestCase):
         result = NormalizeMissingValues.process([], self.numeric_columns, self.categorical_columns)
         self.assertEqual(result, [])
 
+    def test_dataset_matches_rows(self):
+        """Test that the dictionary-encoded dataset path masks the same cells as the row path"""
+        rows = [dict(row, name=name) for row, name in zip(self.data, ['Alice', '###', 'Bob', '', 'Alice', '?!', 'Eve', 'Bob', 'x'])]
+        expected = NormalizeMissingValues.process([dict(row) for row in rows], self.numeric_columns, self.categorical_columns)
+        dataset = ColumnarDataset.from_rows(rows)
+        dataset.set_column('age', dataset.decode('age'), dataset.masks['age'])  # An unparsed object column
+        result = NormalizeMissingValues.process(dataset, self.numeric_columns, self.categorical_columns)
 
+        self.assertIn('name', result.categories)
+        self.assertEqual(result.to_list('name'), [row['name'] for row in expected])
+        for column in self.numeric_columns:
+            self.assertEqual(result.to_list(column),
+                             [None if row[column] is None else float(row[column]) for row in expected])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+import csv
+import os
+import tempfile
+import unittest
+from mlstart.core.data_loader import DataLoader
+from mlstart.core.parallel_loader import ParallelCSVLoader, split_byte_ranges
+
+class TestParallelLoader(unittest.TestCase):
+
+    def setUp(self):
+        """Write a CSV file with quoted fields containing newlines, commas and quotes"""
+        handle, self.file_path = tempfile.mkstemp(suffix=".csv")
+        texts = ["plain", "multi\nline\nfield", 'has "quotes"', "comma, inside", '"\n"']
+        with os.fdopen(handle, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["id", "text", "value"])
+            for i in range(500):
+                writer.writerow([i, texts[i % len(texts)], "?" if i % 7 == 0 else i / 2])
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_ranges_split_on_record_boundaries(self):
+        """Test that byte ranges never split a quoted field"""
+        header_end, ranges = split_byte_ranges(self.file_path, 7)
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(ranges[0][0], header_end)
+        with open(self.file_path, "rb") as file:
+            content = file.read()
+        for start, _ in ranges:
+            # Every range starts after a newline that is outside quotes
+            self.assertEqual(content[start - 1:start], b"\n")
+            self.assertEqual(content[:start].count(b'"') % 2, 0)
+
+    def test_parallel_load_matches_sequential_load(self):
+        """Test that parallel parsing produces the same dataset as the single-process loader"""
+        headers, expected = DataLoader(self.file_path).load_dataset()
+        parallel_headers, dataset = ParallelCSVLoader(self.file_path, workers=3).load()
+
+        self.assertEqual(parallel_headers, headers)
+        self.assertEqual(len(dataset), 500)
+        for column in headers:
+            self.assertEqual(dataset.columns[column].dtype, expected.columns[column].dtype)
+            self.assertEqual(dataset.to_list(column), expected.to_list(column))
+
+    def test_mixed_column_types_across_ranges(self):
+        """Test that a column numeric in some ranges and text in others is loaded as text"""
+        with open(self.file_path, "a", newline="") as file:
+            csv.writer(file).writerow([500, "last", "not a number"])
+        _, expected = DataLoader(self.file_path).load_dataset()
+        _, dataset = ParallelCSVLoader(self.file_path, workers=4).load()
+
+        self.assertFalse(dataset.is_numeric("value"))
+        self.assertEqual(dataset.to_list("value"), expected.to_list("value"))
+
+    def test_projected_parallel_load(self):
+        """Test that excluded columns are skipped by the worker processes"""
+        headers, dataset = ParallelCSVLoader(self.file_path, workers=3, exclude_columns=["text"]).load()
+        self.assertEqual(headers, ["id", "value"])
+        self.assertEqual(dataset.headers, headers)
+        _, expected = DataLoader(self.file_path).load_dataset()
+        self.assertEqual(dataset.to_list("value"), expected.to_list("value"))
+
+if __name__ == '__main__':
+    unittest.main()
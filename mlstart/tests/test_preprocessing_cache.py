@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from mlstart.core.column_identifier import ColumnIdentifier
+from mlstart.core.data_loader import DataLoader
+from mlstart.processing.datahandler import DataHandler
+from mlstart.processing.preprocessing_cache import PreprocessingCache
+from mlstart.processing.preprocessor_pipeline import PreprocessorPipeline
+
+class TestPreprocessingCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a temporary cache directory and load a sample dataset"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = PreprocessingCache(os.path.join(self.temp_dir, "preprocessed"))
+        self.loader = DataLoader("data/auto_mpg.csv")
+        self.numeric_columns, self.categorical_columns = ColumnIdentifier(self.load()).identify_column_types()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def load(self):
+        return self.loader.load_dataset()[1]
+
+    def run_pipeline(self, **kwargs):
+        pipeline = PreprocessorPipeline("regression", **kwargs)
+        result = pipeline.run(self.load(), self.numeric_columns, self.categorical_columns, ["car name"], self.cache)
+        return pipeline, result
+
+    def test_warm_run_matches_cold_run(self):
+        """Test that a cached result, with sparse hashed columns, equals the computed one and restores the state"""
+        pipeline, expected = self.run_pipeline(sparse=True, n_buckets=64)
+        warm, result = self.run_pipeline(sparse=True, n_buckets=64)
+
+        self.assertFalse(result.columns["mpg"].flags.writeable)  # Memory-mapped from the cache
+        self.assertEqual(warm.state, pipeline.state)
+        self.assertEqual(result.headers, expected.headers)
+        self.assertEqual(result.one_hot_columns, expected.one_hot_columns)
+        for column in expected.headers:
+            self.assertEqual(result.to_list(column), expected.to_list(column))
+        X, y = DataHandler(result, "mpg", "regression").split_features_and_target()
+        expected_X, expected_y = DataHandler(expected, "mpg", "regression").split_features_and_target()
+        self.assertEqual((X != expected_X).nnz, 0)
+        self.assertEqual(y.tolist(), expected_y.tolist())
+
+    def test_key_covers_configuration(self):
+        """Test that the data, columns and step configuration each change the key"""
+        config = PreprocessorPipeline("regression")._config()
+        key = self.cache.key("data", "regression", ["a"], ["b"], [], config)
+        self.assertEqual(key, self.cache.key("data", "regression", ["a"], ["b"], [], dict(config)))
+        self.assertNotEqual(key, self.cache.key("other", "regression", ["a"], ["b"], [], config))
+        self.assertNotEqual(key, self.cache.key("data", "regression", ["a", "b"], [], [], config))
+        self.assertNotEqual(key, self.cache.key("data", "regression", ["a"], ["b"], [],
+                                                dict(config, clip_outliers=True)))
+
+        dataset = self.load()
+        fingerprint = self.cache.fingerprint_dataset(dataset)
+        self.assertEqual(fingerprint, self.cache.fingerprint_dataset(self.load()))
+        self.assertNotEqual(fingerprint, self.cache.fingerprint_dataset(dataset.take(slice(1, None))))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test that entries beyond the size limit are removed, least recently used first"""
+        _, dataset = self.run_pipeline()
+        first = os.listdir(self.cache.cache_dir)[0]
+        with open(os.path.join(self.cache.cache_dir, first, "manifest.json")) as file:
+            size = json.load(file)["size"]
+        self.cache.store("second", dataset, None)
+        for age, key in ((30, first), (20, "second")):
+            manifest_path = os.path.join(self.cache.cache_dir, key, "manifest.json")
+            os.utime(manifest_path, (time.time() - age, time.time() - age))
+        self.assertIsNotNone(self.cache.load(first))  # Marks the first entry as recently used
+
+        self.cache.max_bytes = 2 * size
+        self.cache.store("third", dataset, None)
+        self.assertEqual(sorted(os.listdir(self.cache.cache_dir)), sorted([first, "third"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,325 @@
+import unittest
+import tempfile
+import os
+import numpy as np
+from mlstart.core.data_loader import DataLoader
+from mlstart.core.column_identifier import ColumnIdentifier
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.processing.datahandler import DataHandler
+from mlstart.processing.preprocessor_pipeline import PreprocessorPipeline
+
+class TestPreprocessorPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """Load a sample dataset for testing"""
+        self.loader = DataLoader("data/Iris.csv")
+        _, dataset = self.loader.load_dataset()
+        self.numeric_columns, self.categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+
+    def load(self):
+        return self.loader.load_dataset()[1]
+
+    def test_run_rows_and_dataset_agree(self):
+        """Test that the row-based and columnar pipelines produce the same numeric output"""
+        _, rows = DataLoader("data/Iris.csv").load_data()
+        pipeline = PreprocessorPipeline("classification")
+        row_result = pipeline.run(rows, self.numeric_columns, self.categorical_columns)
+        dataset_result = pipeline.run(self.load(), self.numeric_columns, self.categorical_columns)
+
+        self.assertEqual(len(row_result), len(dataset_result))
+        for column in self.numeric_columns:
+            for row, value in zip(row_result, dataset_result.to_list(column)):
+                self.assertAlmostEqual(row[column], value, places=9)
+
+    def test_compact_dtypes_match_full_precision(self):
+        """Test that preprocessing compact columns gives the same result as float64 columns"""
+        for task_type, file_path in [("classification", "data/Iris.csv"), ("regression", "data/auto_mpg.csv")]:
+            loader = DataLoader(file_path)
+            dataset = loader.load_dataset()[1]
+            column_identifier = ColumnIdentifier(dataset)
+            numeric_columns, categorical_columns = column_identifier.identify_column_types()
+            compact = column_identifier.compact_dtypes()
+
+            pipeline = PreprocessorPipeline(task_type)
+            expected = pipeline.run(loader.load_dataset()[1], numeric_columns, categorical_columns)
+            result = pipeline.run(compact, numeric_columns, categorical_columns)
+
+            self.assertEqual(result.headers, expected.headers)
+            for column in numeric_columns:
+                self.assertEqual(result.columns[column].dtype, np.float64)
+                for value, expected_value in zip(result.to_list(column), expected.to_list(column)):
+                    self.assertAlmostEqual(value, expected_value, places=5)
+            for column in result.headers:
+                if column not in numeric_columns:
+                    self.assertEqual(result.to_list(column), expected.to_list(column))
+
+    def test_compact_dtypes_keep_the_same_rows(self):
+        """Test that the default pipeline gives exactly the same rows and values whether or not columns are compacted"""
+        for task_type, file_path, target_column in [
+                ("regression", "data/StudentsPerformance.csv", "math score"), ("regression", "data/auto_mpg.csv", "mpg"),
+                ("regression", "data/Boston_Housing.csv", "medv"), ("classification", "data/Iris.csv", "Species"),
+                ("regression", "data/Admission_Predict.csv", "Chance of Admit"),
+                ("classification", "data/loan_data.csv", "loan_status")]:
+            loader = DataLoader(file_path)
+            column_identifier = ColumnIdentifier(loader.load_dataset()[1])
+            numeric_columns, categorical_columns = column_identifier.identify_column_types()
+            compact = column_identifier.compact_dtypes()
+
+            pipeline = PreprocessorPipeline(task_type)
+            expected = pipeline.run(loader.load_dataset()[1], numeric_columns, categorical_columns)
+            result = pipeline.run(compact, numeric_columns, categorical_columns)
+
+            self.assertEqual(len(result), len(expected), file_path)
+            X, y = DataHandler(result, target_column, task_type).split_features_and_target()
+            expected_X, expected_y = DataHandler(expected, target_column, task_type).split_features_and_target()
+            np.testing.assert_array_equal(X, expected_X, file_path)
+            np.testing.assert_array_equal(y, expected_y, file_path)
+
+    def test_run_split_fits_on_training_rows_only(self):
+        """Test that the values of the test rows do not change the fitted state, and every test row is kept"""
+        train_rows, test_rows = DataHandler.split_rows(len(self.load()))
+        pipeline = PreprocessorPipeline("classification")
+        train, test = pipeline.run_split(self.load(), train_rows, test_rows, self.numeric_columns,
+                                         self.categorical_columns)
+        state = pipeline.state
+
+        # Change every test value of a numeric column to an outlier and a categorical column to a new category
+        data = self.load()
+        column = self.numeric_columns[0]
+        values = data.columns[column].copy()
+        values[test_rows] = 1e9
+        data.set_column(column, values)
+        species = data.decode("Species")
+        species[test_rows] = "Iris-unknown"
+        data.set_column("Species", species)
+
+        changed_train, changed_test = pipeline.run_split(data, train_rows, test_rows, self.numeric_columns,
+                                                         self.categorical_columns)
+        self.assertEqual(pipeline.state, state)
+        self.assertEqual(len(changed_test), len(test_rows))
+        self.assertEqual(changed_train.headers, train.headers)
+        for name in train.headers:
+            self.assertEqual(changed_train.to_list(name), train.to_list(name))
+
+    def test_run_batches_matches_run(self):
+        """Test that two-pass batch preprocessing matches in-memory preprocessing"""
+        pipeline = PreprocessorPipeline("classification")
+        expected = pipeline.run(self.load(), self.numeric_columns, self.categorical_columns)
+        batches = pipeline.run_batches(
+            lambda: self.loader.iter_batches(batch_size=40, text_columns=self.categorical_columns),
+            self.numeric_columns,
+            self.categorical_columns,
+        )
+        result = ColumnarDataset.concat(list(batches))
+
+        self.assertEqual(result.headers, expected.headers)
+        self.assertEqual(len(result), len(expected))
+        for column in expected.headers:
+            for actual, wanted in zip(result.to_list(column), expected.to_list(column)):
+                self.assertAlmostEqual(actual, wanted, places=9)
+
+    def test_fused_run_matches_sequential_steps(self):
+        """Test that the compiled two-scan plan gives the same result as the sequential steps"""
+        for compact in (False, True):
+            dataset = self.load()
+            if compact:
+                dataset = ColumnIdentifier(dataset).compact_dtypes()
+            expected = PreprocessorPipeline("classification", fused=False).run(
+                self.load(), self.numeric_columns, self.categorical_columns)
+            result = PreprocessorPipeline("classification").run(dataset, self.numeric_columns, self.categorical_columns)
+
+            self.assertEqual(result.headers, expected.headers)
+            self.assertEqual(len(result), len(expected))
+            for column in expected.headers:
+                for actual, wanted in zip(result.to_list(column), expected.to_list(column)):
+                    self.assertAlmostEqual(actual, wanted, places=5 if compact else 9)
+
+    def test_fused_regression_matches_batches(self):
+        """Test that in-memory and streamed regression preprocessing filter the same outliers"""
+        loader = DataLoader("data/auto_mpg.csv")
+        dataset = loader.load_dataset()[1]
+        numeric_columns, categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+        pipeline = PreprocessorPipeline("regression")
+        expected = pipeline.run(dataset, numeric_columns, categorical_columns)
+        batches = pipeline.run_batches(
+            lambda: loader.iter_batches(batch_size=64, text_columns=categorical_columns),
+            numeric_columns,
+            categorical_columns,
+        )
+        result = ColumnarDataset.concat(list(batches))
+
+        self.assertLess(len(result), len(dataset))
+        self.assertEqual(len(result), len(expected))
+        for column in numeric_columns:
+            for actual, wanted in zip(result.to_list(column), expected.to_list(column)):
+                self.assertAlmostEqual(actual, wanted, places=9)
+
+    def test_configured_steps(self):
+        """Test that only the configured steps are compiled into the plan"""
+        pipeline = PreprocessorPipeline("classification", steps=["normalize_missing_values", "handle_missing_values"])
+        result = pipeline.run(self.load(), self.numeric_columns, self.categorical_columns)
+        self.assertEqual(result.to_list("Species")[0], "Iris-setosa")
+        self.assertEqual(result.to_list("SepalLengthCm")[0], 5.1)
+
+        with self.assertRaises(ValueError):
+            PreprocessorPipeline("classification", steps=["scale_everything"]).compile([], [])
+
+    def test_mode_capacity(self):
+        """Test that a mode capacity bounds the mode counters of the plan, unless categories are encoded"""
+        steps = ["normalize_missing_values", "handle_missing_values"]
+        plan = PreprocessorPipeline("classification", steps=steps, mode_capacity=2).compile([], ["Species"])
+        counters = plan.accumulate(self.load())["categorical"]
+        self.assertEqual(len(counters["Species"].counts), 2)
+
+        encoding = PreprocessorPipeline("classification", mode_capacity=2).compile([], ["Species"])
+        self.assertEqual(len(encoding.accumulate(self.load())["categorical"]["Species"].counts), 3)
+
+        for fused in (True, False):
+            pipeline = PreprocessorPipeline("classification", steps=steps, fused=fused, mode_capacity=2)
+            result = pipeline.run(self.load(), self.numeric_columns, self.categorical_columns)
+            self.assertEqual(result.to_list("Species")[0], "Iris-setosa")
+
+    def test_run_batches_removes_duplicates_across_batches(self):
+        """Test that duplicates split over different batches are removed"""
+        rows = [{"x": "1", "y": "a"}, {"x": "2", "y": "b"}, {"x": "1", "y": "a"}, {"x": "3", "y": "b"}]
+        batches = [ColumnarDataset.from_rows(rows[:2]), ColumnarDataset.from_rows(rows[2:])]
+        pipeline = PreprocessorPipeline("classification")
+        result = list(pipeline.run_batches(lambda: iter(batches), ["x"], ["y"]))
+
+        self.assertEqual([len(batch) for batch in result], [2, 1])
+
+    def test_save_and_load_state(self):
+        """Test that a saved state reproduces the preprocessing of the fitted pipeline"""
+        for task_type, file_path, target in [("classification", "data/Iris.csv", "Species"),
+                                             ("regression", "data/auto_mpg.csv", "mpg")]:
+            loader = DataLoader(file_path)
+            dataset = loader.load_dataset()[1]
+            numeric_columns, categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+            pipeline = PreprocessorPipeline(task_type)
+            pipeline.fit(dataset, numeric_columns, categorical_columns)
+            expected = pipeline.transform(loader.load_dataset()[1])
+
+            with tempfile.TemporaryDirectory() as directory:
+                state_path = os.path.join(directory, "state.json")
+                pipeline.save_state(state_path)
+                loaded = PreprocessorPipeline.load_state(state_path)
+
+            self.assertEqual(loaded.state, pipeline.state)
+            new_data = loader.load_dataset()[1]
+            new_data.drop_columns([target])
+            result = loaded.transform(new_data)
+            self.assertEqual(len(result), len(dataset))
+            for column in result.headers:
+                for actual, wanted in zip(result.to_list(column), expected.to_list(column)):
+                    self.assertAlmostEqual(actual, wanted, places=9)
+
+    def test_transform_matches_run(self):
+        """Test that fit and a filtering transform give the same result as run"""
+        pipeline = PreprocessorPipeline("classification")
+        expected = pipeline.run(self.load(), self.numeric_columns, self.categorical_columns)
+        pipeline.fit(self.load(), self.numeric_columns, self.categorical_columns)
+        result = pipeline.transform(self.load(), filter_rows=True)
+
+        self.assertEqual(result.headers, expected.headers)
+        for column in expected.headers:
+            self.assertEqual(result.to_list(column), expected.to_list(column))
+
+        with self.assertRaises(ValueError):
+            PreprocessorPipeline("classification").transform(self.load())
+
+    def test_sparse_matches_dense_features(self):
+        """Test that sparse one-hot encoding gives the same feature matrix as dense encoding"""
+        loader = DataLoader("data/auto_mpg.csv")
+        dataset = loader.load_dataset()[1]
+        numeric_columns, categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+        self.assertTrue(categorical_columns)
+        for fused in (True, False):
+            dense = PreprocessorPipeline("regression", fused=fused).run(
+                loader.load_dataset()[1], numeric_columns, categorical_columns)
+            encoded = PreprocessorPipeline("regression", fused=fused, sparse=True).run(
+                loader.load_dataset()[1], numeric_columns, categorical_columns)
+
+            X_dense, y_dense = DataHandler(dense, "mpg", "regression").split_features_and_target()
+            X_sparse, y_sparse = DataHandler(encoded, "mpg", "regression").split_features_and_target()
+            self.assertEqual(X_sparse.shape, X_dense.shape)
+            self.assertEqual(abs(X_sparse.toarray() - X_dense).max(), 0)
+            self.assertEqual(y_sparse.tolist(), y_dense.tolist())
+
+    def test_hashed_columns(self):
+        """Test that hashed columns are encoded alike in memory, sequentially, in batches and after reloading"""
+        loader = DataLoader("data/auto_mpg.csv")
+        dataset = loader.load_dataset()[1]
+        numeric_columns, categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+        pipeline = PreprocessorPipeline("regression", n_buckets=64)
+        expected = pipeline.run(dataset, numeric_columns, categorical_columns, ["car name"])
+        self.assertEqual(expected.one_hot_matrix("car name").shape, (len(expected), 64))
+
+        sequential = PreprocessorPipeline("regression", fused=False, n_buckets=64).run(
+            loader.load_dataset()[1], numeric_columns, categorical_columns, ["car name"])
+        batches = pipeline.run_batches(
+            lambda: loader.iter_batches(batch_size=64, text_columns=categorical_columns),
+            numeric_columns, categorical_columns, ["car name"])
+        streamed = ColumnarDataset.concat(list(batches))
+        for result in (sequential, streamed):
+            self.assertEqual(result.one_hot_columns, {"car name"})
+            self.assertEqual(result.to_list("car name"), expected.to_list("car name"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            state_path = os.path.join(directory, "state.json")
+            pipeline.save_state(state_path)
+            loaded = PreprocessorPipeline.load_state(state_path)
+        result = loaded.transform(loader.load_dataset()[1], filter_rows=True)
+        self.assertEqual(result.to_list("car name"), expected.to_list("car name"))
+
+    def test_clip_outliers(self):
+        """Test that clipping outliers keeps the rows and matches between fused and sequential runs"""
+        loader = DataLoader("data/auto_mpg.csv")
+        dataset = loader.load_dataset()[1]
+        numeric_columns, categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+        fused = PreprocessorPipeline("regression", clip_outliers=True).run(
+            dataset, numeric_columns, categorical_columns)
+        sequential = PreprocessorPipeline("regression", fused=False, clip_outliers=True).run(
+            loader.load_dataset()[1], numeric_columns, categorical_columns)
+
+        self.assertEqual(len(fused), len(dataset))
+        self.assertEqual(len(sequential), len(dataset))
+        for column in numeric_columns:
+            for actual, wanted in zip(fused.to_list(column), sequential.to_list(column)):
+                self.assertAlmostEqual(actual, wanted, places=9)
+
+    def test_run_batches_with_quantile_sketches(self):
+        """Test that outlier bounds fitted from small quantile sketches are close to the exact bounds"""
+        loader = DataLoader("data/auto_mpg.csv")
+        dataset = loader.load_dataset()[1]
+        numeric_columns, categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+        exact = PreprocessorPipeline("regression")
+        exact.run(dataset, numeric_columns, categorical_columns)
+        sketched = PreprocessorPipeline("regression", quantile_error=0.05)
+        batches = sketched.run_batches(
+            lambda: loader.iter_batches(batch_size=64, text_columns=categorical_columns),
+            numeric_columns, categorical_columns)
+        result = ColumnarDataset.concat(list(batches))
+
+        self.assertGreater(len(result), 0.9 * len(dataset))
+        exact_bounds = exact.state["steps_state"]["handle_outliers"]["bounds"]
+        for column, (lower_bound, upper_bound) in sketched.state["steps_state"]["handle_outliers"]["bounds"].items():
+            width = exact_bounds[column][1] - exact_bounds[column][0]
+            self.assertLess(abs(lower_bound - exact_bounds[column][0]), 0.25 * width)
+            self.assertLess(abs(upper_bound - exact_bounds[column][1]), 0.25 * width)
+
+    def test_parallel_workers_match_serial(self):
+        """Test that spreading the columns over workers gives exactly the serial result"""
+        loader = DataLoader("data/auto_mpg.csv")
+        numeric_columns, categorical_columns = ColumnIdentifier(loader.load_dataset()[1]).identify_column_types()
+        for fused in (True, False):
+            expected = PreprocessorPipeline("regression", fused=fused).run(
+                loader.load_dataset()[1], numeric_columns, categorical_columns)
+            pipeline = PreprocessorPipeline("regression", fused=fused, workers=4)
+            result = pipeline.run(loader.load_dataset()[1], numeric_columns, categorical_columns)
+
+            self.assertEqual(result.headers, expected.headers)
+            for column in expected.headers:
+                self.assertEqual(result.to_list(column), expected.to_list(column))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest
-from mlstart.preprocessors.remove_duplicates import RemoveDuplicates
+import numpy as np
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.preprocessors.remove_duplicates import RemoveDuplicates, SeenRows
 
 class TestRemoveDuplicates(unittest.TestCase):
 
@@ -80,5 +84,38 @@ class TestRemoveDuplicates(unittest.TestCase):
         ]
         self.assertEqual(result, expected_result)
 
+    def dataset(self, rows):
+        return ColumnarDataset.from_rows([{key: None if value is None else str(value) for key, value in row.items()}
+                                          for row in rows])
+
+    def test_dataset_matches_rows(self):
+        """Test that the hashed columnar path keeps the same rows as the row path"""
+        rows = self.data + [{'age': None, 'salary': 5000, 'name': 'Alice'}, {'age': None, 'salary': 5000, 'name': 'Alice'}]
+        result = RemoveDuplicates.process(self.dataset(rows))
+        expected = RemoveDuplicates.process(rows)
+        self.assertEqual(result.to_list('name'), [row['name'] for row in expected])
+        self.assertEqual(result.to_list('age'), [None if row['age'] is None else float(row['age']) for row in expected])
+
+    def test_hash_collisions_are_checked(self):
+        """Test that distinct rows with the same hash are both kept"""
+        dataset = self.dataset(self.data)
+        keep = RemoveDuplicates.first_occurrences(dataset, np.zeros(len(dataset), dtype=np.uint64))
+        self.assertEqual(keep.tolist(), [True, True, False, True, False, True])
+
+    def test_seen_rows_across_batches(self):
+        """Test that duplicates are removed across batches, also after spilling rows to disk"""
+        batches = [self.dataset(self.data[:3]), self.dataset(self.data[3:]), self.dataset(self.data[1:2] + self.data[3:])]
+        # The same value with another dtype and dictionary is still a duplicate
+        batches[2].set_column('age', batches[2].columns['age'].astype(np.int8))
+        batches[2].set_column('name', np.array([0, 1, 0, 3]), categories=np.array(['Bob', 'Charlie', 'David', 'Zoe'], dtype=object))
+        with tempfile.TemporaryDirectory() as directory:
+            seen = SeenRows(max_rows=2, spill_dir=directory, n_partitions=4)
+            kept = [seen.filter(batch).tolist() for batch in batches]
+            self.assertTrue(os.listdir(directory))
+            seen.close()
+            self.assertFalse(os.listdir(directory))
+        self.assertEqual(kept, [[True, True, False], [True, False, True], [False, False, False, True]])
+        self.assertEqual(len(seen), 5)  # Alice, Bob, Charlie, David and David renamed Zoe
+
 if __name__ == '__main__':
     unittest.main()
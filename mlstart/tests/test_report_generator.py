@@ -27,6 +27,19 @@ class TestReportGenerator(unittest.TestCase):
         self.assertIn("Summary Table (All Metrics at a Glance):", report)
         self.assertIn("Metric: Accuracy (Higher is Better)", report)
         self.assertIn("Best Model: Model B", report)
+        self.assertNotIn("cross-validation", report)
+
+    def test_generate_report_with_folds(self):
+        """Test that a report of fold-averaged metrics states the number of folds"""
+        report = self.report_generator.generate_report(self.model_metrics, self.best_model_name, self.rankings, 5)
+        self.assertIn("Metrics are averaged over 5 cross-validation folds.", report)
+
+    def test_generate_report_with_excluded_models(self):
+        """Test that models left out of the rankings are listed with the reason"""
+        report = self.report_generator.generate_report(self.model_metrics, self.best_model_name, self.rankings,
+                                                       excluded_models={"Model D": "eliminated after 500 rows"})
+        self.assertIn("Models Not Ranked", report)
+        self.assertIn("Model D                   eliminated after 500 rows", report)
 
     def test_save_report(self):
         """Test if the report is saved to a file correctly"""
@@ -1,4 +1,5 @@
 import unittest
+from mlstart.core.dataset import ColumnarDataset
 import math
 from mlstart.preprocessors.scale_numeric import ScaleNumeric
 
@@ -72,5 +73,16 @@ class TestScaleNumeric(unittest.TestCase):
             self.assertAlmostEqual(row['age'], scaled_age, places=6)
             self.assertEqual(row['salary'], data_with_single_column[i]['salary'])
 
+    def test_fit_transform(self):
+        """Test that new data is scaled with the statistics fitted on the training data"""
+        train = ColumnarDataset.from_rows([{'age': '25'}, {'age': '30'}, {'age': '35'}])
+        state = ScaleNumeric.fit(train, ['age'])
+        self.assertEqual(state['means'], {'age': 30.0})
+
+        new = ColumnarDataset.from_rows([{'age': '30'}, {'age': '40'}])
+        result = ScaleNumeric.transform(new, state)
+        self.assertAlmostEqual(result.to_list('age')[0], 0.0)
+        self.assertAlmostEqual(result.to_list('age')[1], 10 / state['stds']['age'])
+
 if __name__ == '__main__':
     unittest.main()
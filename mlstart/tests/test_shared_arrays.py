@@ -0,0 +1,70 @@
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+from mlstart.core import shared_arrays
+from mlstart.core.shared_arrays import SharedArrays, detach_unused
+
+
+def attached_sum(descriptor):
+    with SharedArrays.attach(descriptor) as arrays:
+        sums = float(arrays['X'].sum()), float(arrays['S'].sum())
+    return (*sums, os.getpid(), len(shared_arrays._attached))
+
+
+class TestSharedArrays(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a dense array, a sparse matrix and an integer vector"""
+        self.arrays = {
+            'X': np.arange(12, dtype=np.float32).reshape(4, 3),
+            'S': sparse.csr_matrix(np.array([[0.0, 1.5], [2.0, 0.0], [0.0, 0.0]])),
+            'y': np.array([1, 0, 1], dtype=np.int64),
+        }
+
+    def test_attach_returns_read_only_copies(self):
+        """Test that attached arrays equal the originals and cannot be written"""
+        with SharedArrays(self.arrays) as shared:
+            with SharedArrays.attach(shared.descriptor) as arrays:
+                np.testing.assert_array_equal(arrays['X'], self.arrays['X'])
+                self.assertEqual(arrays['X'].dtype, np.float32)
+                self.assertTrue(sparse.issparse(arrays['S']))
+                np.testing.assert_array_equal(arrays['S'].toarray(), self.arrays['S'].toarray())
+                np.testing.assert_array_equal(arrays['y'], self.arrays['y'])
+                with self.assertRaises(ValueError):
+                    arrays['X'][0, 0] = 1.0
+            self.assertEqual(arrays, {})
+
+    def test_repeated_attachments_do_not_accumulate(self):
+        """Test that every block is detached when its attachments exit, so repeated runs do not grow"""
+        for _ in range(5):
+            with SharedArrays(self.arrays) as shared:
+                with SharedArrays.attach(shared.descriptor) as outer, \
+                        SharedArrays.attach(shared.descriptor) as inner:
+                    self.assertEqual(float(outer['X'].sum() + inner['X'].sum()), 132.0)
+                    self.assertEqual(len(shared_arrays._attached), 1)
+                self.assertEqual(shared_arrays._attached, {})
+
+    def test_array_in_use_keeps_the_block(self):
+        """Test that an array still in use after the attachment exits keeps its block until it is released"""
+        with SharedArrays(self.arrays) as shared:
+            with SharedArrays.attach(shared.descriptor) as arrays:
+                X = arrays['X']
+            self.assertEqual(len(shared_arrays._attached), 1)
+            self.assertEqual(float(X.sum()), 66.0)
+            del X
+            self.assertEqual(detach_unused(), 0)
+
+    def test_worker_processes_map_the_block(self):
+        """Test that worker processes read the arrays from the shared block"""
+        with SharedArrays(self.arrays) as shared, ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(attached_sum, [shared.descriptor] * 2))
+        for X_sum, S_sum, pid, attached in results:
+            self.assertEqual((X_sum, S_sum), (66.0, 3.5))
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(attached, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from mlstart.core.data_loader import DataLoader
+from mlstart.core.column_identifier import ColumnIdentifier
+from mlstart.core.dataset import ColumnarDataset
+from mlstart.processing.preprocessor_pipeline import PreprocessorPipeline
+from mlstart.processing.step_planner import StepPlanner
+
+class TestStepPlanner(unittest.TestCase):
+
+    def setUp(self):
+        """Load a regression dataset in which every row appears three times"""
+        loader = DataLoader("data/auto_mpg.csv")
+        dataset = loader.load_dataset()[1]
+        self.dataset = ColumnarDataset.concat([dataset, dataset, dataset])
+        self.numeric_columns, self.categorical_columns = ColumnIdentifier(dataset).identify_column_types()
+
+    def test_filters_move_ahead_of_transforms(self):
+        """Test that duplicate and outlier removal run before encoding, with fits kept in place"""
+        plan = StepPlanner("regression", PreprocessorPipeline("regression").steps).plan(
+            self.dataset, self.numeric_columns, self.categorical_columns)
+
+        self.assertEqual(plan.steps(), ["remove_invalid_columns", "normalize_missing_values", "handle_missing_values",
+                                        "remove_duplicates", "scale_numeric", "handle_outliers", "encode_categorical"])
+        self.assertLess(plan.operations.index(("fit", "encode_categorical")),
+                        plan.operations.index(("run", "remove_duplicates")))
+        self.assertLess(plan.cost, plan.baseline_cost)
+        self.assertAlmostEqual(plan.estimates["remove_duplicates"], 1 / 3, places=2)
+        self.assertIn("keeps about 33% of the rows", plan.report())
+
+    def test_unsafe_moves_are_not_planned(self):
+        """Test that duplicates stay after hashing and clipped outliers are not treated as a filter"""
+        steps = PreprocessorPipeline("regression").steps
+        hashed = StepPlanner("regression", steps, hashed_columns=["car name"]).plan(
+            self.dataset, self.numeric_columns, self.categorical_columns)
+        self.assertLess(hashed.steps().index("encode_categorical"), hashed.steps().index("remove_duplicates"))
+
+        clipped = StepPlanner("regression", steps, clip_outliers=True).plan(
+            self.dataset, self.numeric_columns, self.categorical_columns)
+        self.assertLess(clipped.steps().index("encode_categorical"), clipped.steps().index("handle_outliers"))
+        self.assertNotIn("handle_outliers", clipped.estimates)
+
+        classification = StepPlanner("classification", steps).plan(
+            self.dataset, self.numeric_columns, self.categorical_columns)
+        self.assertNotIn("handle_outliers", classification.steps())
+
+    def test_reordered_run_matches_configured_order(self):
+        """Test that the planned order gives the same result as the configured order"""
+        expected = PreprocessorPipeline("regression", fused=False, reorder=False).run(
+            self.dataset.copy(), self.numeric_columns, self.categorical_columns)
+        pipeline = PreprocessorPipeline("regression", fused=False)
+        result = pipeline.run(self.dataset.copy(), self.numeric_columns, self.categorical_columns)
+
+        self.assertNotEqual(pipeline.step_plan.steps(), list(pipeline.steps))
+        self.assertEqual(result.headers, expected.headers)
+        self.assertEqual(len(result), len(expected))
+        for column in expected.headers:
+            self.assertEqual(result.to_list(column), expected.to_list(column))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.dummy import DummyClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+from mlstart.models.successive_halving import SuccessiveHalving
+
+
+class FailingClassifier(DecisionTreeClassifier):
+    """A classifier that always fails to train."""
+
+    def fit(self, X, y):
+        raise ValueError("cannot fit")
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a sample classification dataset and candidate models"""
+        self.X, self.y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=0)
+        self.models = [
+            ("Logistic Regression", LogisticRegression()),
+            ("Most Frequent", DummyClassifier(strategy="most_frequent")),
+            ("Failing", FailingClassifier()),
+            ("Decision Tree", DecisionTreeClassifier(random_state=0)),
+            ("K-Nearest Neighbors", KNeighborsClassifier()),
+        ]
+
+    def test_race_drops_worse_models(self):
+        """Test that the worst models are dropped early and the survivors are trained on all the rows"""
+        racer = SuccessiveHalving("classification", min_samples=200, eta=2)
+        trained_models, eliminated = racer.race(self.models, self.X, self.y)
+
+        self.assertEqual(eliminated["Failing"], "failed to train")
+        self.assertEqual(eliminated["Most Frequent"], "eliminated after 200 rows")
+        self.assertEqual(len(trained_models), 1)
+        self.assertEqual(len(trained_models) + len(eliminated), len(self.models))
+        name, model = trained_models[0]
+        self.assertNotIn(name, eliminated)
+        self.assertEqual(model.n_features_in_, 10)
+        if name == "K-Nearest Neighbors":
+            self.assertEqual(model.n_samples_fit_, len(self.y))
+        self.assertFalse(hasattr(self.models[0][1], "coef_"))  # The candidates are cloned
+
+    def test_time_budget_stops_the_race(self):
+        """Test that a used-up budget returns the survivors of the first round as trained on it"""
+        racer = SuccessiveHalving("classification", min_samples=200, eta=2, time_budget=0)
+        trained_models, eliminated = racer.race(self.models, self.X, self.y)
+
+        self.assertEqual([name for name, _ in trained_models], [name for name, _ in self.models
+                                                                 if name not in eliminated])
+        knn = dict(trained_models).get("K-Nearest Neighbors")
+        if knn is not None:
+            self.assertEqual(knn.n_samples_fit_, 200)
+
+    def test_small_data_is_not_raced(self):
+        """Test that data no larger than the first subsample trains every candidate on all the rows"""
+        racer = SuccessiveHalving("classification", min_samples=5000)
+        trained_models, eliminated = racer.race(self.models, self.X, self.y)
+        self.assertEqual(eliminated, {"Failing": "failed to train"})
+        self.assertEqual(dict(trained_models)["K-Nearest Neighbors"].n_samples_fit_, len(self.y))
+
+    def test_subsamples_are_stratified(self):
+        """Test that every prefix of the subsample order keeps the class proportions"""
+        y = np.array([0] * 900 + [1] * 100)
+        order = SuccessiveHalving("classification").subsample_order(y)
+        self.assertEqual(sorted(order.tolist()), list(range(1000)))
+        for size in (10, 50, 200):
+            self.assertEqual(int(y[order[:size]].sum()), size // 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
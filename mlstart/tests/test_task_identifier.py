@@ -1,4 +1,8 @@
 import unittest
+import numpy as np
+from mlstart.core import task_identifier as task_identifier_module
+from mlstart.core.data_loader import DataLoader
+from mlstart.core.dataset import ColumnarDataset
 from mlstart.core.task_identifier import TaskIdentifier
 
 class TaskIdentifier:
@@ -102,5 +106,33 @@ class TestTaskIdentifier(unittest.TestCase):
         task_identifier = TaskIdentifier(data, headers, "target")
         self.assertEqual(task_identifier.determine_task_type(), "classification")
 
+class TestStreamingTaskIdentifier(unittest.TestCase):
+
+    def test_stops_when_threshold_is_reached(self):
+        """Test that the scan stops reading batches once the target is known to be continuous."""
+        def batches():
+            yield ColumnarDataset({"target": np.arange(20, dtype=np.float64)})
+            raise AssertionError("The stream was read past the threshold")
+
+        identifier = task_identifier_module.TaskIdentifier(batches(), ["target"], "target")
+        self.assertEqual(identifier.determine_task_type(), "regression")
+        self.assertIsNone(identifier.cardinality)
+
+    def test_loader_stream(self):
+        """Test task detection directly on the loader's stream of the target column."""
+        loader = DataLoader("data/Iris.csv", columns=["Species"])
+        identifier = task_identifier_module.TaskIdentifier(loader.iter_batches(batch_size=50), ["Species"], "Species")
+        self.assertEqual(identifier.determine_task_type(), "classification")
+        self.assertEqual(identifier.cardinality, 3)
+
+    def test_cardinality_estimate(self):
+        """Test that the HyperLogLog estimate is reported for continuous targets."""
+        _, dataset = DataLoader("data/auto_mpg.csv").load_dataset()
+        identifier = task_identifier_module.TaskIdentifier(dataset, dataset.headers, "weight",
+                                                           estimate_cardinality=True)
+        self.assertEqual(identifier.determine_task_type(), "regression")
+        exact = len(set(dataset.to_list("weight")))
+        self.assertLess(abs(identifier.cardinality - exact), 0.05 * exact)
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,19 +2,33 @@ import unittest
 
 # Import test modules
 
+from mlstart.tests import test_accumulators
+from mlstart.tests import test_cardinality
+from mlstart.tests import test_column_executor
 from mlstart.tests import test_column_identifier
+from mlstart.tests import test_cross_validation
 from mlstart.tests import test_data_loader
 from mlstart.tests import test_datahandler
+from mlstart.tests import test_dataset
+from mlstart.tests import test_dataset_cache
 from mlstart.tests import test_encode_categorical
+from mlstart.tests import test_handle_missing_values
 from mlstart.tests import test_handle_outlier
+from mlstart.tests import test_hash_categorical
 from mlstart.tests import test_model_comparator
 from mlstart.tests import test_model_evaluator
 from mlstart.tests import test_model_trainer
 from mlstart.tests import test_normalize_missing_value
+from mlstart.tests import test_parallel_loader
+from mlstart.tests import test_preprocessing_cache
+from mlstart.tests import test_preprocessor_pipeline
 from mlstart.tests import test_remove_duplicates
 from mlstart.tests import test_remove_invalid_columns
 from mlstart.tests import test_report_generator
 from mlstart.tests import test_scale_numeric
+from mlstart.tests import test_shared_arrays
+from mlstart.tests import test_step_planner
+from mlstart.tests import test_successive_halving
 from mlstart.tests import test_task_identifier
 
 # Initialize test suite
@@ -23,19 +37,33 @@ suite = unittest.TestSuite()
 
 # Add tests to the test suite
 
+suite.addTest(loader.loadTestsFromModule(test_accumulators))
+suite.addTest(loader.loadTestsFromModule(test_cardinality))
+suite.addTest(loader.loadTestsFromModule(test_column_executor))
 suite.addTest(loader.loadTestsFromModule(test_column_identifier))
+suite.addTest(loader.loadTestsFromModule(test_cross_validation))
 suite.addTest(loader.loadTestsFromModule(test_data_loader))
 suite.addTest(loader.loadTestsFromModule(test_datahandler))
+suite.addTest(loader.loadTestsFromModule(test_dataset))
+suite.addTest(loader.loadTestsFromModule(test_dataset_cache))
 suite.addTest(loader.loadTestsFromModule(test_encode_categorical))
+suite.addTest(loader.loadTestsFromModule(test_handle_missing_values))
 suite.addTest(loader.loadTestsFromModule(test_handle_outlier))
+suite.addTest(loader.loadTestsFromModule(test_hash_categorical))
 suite.addTest(loader.loadTestsFromModule(test_model_comparator))
 suite.addTest(loader.loadTestsFromModule(test_model_evaluator))
 suite.addTest(loader.loadTestsFromModule(test_model_trainer))
 suite.addTest(loader.loadTestsFromModule(test_normalize_missing_value))
+suite.addTest(loader.loadTestsFromModule(test_parallel_loader))
+suite.addTest(loader.loadTestsFromModule(test_preprocessing_cache))
+suite.addTest(loader.loadTestsFromModule(test_preprocessor_pipeline))
 suite.addTest(loader.loadTestsFromModule(test_remove_duplicates))
 suite.addTest(loader.loadTestsFromModule(test_remove_invalid_columns))
 suite.addTest(loader.loadTestsFromModule(test_report_generator))
 suite.addTest(loader.loadTestsFromModule(test_scale_numeric))
+suite.addTest(loader.loadTestsFromModule(test_shared_arrays))
+suite.addTest(loader.loadTestsFromModule(test_step_planner))
+suite.addTest(loader.loadTestsFromModule(test_successive_halving))
 suite.addTest(loader.loadTestsFromModule(test_task_identifier))
 
 # Initialize a test runner and run the test suite